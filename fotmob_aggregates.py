@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+FotMob Season Aggregates
+Running per-player and per-team season totals of the player stats (matches,
+minutes, rating, and the sum of every counting stat), kept in
+playerStats/aggregates (built on first use) and updated with one match's
+rows whenever a player stats CSV is written. Season tables with per-90s are
+read straight from the totals; a full recompute from the per-match CSVs is
+kept to verify them.
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from fotmob_csv import locked, write_frame
+from fotmob_dataset import season_of
+from fotmob_stats import PLAYER_STATS_COLUMNS
+
+
+BASE_DIR = Path(__file__).resolve().parent
+PLAYER_CSV_DIR = BASE_DIR / 'playerStats' / 'csv'
+AGGREGATES_DIR = BASE_DIR / 'playerStats' / 'aggregates'
+PLAYER_TOTALS_FILE = AGGREGATES_DIR / 'player_totals.csv'
+TEAM_TOTALS_FILE = AGGREGATES_DIR / 'team_totals.csv'
+APPLIED_FILE = AGGREGATES_DIR / 'applied_matches.csv'
+
+RATING_COLUMN = 'FotMob_rating'
+MINUTES_COLUMN = 'Minutes_played'
+SUM_COLUMNS = [column for column in PLAYER_STATS_COLUMNS if column not in (RATING_COLUMN, MINUTES_COLUMN)]
+# Per-90 rates are given for counts; '<stat>_value'/'<stat>_total' pairs get a success rate instead
+PER90_COLUMNS = [column for column in SUM_COLUMNS if not column.endswith('_total')]
+RATE_PAIRS = [(column, f"{column[:-len('_value')]}_total") for column in SUM_COLUMNS
+              if column.endswith('_value') and f"{column[:-len('_value')]}_total" in SUM_COLUMNS]
+
+PLAYER_KEY = ['season', 'playerId']
+TEAM_KEY = ['season', 'teamId']
+PLAYER_LABELS = ['name', 'teamId', 'teamName']
+TEAM_LABELS = ['teamName']
+COUNTERS = ['matches', 'minutes', 'rating_sum', 'rated_matches'] + SUM_COLUMNS
+TEAM_COUNTERS = ['matches', 'minutes'] + SUM_COLUMNS
+TOLERANCE = 1e-6
+
+
+def numeric(df, column):
+    """A column as floats with missing values (and missing columns) as 0"""
+    if column not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return pd.to_numeric(df[column], errors='coerce').fillna(0.0)
+
+
+def player_rows(df):
+    """Turn one or more per-match player stats frames into counter rows, one per player per match"""
+    rating = pd.to_numeric(df[RATING_COLUMN], errors='coerce') if RATING_COLUMN in df.columns \
+        else pd.Series(float('nan'), index=df.index)
+    minutes = numeric(df, MINUTES_COLUMN)
+    columns = {
+        'season': df['matchDate'].map(lambda date: season_of(str(date))),
+        'matchId': df['matchId'].astype('int64'),
+        'playerId': df['id'].astype('int64'),
+        'name': df['name'],
+        'teamId': df['teamId'].astype('int64'),
+        'teamName': df['teamName'],
+        'matches': (minutes > 0).astype('int64'),
+        'minutes': minutes,
+        'rating_sum': rating.fillna(0.0),
+        'rated_matches': rating.notna().astype('int64'),
+    }
+    columns.update({column: numeric(df, column) for column in SUM_COLUMNS})
+    return pd.DataFrame(columns)
+
+
+def nonzero(totals, counters):
+    """Drop the rows whose counters are all zero (e.g. players who stayed on the bench)"""
+    return totals[(totals[counters].abs() > TOLERANCE).any(axis=1)]
+
+
+def player_totals_of(rows):
+    """Sum counter rows per player and season (labels from the player's last row)"""
+    grouped = rows.groupby(PLAYER_KEY, sort=False)
+    return nonzero(grouped[COUNTERS].sum().join(grouped[PLAYER_LABELS].last()), COUNTERS)
+
+
+def team_totals_of(rows):
+    """Sum counter rows per team and season; 'matches' counts the team's matches"""
+    grouped = rows.groupby(TEAM_KEY, sort=False)
+    totals = grouped[TEAM_COUNTERS[1:]].sum()
+    totals.insert(0, 'matches', grouped['matchId'].nunique())
+    return totals.join(grouped[TEAM_LABELS].last())
+
+
+def read_totals(path, key):
+    """Load a totals file indexed by its key, or None if there is none yet"""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path).set_index(key)
+
+
+def add_totals(totals, delta, counters, labels, sign=1):
+    """Add (or with sign=-1 subtract) a delta to the totals, dropping rows that fall back to zero"""
+    if totals is None:
+        totals = delta.iloc[0:0]
+    combined = totals[counters].add(sign * delta[counters], fill_value=0).round(9)
+    label_values = totals[labels]
+    if sign > 0:
+        label_values = delta[labels].combine_first(label_values)
+    return nonzero(combined.join(label_values), counters)
+
+
+def save_totals(player_totals, team_totals, applied):
+    """Write the totals and the applied matches"""
+    AGGREGATES_DIR.mkdir(parents=True, exist_ok=True)
+    write_frame(player_totals.sort_index().reset_index(), PLAYER_TOTALS_FILE)
+    write_frame(team_totals.sort_index().reset_index(), TEAM_TOTALS_FILE)
+    write_frame(applied.sort_values('matchId'), APPLIED_FILE)
+
+
+def previous_rows(csv_path):
+    """A per-match player stats CSV as it is before being overwritten, or None"""
+    if not os.path.exists(csv_path):
+        return None
+    try:
+        return pd.read_csv(csv_path)
+    except Exception:
+        return None
+
+
+def update_aggregates(df, previous=None):
+    """
+    Add one match's player stats to the season totals
+
+    previous is the match's rows as they were before this write (see
+    previous_rows); if the match was already counted they are subtracted
+    first, so re-ingesting a match replaces it. Only the totals of the
+    match's players and teams change, but the totals files are small (a few
+    hundred rows) and each is rewritten whole, atomically. Without totals
+    yet, or if a counted match's old rows are gone, the totals are rebuilt
+    from the CSVs instead.
+    """
+    if df is None or df.empty:
+        return
+    match_id = int(df['matchId'].iloc[0])
+    with locked(PLAYER_TOTALS_FILE):
+        player_totals = read_totals(PLAYER_TOTALS_FILE, PLAYER_KEY)
+        team_totals = read_totals(TEAM_TOTALS_FILE, TEAM_KEY)
+        if player_totals is None or team_totals is None or not os.path.exists(APPLIED_FILE):
+            rebuild_aggregates()
+            return
+        applied = pd.read_csv(APPLIED_FILE)
+
+        if match_id in set(applied['matchId']):
+            if previous is None or previous.empty or int(previous['matchId'].iloc[0]) != match_id:
+                print(f"Season aggregates: old rows of match {match_id} not found, rebuilding")
+                rebuild_aggregates()
+                return
+            old = player_rows(previous)
+            player_totals = add_totals(player_totals, player_totals_of(old), COUNTERS, PLAYER_LABELS, sign=-1)
+            team_totals = add_totals(team_totals, team_totals_of(old), TEAM_COUNTERS, TEAM_LABELS, sign=-1)
+            applied = applied[applied['matchId'] != match_id]
+
+        rows = player_rows(df)
+        player_totals = add_totals(player_totals, player_totals_of(rows), COUNTERS, PLAYER_LABELS)
+        team_totals = add_totals(team_totals, team_totals_of(rows), TEAM_COUNTERS, TEAM_LABELS)
+        applied = pd.concat([applied, pd.DataFrame({'matchId': [match_id], 'season': [rows['season'].iloc[0]]})],
+                            ignore_index=True)
+        save_totals(player_totals, team_totals, applied)
+    print(f"Season aggregates updated with match {match_id}")
+
+
+# ============================================================================
+# FULL RECOMPUTE AND VERIFICATION
+# ============================================================================
+
+def recompute(csv_dir=PLAYER_CSV_DIR):
+    """Compute (player totals, team totals, applied matches) from every per-match CSV"""
+    frames = []
+    for csv_path in sorted(Path(csv_dir).glob('*.csv')):
+        try:
+            df = pd.read_csv(csv_path)
+        except Exception as e:
+            print(f"Error reading {csv_path.name}: {e}")
+            continue
+        if not df.empty:
+            frames.append(df)
+    rows = player_rows(pd.concat(frames, ignore_index=True))
+    applied = rows[['matchId', 'season']].drop_duplicates('matchId')
+    return player_totals_of(rows), team_totals_of(rows), applied
+
+
+def rebuild_aggregates():
+    """Recompute the season totals from the per-match CSVs and save them"""
+    with locked(PLAYER_TOTALS_FILE):
+        player_totals, team_totals, applied = recompute()
+        save_totals(player_totals, team_totals, applied)
+    print(f"Season aggregates rebuilt from {len(applied)} matches: "
+          f"{len(player_totals)} player rows, {len(team_totals)} team rows")
+
+
+def compare_totals(saved, expected, counters):
+    """Return a list of differences between saved and recomputed totals"""
+    problems = []
+    missing = expected.index.difference(saved.index)
+    extra = saved.index.difference(expected.index)
+    if len(missing):
+        problems.append(f"{len(missing)} rows missing, e.g. {list(missing[:3])}")
+    if len(extra):
+        problems.append(f"{len(extra)} unexpected rows, e.g. {list(extra[:3])}")
+    common = expected.index.intersection(saved.index)
+    difference = (saved.loc[common, counters] - expected.loc[common, counters]).abs()
+    wrong = difference.max(axis=1) > TOLERANCE
+    if wrong.any():
+        problems.append(f"{int(wrong.sum())} rows differ, e.g. {list(difference.index[wrong][:3])}")
+    return problems
+
+
+def verify_aggregates():
+    """Check the saved totals against a full recompute; returns True if they agree"""
+    player_totals = read_totals(PLAYER_TOTALS_FILE, PLAYER_KEY)
+    team_totals = read_totals(TEAM_TOTALS_FILE, TEAM_KEY)
+    if player_totals is None or team_totals is None:
+        print("No season aggregates to verify")
+        return False
+    expected_players, expected_teams, _ = recompute()
+    problems = [f"players: {problem}" for problem in compare_totals(player_totals, expected_players, COUNTERS)]
+    problems += [f"teams: {problem}" for problem in compare_totals(team_totals, expected_teams, TEAM_COUNTERS)]
+    for problem in problems:
+        print(problem)
+    if not problems:
+        print(f"Season aggregates match a full recompute ({len(player_totals)} player rows, "
+              f"{len(team_totals)} team rows)")
+    return not problems
+
+
+# ============================================================================
+# SEASON TABLES
+# ============================================================================
+
+def season_table(season=None, level='player', min_minutes=0):
+    """
+    Return the season table of players (level='player') or teams ('team')
+
+    Totals come with 'rating' (mean FotMob rating, players only), a per-90
+    rate for every counting stat ('<stat>_per90') and a success rate for every
+    value/total pair ('<stat>_pct').
+    """
+    if level == 'player':
+        totals = read_totals(PLAYER_TOTALS_FILE, PLAYER_KEY)
+    else:
+        totals = read_totals(TEAM_TOTALS_FILE, TEAM_KEY)
+    if totals is None:
+        rebuild_aggregates()
+        return season_table(season, level, min_minutes)
+    table = totals.reset_index()
+    if season is not None:
+        table = table[table['season'] == season]
+    table = table[table['minutes'] >= min_minutes].copy()
+
+    if level == 'player':
+        table['rating'] = (table['rating_sum'] / table['rated_matches'].where(table['rated_matches'] > 0)).round(2)
+    nineties = (table['minutes'] / 90).where(table['minutes'] > 0)
+    per90 = {f"{column}_per90": table[column] / nineties for column in PER90_COLUMNS}
+    rates = {f"{value[:-len('_value')]}_pct": table[value] / table[total].where(table[total] > 0)
+             for value, total in RATE_PAIRS}
+    return pd.concat([table, pd.DataFrame(per90), pd.DataFrame(rates)], axis=1).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob season aggregates of the player stats')
+    parser.add_argument('--rebuild', action='store_true', help='Recompute the totals from the per-match CSVs')
+    parser.add_argument('--verify', action='store_true', help='Check the totals against a full recompute')
+    parser.add_argument('--season', help='Print the season table, e.g. 2025-2026')
+    parser.add_argument('--teams', action='store_true', help='Print the team table instead of the players')
+    parser.add_argument('--sort', default='Goals', help='Column to sort the table by')
+    parser.add_argument('--min-minutes', type=float, default=0)
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_aggregates()
+    if args.verify:
+        verify_aggregates()
+    if args.season:
+        table = season_table(args.season, 'team' if args.teams else 'player', args.min_minutes)
+        labels = ['teamName'] if args.teams else ['name', 'teamName']
+        columns = labels + ['matches', 'minutes', args.sort, f"{args.sort}_per90"]
+        print(table.sort_values(args.sort, ascending=False)[columns].head(25).to_string(index=False))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+FotMob Raw Page Archive
+Stores every fetched __NEXT_DATA__ payload as gzipped JSON keyed by matchId and
+content hash, so derived CSVs can be rebuilt offline when an extractor changes
+"""
+
+import csv
+import gzip
+import hashlib
+import json
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from fotmob_csv import append_frame, replace_atomically
+
+
+ARCHIVE_DIR = Path(__file__).resolve().parent / 'archive'
+INDEX_FILENAME = 'index.csv'
+INDEX_COLUMNS = ['matchId', 'sha256', 'url', 'archived_at', 'path']
+
+
+def payload_bytes(json_data):
+    """
+    Serialise a __NEXT_DATA__ payload compactly so equal payloads hash equally
+
+    Key order is kept as fetched: the extractors build DataFrame columns from it.
+    """
+    return json.dumps(json_data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def content_hash(data):
+    """Return the SHA-256 hex digest of the serialised payload"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def archive_payload(json_data, url, archive_dir=ARCHIVE_DIR):
+    """
+    Store a payload under <archive_dir>/<matchId>/<sha256>.json.gz
+
+    Identical payloads are stored once; every new version of a match gets its own
+    file and a row in index.csv. Returns the path of the archived file.
+    """
+    archive_dir = Path(archive_dir)
+    match_id = str(json_data['props']['pageProps']['general']['matchId'])
+    data = payload_bytes(json_data)
+    digest = content_hash(data)
+
+    match_dir = archive_dir / match_id
+    path = match_dir / f"{digest}.json.gz"
+    if path.exists():
+        return path
+
+    match_dir.mkdir(parents=True, exist_ok=True)
+
+    def write(f):
+        with gzip.GzipFile(fileobj=f, mode='wb', compresslevel=6) as gz:
+            gz.write(data)
+
+    replace_atomically(path, write, binary=True)
+
+    # Under the index's lock and atomically, so parallel workers can't interleave rows
+    append_frame(pd.DataFrame([{
+        'matchId': match_id,
+        'sha256': digest,
+        'url': url,
+        'archived_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'path': str(path.relative_to(archive_dir)),
+    }], columns=INDEX_COLUMNS), archive_dir / INDEX_FILENAME)
+
+    return path
+
+
+def load_payload(path):
+    """Load an archived payload back into the parsed __NEXT_DATA__ dict"""
+    with gzip.open(path, 'rb') as f:
+        return json.loads(f.read())
+
+
+def read_index(archive_dir=ARCHIVE_DIR):
+    """Return every row of the archive index, oldest first"""
+    index_path = Path(archive_dir) / INDEX_FILENAME
+    if not index_path.exists():
+        return []
+    with open(index_path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def latest_entries(archive_dir=ARCHIVE_DIR):
+    """Return the most recently archived version of each match, in first-archived order"""
+    latest = {}
+    for row in read_index(archive_dir):
+        row['path'] = str(Path(archive_dir) / row['path'])
+        latest[row['matchId']] = row
+    return list(latest.values())
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+FotMob Season Backfill
+Discovers every finished match of a competition's season from the league
+fixtures page and runs them through the unified scraper chain, keeping a
+checkpoint so an interrupted run resumes where it stopped
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode
+
+from fotmob_csv import replace_atomically
+from fotmob_http import fetch
+from fotmob_parse import extract_next_data
+from fotmob_unified_scraper import DEFAULT_CONCURRENCY, run_batch
+
+
+BASE_URL = 'https://www.fotmob.com'
+CHAMPIONSHIP_LEAGUE_ID = 48
+CHAMPIONSHIP_SLUG = 'championship'
+CHECKPOINT_DIR = Path(__file__).resolve().parent / 'backfill'
+
+
+# ============================================================================
+# FIXTURE DISCOVERY
+# ============================================================================
+
+def fixtures_url(league_id, season, slug=CHAMPIONSHIP_SLUG, base_url=BASE_URL):
+    """Return the league fixtures page URL for a season, e.g. season='2024/2025'"""
+    return f"{base_url.rstrip('/')}/leagues/{league_id}/fixtures/{slug}?{urlencode({'season': season})}"
+
+
+def fixture_list(json_data):
+    """Return the list of fixtures from a league page's __NEXT_DATA__"""
+    page_props = json_data['props']['pageProps']
+    for section in ('fixtures', 'matches'):
+        matches = (page_props.get(section) or {}).get('allMatches')
+        if matches is not None:
+            return matches
+    raise ValueError("No fixtures found in the league page")
+
+
+def discover_match_urls(league_id, season, slug=CHAMPIONSHIP_SLUG, base_url=BASE_URL):
+    """
+    Fetch the league fixtures page and return the URLs of the season's finished matches
+
+    URLs keep FotMob's '#matchId' fragment and are returned in fixture order.
+    """
+    url = fixtures_url(league_id, season, slug, base_url)
+    print(f"Fetching fixtures: {url}")
+    r = fetch(url)
+    if r.status_code != 200:
+        raise ValueError(f"Fixtures page returned status code {r.status_code}")
+
+    urls = []
+    skipped = 0
+    for match in fixture_list(extract_next_data(r.content)):
+        status = match.get('status') or {}
+        if not status.get('finished') or status.get('cancelled') or not match.get('pageUrl'):
+            skipped += 1
+            continue
+        urls.append(base_url.rstrip('/') + match['pageUrl'])
+
+    print(f"Found {len(urls)} finished matches ({skipped} not played yet or cancelled)")
+    return urls
+
+
+# ============================================================================
+# CHECKPOINT
+# ============================================================================
+
+def checkpoint_path(league_id, season, checkpoint_dir=CHECKPOINT_DIR):
+    """Return the checkpoint file for a competition and season"""
+    season_slug = str(season).replace('/', '-')
+    return Path(checkpoint_dir) / f"{league_id}_{season_slug}.json"
+
+
+def load_checkpoint(path, league_id, season):
+    """Load a checkpoint, or start a new one if there is none"""
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    return {
+        'league_id': league_id,
+        'season': season,
+        'started_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'done': [],
+        'failed': [],
+    }
+
+
+def save_checkpoint(checkpoint, path):
+    """Write the checkpoint atomically so an interrupted run never leaves it half written"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    checkpoint['updated_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    replace_atomically(path, lambda f: json.dump(checkpoint, f, indent=1))
+
+
+# ============================================================================
+# BACKFILL
+# ============================================================================
+
+def run_backfill(league_id, season, slug=CHAMPIONSHIP_SLUG, base_url=BASE_URL,
+                 concurrency=DEFAULT_CONCURRENCY, force=False, restart=False,
+                 checkpoint_dir=CHECKPOINT_DIR):
+    """
+    Scrape every finished match of a season that isn't in the checkpoint yet
+
+    Each match is marked done as soon as it has been ingested, so stopping the run
+    at any point loses at most the matches in flight. Failed matches are retried
+    on the next run. Returns the batch results, or None if nothing was left to do.
+    """
+    path = checkpoint_path(league_id, season, checkpoint_dir)
+    if restart and path.exists():
+        path.unlink()
+    checkpoint = load_checkpoint(path, league_id, season)
+
+    urls = discover_match_urls(league_id, season, slug, base_url)
+    done = set(checkpoint['done'])
+    pending = [url for url in urls if url not in done]
+    print(f"Checkpoint: {len(done)} done, {len(pending)} to scrape ({path})")
+    if not pending:
+        print("Season is up to date")
+        return None
+
+    checkpoint['failed'] = []
+
+    def on_complete(url, status):
+        if status == 'failed':
+            checkpoint['failed'].append(url)
+        else:
+            checkpoint['done'].append(url)
+        save_checkpoint(checkpoint, path)
+
+    save_checkpoint(checkpoint, path)
+    results = run_batch(pending, concurrency, force, on_complete)
+
+    remaining = len(urls) - len(set(checkpoint['done']) & set(urls))
+    print(f"\nBackfill checkpoint: {len(checkpoint['done'])} done, {remaining} remaining")
+    if checkpoint['failed']:
+        print("Re-run the same command to retry the failed matches")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill a whole season of FotMob matches')
+    parser.add_argument('--season', required=True,
+                        help="Season as FotMob names it, e.g. '2024/2025'")
+    parser.add_argument('--league', type=int, default=CHAMPIONSHIP_LEAGUE_ID,
+                        help=f'FotMob league id (default: {CHAMPIONSHIP_LEAGUE_ID}, the Championship)')
+    parser.add_argument('--slug', default=CHAMPIONSHIP_SLUG,
+                        help=f'League name in the fixtures URL (default: {CHAMPIONSHIP_SLUG})')
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help=f'Site to crawl, e.g. a local stand-in server (default: {BASE_URL})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Maximum concurrent page fetches (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-ingest matches even if the ledger has the same payload')
+    parser.add_argument('--restart', action='store_true',
+                        help='Discard the checkpoint and start the season from scratch')
+    args = parser.parse_args()
+
+    if args.concurrency < 1:
+        print("Concurrency must be at least 1")
+        return
+
+    print("=" * 60)
+    print(f"FOTMOB SEASON BACKFILL: league {args.league}, season {args.season}")
+    print("=" * 60)
+
+    try:
+        run_backfill(args.league, args.season, args.slug, args.base_url,
+                     args.concurrency, args.force, args.restart)
+    except Exception as e:
+        print(f"Backfill failed: {e}")
+
+
+if __name__ == "__main__":
+    main()
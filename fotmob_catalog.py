@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+FotMob File Catalog
+One row per per-match CSV (shots and player stats) with the match it holds
+(matchId, round, season, date, home/away team ids), its row count, the
+min/max of its id and stat columns and its player ids. Every write path
+records the file it wrote, so loaders can pick the files that can match a
+filter without opening any of them. Each entry is stamped with its file's size and mtime; a file
+changed by a write that didn't go through the catalog is re-read and
+re-recorded the next time it is needed.
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from fotmob_csv import locked, replace_atomically
+from fotmob_dataset import season_of
+
+
+BASE_DIR = Path(__file__).resolve().parent
+CATALOG_FILE = BASE_DIR / 'catalog.csv'
+CSV_DIRS = {
+    'shots': BASE_DIR / 'shots' / 'csv',
+    'player_stats': BASE_DIR / 'playerStats' / 'csv',
+}
+CATALOG_COLUMNS = ['table', 'file', 'matchId', 'matchRound', 'season', 'matchDate',
+                   'homeTeamId', 'awayTeamId', 'rows', 'size', 'mtime_ns', 'stats', 'playerIds']
+
+# Columns whose min/max are kept per file, to rule files out for range
+# filters; the player stats CSVs spell the team ids 'homeTeamid'/'awayTeamid'
+# and the player id 'id'
+STAT_COLUMNS = {
+    'shots': ['id', 'teamId', 'playerId', 'min', 'x', 'y', 'expectedGoals'],
+    'player_stats': ['id', 'teamId', 'Minutes_played', 'FotMob_rating', 'Goals', 'Assists'],
+}
+TEAM_COLUMNS = {
+    'shots': ('homeTeamId', 'awayTeamId'),
+    'player_stats': ('homeTeamid', 'awayTeamid'),
+}
+PLAYER_COLUMNS = {'shots': 'playerId', 'player_stats': 'id'}
+
+_catalog_lock = threading.RLock()
+
+
+def number(value):
+    """A stat as a plain int or float for JSON, or None"""
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    return value
+
+
+def file_entry(table, path, df):
+    """Build a file's catalog entry from its rows"""
+    stat = os.stat(path)
+    entry = {column: '' for column in CATALOG_COLUMNS}
+    entry.update({'table': table, 'file': Path(path).name, 'rows': len(df),
+                  'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns})
+    stats = {}
+    if not df.empty:
+        first = df.iloc[0]
+        home_column, away_column = TEAM_COLUMNS[table]
+        for column, source in [('matchId', 'matchId'), ('matchRound', 'matchRound'), ('matchDate', 'matchDate'),
+                               ('homeTeamId', home_column), ('awayTeamId', away_column)]:
+            if source in df.columns and pd.notna(first[source]):
+                entry[column] = str(first[source])
+                if column != 'matchDate' and entry[column].endswith('.0'):
+                    entry[column] = entry[column][:-2]
+        if entry['matchDate']:
+            entry['season'] = season_of(entry['matchDate'])
+        for column in STAT_COLUMNS[table]:
+            if column in df.columns:
+                values = pd.to_numeric(df[column], errors='coerce').dropna()
+                if len(values):
+                    stats[column] = [number(values.min()), number(values.max())]
+        # Player ids are spread too widely for min/max to rule a file out
+        if PLAYER_COLUMNS[table] in df.columns:
+            player_ids = pd.to_numeric(df[PLAYER_COLUMNS[table]], errors='coerce')
+            entry['playerIds'] = ' '.join(str(int(value)) for value in sorted(player_ids.dropna().unique()))
+    entry['stats'] = json.dumps(stats)
+    return entry
+
+
+def read_catalog(path=CATALOG_FILE):
+    """Load the catalog as a dict keyed by (table, file)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline='', encoding='utf-8') as f:
+        return {(row['table'], row['file']): row for row in csv.DictReader(f)}
+
+
+def write_entries(entries, path=CATALOG_FILE):
+    """Add or replace catalog entries, atomically and under the catalog's lock"""
+    with _catalog_lock, locked(path):
+        catalog = read_catalog(path)
+        for entry in entries:
+            catalog[(entry['table'], entry['file'])] = entry
+
+        def write(f):
+            writer = csv.DictWriter(f, fieldnames=CATALOG_COLUMNS, lineterminator='\n')
+            writer.writeheader()
+            for key in sorted(catalog):
+                writer.writerow(catalog[key])
+
+        replace_atomically(path, write)
+
+
+def record_file(table, path, df=None):
+    """
+    Record a per-match CSV that was just written (df: its rows, read from the file if not given)
+
+    Errors are printed, not raised: a missing entry only means the loaders
+    open the file.
+    """
+    try:
+        if df is None:
+            df = pd.read_csv(path)
+        write_entries([file_entry(table, path, df)])
+    except Exception as e:
+        print(f"Error recording {path} in the catalog: {e}")
+
+
+def is_fresh(entry, stat):
+    """True if a catalog entry was recorded from the file as it is now"""
+    return entry['size'] == str(stat.st_size) and entry['mtime_ns'] == str(stat.st_mtime_ns)
+
+
+def fresh_entries(table, csv_dir=None):
+    """
+    Return the catalog entries of every file of a table, keyed by filename
+
+    Only the directory is listed; files that are new or changed since they
+    were recorded are read and recorded again.
+    """
+    csv_dir = Path(csv_dir or CSV_DIRS[table])
+    catalog = read_catalog()
+    entries = {}
+    stale = []
+    if csv_dir.exists():
+        with os.scandir(csv_dir) as scan:
+            for item in scan:
+                if not item.name.endswith('.csv') or not item.is_file():
+                    continue
+                entry = catalog.get((table, item.name))
+                if entry is not None and is_fresh(entry, item.stat()):
+                    entries[item.name] = entry
+                else:
+                    stale.append(Path(item.path))
+
+    refreshed = []
+    for path in stale:
+        try:
+            refreshed.append(file_entry(table, path, pd.read_csv(path)))
+        except Exception as e:
+            print(f"Error cataloging {path.name}: {e}")
+    if refreshed:
+        write_entries(refreshed)
+        entries.update({entry['file']: {key: str(value) for key, value in entry.items()} for entry in refreshed})
+    return entries
+
+
+def in_range(stats, column, low, high):
+    """True if a file whose stats are given can hold a value of column between low and high (None: open)"""
+    if column not in stats:
+        # The file has no value of the column at all
+        return False
+    file_min, file_max = stats[column]
+    return (low is None or file_max >= low) and (high is None or file_min <= high)
+
+
+def entry_matches(entry, filters, table, ranges=None):
+    """
+    True if a file can hold rows passing the filters ({column: [values]}) and ranges
+
+    Filters: matchId, round, season, teamId (the home or away team), and
+    playerId (checked against the file's player ids). Ranges ({column:
+    (low, high)}, in the CSV's column names) are checked against the file's
+    min/max of the STAT_COLUMNS; other columns can't rule a file out.
+    """
+    checks = {'matchId': 'matchId', 'round': 'matchRound', 'season': 'season'}
+    for column, values in filters.items():
+        if column in checks:
+            if entry[checks[column]] not in {str(value) for value in values}:
+                return False
+        elif column == 'teamId':
+            if not {str(value) for value in values} & {entry['homeTeamId'], entry['awayTeamId']}:
+                return False
+        elif column == 'playerId':
+            if not {str(value) for value in values} & set((entry.get('playerIds') or '').split()):
+                return False
+    if ranges:
+        stats = json.loads(entry.get('stats') or '{}')
+        for column, (low, high) in ranges.items():
+            if column in STAT_COLUMNS[table] and not in_range(stats, column, low, high):
+                return False
+    return True
+
+
+def matching_files(table, filters, csv_dir=None, ranges=None):
+    """Paths of a table's per-match CSVs that can hold rows passing the filters and ranges"""
+    csv_dir = Path(csv_dir or CSV_DIRS[table])
+    entries = fresh_entries(table, csv_dir)
+    return [csv_dir / name for name, entry in sorted(entries.items())
+            if entry_matches(entry, filters, table, ranges)]
+
+
+def match_partitions(table, match_id, path=CATALOG_FILE):
+    """
+    (season, round) pairs the catalog records for a match in a table, or None without a catalog
+
+    The entries are taken as recorded, not refreshed, so a caller that looks
+    before recording a rewritten file gets where the match was before.
+    """
+    catalog = read_catalog(path)
+    if not catalog:
+        return None
+    return {(entry['season'], int(entry['matchRound'])) for (entry_table, _), entry in catalog.items()
+            if entry_table == table and entry['matchId'] == str(match_id)
+            and entry['season'] and entry['matchRound']}
+
+
+def match_seasons():
+    """matchId -> season of every cataloged match"""
+    seasons = {}
+    for table in CSV_DIRS:
+        for entry in fresh_entries(table).values():
+            if entry['matchId'] and entry['season']:
+                seasons.setdefault(int(entry['matchId']), entry['season'])
+    return seasons
+
+
+def rebuild_catalog(path=CATALOG_FILE):
+    """Catalog every per-match CSV from scratch"""
+    entries = []
+    for table, csv_dir in CSV_DIRS.items():
+        for csv_path in sorted(Path(csv_dir).glob('*.csv')):
+            try:
+                entries.append(file_entry(table, csv_path, pd.read_csv(csv_path)))
+            except Exception as e:
+                print(f"Error cataloging {csv_path.name}: {e}")
+    with _catalog_lock, locked(path):
+        if os.path.exists(path):
+            os.unlink(path)
+        write_entries(entries, path)
+    print(f"Catalog rebuilt with {len(entries)} files: {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob per-match file catalog')
+    parser.add_argument('--rebuild', action='store_true', help='Catalog every per-match CSV from scratch')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_catalog()
+    else:
+        for table in CSV_DIRS:
+            entries = fresh_entries(table)
+            matches = {entry['matchId'] for entry in entries.values()}
+            print(f"{table}: {len(entries)} files, {len(matches)} matches")
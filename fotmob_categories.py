@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+FotMob Shared Category Dictionaries
+The repeated strings of the shot and player tables (team and player names,
+event/shot types, situations, periods, colours, dates, stat keys) are loaded as pandas
+categoricals whose categories come from dictionaries shared across matches,
+kept in dataset/dictionaries.json. A dictionary only ever grows, so the codes
+of a value never change and frames loaded separately concatenate as
+categoricals.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from fotmob_csv import locked, replace_atomically
+
+
+BASE_DIR = Path(__file__).resolve().parent
+DICTIONARY_FILE = BASE_DIR / 'dataset' / 'dictionaries.json'
+
+# Dictionary -> the columns encoded with it. Goal event columns of a shot
+# (shot_eventType, ...) share the dictionary of the shot column.
+DICTIONARY_COLUMNS = {
+    'team': ['homeTeamName', 'awayTeamName', 'teamName'],
+    'player': ['playerName', 'fullName', 'name', 'shortName', 'nameStr', 'player_name', 'assistInput',
+               'goal_scorer'],
+    'player_name_part': ['firstName', 'lastName'],
+    'opta_id': ['optaId'],
+    'team_color': ['teamColor'],
+    'event_type': ['eventType'],
+    'shot_type': ['shotType'],
+    'situation': ['situation'],
+    'period': ['period'],
+    'season': ['season'],
+    'match_date': ['matchDate'],
+    'stat_category': ['category'],
+    'stat_key': ['stat_key'],
+}
+SHOT_PREFIX = 'shot_'
+
+_dictionaries = None
+# Values categorize met that aren't in the dictionaries yet; update_dictionaries adds them
+_unseen = {}
+
+
+def column_dictionary(column):
+    """Return the name of the dictionary a column is encoded with, or None"""
+    if column.startswith(SHOT_PREFIX):
+        column = column[len(SHOT_PREFIX):]
+    for dictionary, columns in DICTIONARY_COLUMNS.items():
+        if column in columns:
+            return dictionary
+    return None
+
+
+def load_dictionaries(path=DICTIONARY_FILE):
+    """Load the shared dictionaries (read once, then kept up to date in memory)"""
+    global _dictionaries
+    if _dictionaries is None:
+        _dictionaries = {}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                _dictionaries = json.load(f)
+    return _dictionaries
+
+
+def new_values(df, dictionaries):
+    """Return the values of df's encoded columns that aren't in their dictionary yet"""
+    added = {}
+    for column in df.columns:
+        dictionary = column_dictionary(column)
+        if dictionary is None:
+            continue
+        known = set(dictionaries.get(dictionary, [])) | set(added.get(dictionary, []))
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.cat.remove_unused_categories().cat.categories.astype(str)
+        else:
+            values = values.dropna().astype(str).unique()
+        added.setdefault(dictionary, []).extend(sorted(value for value in values if value not in known))
+    return {dictionary: values for dictionary, values in added.items() if values}
+
+
+def known_values():
+    """The dictionaries, each followed by the values categorize met that it doesn't hold yet"""
+    dictionaries = load_dictionaries()
+    return {dictionary: dictionaries.get(dictionary, []) + _unseen.get(dictionary, [])
+            for dictionary in set(dictionaries) | set(_unseen)}
+
+
+def update_dictionaries(df, path=DICTIONARY_FILE):
+    """
+    Add the new values of a frame's encoded columns to the shared dictionaries
+
+    Values categorize met first go in ahead of them, in the order they were
+    met, so categoricals loaded before keep their codes.
+    """
+    dictionaries = load_dictionaries(path)
+    if not _unseen and not new_values(df, dictionaries):
+        return
+    path = Path(path)
+    with locked(path):
+        # Another process may have added values since they were loaded
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                on_disk = json.load(f)
+            for dictionary, values in on_disk.items():
+                known = set(dictionaries.get(dictionary, []))
+                dictionaries.setdefault(dictionary, []).extend(v for v in values if v not in known)
+        for dictionary, values in _unseen.items():
+            known = set(dictionaries.get(dictionary, []))
+            dictionaries.setdefault(dictionary, []).extend(v for v in values if v not in known)
+        _unseen.clear()
+        for dictionary, values in new_values(df, dictionaries).items():
+            dictionaries.setdefault(dictionary, []).extend(values)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        replace_atomically(path, lambda f: json.dump(dictionaries, f, indent=0, ensure_ascii=False))
+
+
+def categorize(df):
+    """
+    Turn a frame's encoded columns into categoricals over the shared dictionaries
+
+    Values missing from a dictionary (data written before it existed) are
+    kept as categories after the dictionary's own, never dropped; the
+    dictionaries themselves are left unchanged until update_dictionaries.
+    """
+    for dictionary, values in new_values(df, known_values()).items():
+        _unseen.setdefault(dictionary, []).extend(values)
+    dictionaries = known_values()
+
+    df = df.copy()
+    for column in df.columns:
+        dictionary = column_dictionary(column)
+        if dictionary is None:
+            continue
+        values = df[column]
+        if not isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype('category')
+        categories = pd.Index(dictionaries[dictionary]) if dictionary in dictionaries else pd.Index([], dtype=str)
+        df[column] = values.cat.set_categories(categories)
+    return df
+
+
+def memory_mb(df):
+    """In-memory size of a DataFrame in MB, strings included"""
+    return df.memory_usage(deep=True).sum() / 1024 / 1024
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from fotmob_dataset import read_dataset, table_dir
+    from fotmob_player_store import PLAYERS_FILE, VALUES_FILE, load_player_stat_values, load_players
+
+    parser = argparse.ArgumentParser(description='FotMob shared category dictionaries')
+    parser.add_argument('--build', action='store_true',
+                        help='Add every value of the dataset and the player stat store to the dictionaries')
+    args = parser.parse_args()
+
+    frames = {}
+    if table_dir('shots').exists():
+        frames['shots'] = read_dataset('shots')
+    if table_dir('player_stats').exists():
+        frames['player_stats'] = read_dataset('player_stats')
+    if PLAYERS_FILE.exists():
+        frames['players'] = load_players()
+    if VALUES_FILE.exists():
+        frames['player_stat_values'] = load_player_stat_values()
+
+    if args.build:
+        for df in frames.values():
+            update_dictionaries(df)
+
+    for dictionary, values in load_dictionaries().items():
+        print(f"{dictionary}: {len(values)} values")
+    for name, df in frames.items():
+        encoded = [column for column in df.columns if column_dictionary(column)]
+        plain = df.astype({column: object for column in encoded})
+        print(f"{name}: {len(df)} rows, {memory_mb(plain):.1f} MB as strings, "
+              f"{memory_mb(df):.1f} MB encoded")
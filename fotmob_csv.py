@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+FotMob CSV Writes
+Crash-safe, lock-protected writes for the CSVs that every match appends to
+(fotmob_match_stats.csv, homeScorers.csv, awayScorers.csv). Each write holds
+an exclusive lock on the file, checks the new rows against the file's header,
+and replaces the file through a temp file and an atomic rename, so parallel
+runs can't interleave rows and a crash never leaves a torn file. Files keyed
+on one column (fotmob_match_stats.csv on matchId) can instead be upserted
+through a persisted offset index, without rewriting the file.
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of the same process are kept apart
+    fcntl = None
+
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+_held = threading.local()
+
+
+def thread_lock(path):
+    """Return the in-process lock of a file"""
+    key = os.path.abspath(path)
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(key, threading.RLock())
+
+
+@contextmanager
+def locked(path):
+    """
+    Hold an exclusive lock on a file across threads and processes
+
+    The lock is taken on a '.<name>.lock' file next to it, because the file
+    itself is replaced by every write. A thread that already holds the lock
+    can take it again.
+    """
+    path = Path(path)
+    key = os.path.abspath(path)
+    held = _held.__dict__.setdefault('paths', set())
+    with thread_lock(path):
+        if key in held:
+            yield
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_name(f".{path.name}.lock"), 'a') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            held.add(key)
+            try:
+                yield
+            finally:
+                held.discard(key)
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def replace_atomically(path, write, binary=False):
+    """
+    Write a file with write(f) into a temp file in the same directory, then rename it into place
+
+    f is a text file (utf-8, no newline translation), or a binary one when
+    binary is True.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with (os.fdopen(fd, 'wb') if binary else os.fdopen(fd, 'w', newline='', encoding='utf-8')) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_existing(path):
+    """
+    Return a CSV's header and its data lines as text, or (None, '') if there is no file
+
+    A last line without a newline can only come from a write that was cut
+    short (before writes were atomic); it is dropped with a warning.
+    """
+    if not os.path.exists(path):
+        return None, ''
+    with open(path, newline='', encoding='utf-8') as f:
+        text = f.read()
+    if not text:
+        return None, ''
+    if not text.endswith('\n'):
+        text, _, torn = text.rpartition('\n')
+        text += '\n'
+        print(f"Warning: dropped an incomplete last line from {Path(path).name}: {torn[:60]!r}")
+    header_line, _, body = text.partition('\n')
+    return next(csv.reader([header_line])), body
+
+
+def check_schema(columns, header, path):
+    """Raise ValueError unless the new columns are the file's header columns"""
+    missing = [column for column in header if column not in columns]
+    unexpected = [column for column in columns if column not in header]
+    if missing or unexpected:
+        raise ValueError(f"Columns don't match the header of {Path(path).name}: "
+                         f"missing {missing}, unexpected {unexpected}")
+
+
+def append_frame(df, path):
+    """
+    Append a DataFrame's rows to a CSV, creating it with a header if needed
+
+    The rows are checked against the existing header (columns in a different
+    order are reordered; missing or extra columns raise ValueError) and the
+    whole file is rewritten atomically under the file's lock.
+    Returns the number of rows appended.
+    """
+    path = Path(path)
+    with locked(path):
+        header, body = read_existing(path)
+        if header is None:
+            header = list(df.columns)
+        else:
+            check_schema(list(df.columns), header, path)
+        rows = df[header].to_csv(index=False, header=False, lineterminator='\n')
+
+        def write(f):
+            csv.writer(f, lineterminator='\n').writerow(header)
+            f.write(body)
+            f.write(rows)
+
+        replace_atomically(path, write)
+    return len(df)
+
+
+def write_frame(df, path):
+    """Overwrite a CSV with a DataFrame, atomically and under the file's lock"""
+    path = Path(path)
+    with locked(path):
+        replace_atomically(path, lambda f: df.to_csv(f, index=False, lineterminator='\n'))
+    return len(df)
+
+
+# ============================================================================
+# KEYED UPSERTS WITH A PERSISTED OFFSET INDEX
+# ============================================================================
+
+def index_path(path):
+    """Return the offset index file of a CSV, e.g. fotmob_match_stats.csv.idx.json"""
+    path = Path(path)
+    return path.with_name(f"{path.name}.idx.json")
+
+
+def journal_path(path):
+    """Return the journal file of a CSV's pending in-place writes, e.g. fotmob_match_stats.csv.journal.json"""
+    path = Path(path)
+    return path.with_name(f"{path.name}.journal.json")
+
+
+def csv_line(line_bytes):
+    """
+    Parse one CSV line
+
+    The index addresses rows by line, so a row must not span lines: an odd
+    number of quotes means a quoted field holds a newline, and raises
+    ValueError.
+    """
+    if line_bytes.count(b'"') % 2:
+        raise ValueError(f"A CSV row spans more than one line: {line_bytes[:60]!r}")
+    return next(csv.reader([line_bytes.decode('utf-8').rstrip('\r\n')]), [])
+
+
+def apply_journal(path, journal):
+    """Write a journal's in-place rows and appended rows into the CSV, and fsync it"""
+    with open(path, 'r+b') as f:
+        for offset, line in journal['writes']:
+            f.seek(offset)
+            f.write(line.encode('utf-8'))
+        f.truncate(journal['size'])
+        f.seek(journal['size'])
+        f.write(journal['append'].encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def replay_journal(path):
+    """
+    Finish an upsert that was cut short, from its journal
+
+    Replaying is idempotent: the same rows are written at the same offsets
+    and the file is cut back to its size before the appends. Returns True
+    if there was a journal.
+    """
+    journal_file = journal_path(path)
+    if not journal_file.exists():
+        return False
+    with open(journal_file, encoding='utf-8') as f:
+        journal = json.load(f)
+    apply_journal(path, journal)
+    os.unlink(journal_file)
+    print(f"Replayed an interrupted upsert of {Path(path).name}")
+    return True
+
+
+def build_index(path, key):
+    """
+    Scan a CSV and return its offset index: the byte offset and length of each key's row
+
+    A last line without a newline is a torn write and is cut off the file.
+    Keys that appear more than once are listed under 'duplicates'; the index
+    points at their last row.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data and not data.endswith(b'\n'):
+        keep = data.rfind(b'\n') + 1
+        print(f"Warning: dropped an incomplete last line from {Path(path).name}: {data[keep:keep + 60]!r}")
+        with open(path, 'r+b') as f:
+            f.truncate(keep)
+        data = data[:keep]
+
+    header_end = data.find(b'\n') + 1
+    header = csv_line(data[:header_end])
+    position = header.index(key)
+    rows = {}
+    duplicates = set()
+    offset = header_end
+    while offset < len(data):
+        end = data.index(b'\n', offset) + 1
+        fields = csv_line(data[offset:end])
+        if len(fields) > position:
+            row_key = fields[position]
+            if row_key in rows:
+                duplicates.add(row_key)
+            rows[row_key] = [offset, end - offset]
+        offset = end
+    return {'key': key, 'header': header, 'rows': rows, 'duplicates': sorted(duplicates)}
+
+
+def save_index(path, index):
+    """Stamp the index with the CSV's size and mtime and write it next to the CSV"""
+    stat = os.stat(path)
+    index['size'] = stat.st_size
+    index['mtime_ns'] = stat.st_mtime_ns
+    replace_atomically(index_path(path), lambda f: json.dump(index, f))
+
+
+def load_index(path, key):
+    """
+    Return the CSV's offset index, rebuilding it when it is missing or stale
+
+    The index is only trusted if the CSV still has the size and mtime it was
+    saved with, so writes made without the index (e.g. drop_rows) are noticed.
+    An upsert that was cut short is first finished from its journal.
+    Call with the file's lock held.
+    """
+    if not replay_journal(path):
+        try:
+            with open(index_path(path), encoding='utf-8') as f:
+                index = json.load(f)
+            stat = os.stat(path)
+            if index.get('key') == key and index.get('size') == stat.st_size \
+                    and index.get('mtime_ns') == stat.st_mtime_ns:
+                return index
+        except (OSError, ValueError):
+            pass
+    index = build_index(path, key)
+    save_index(path, index)
+    return index
+
+
+def upsert_frame(df, path, key='matchId'):
+    """
+    Insert or replace a DataFrame's rows in a CSV, keyed on one column
+
+    Through the offset index, a row whose key is already in the file is
+    skipped if it is unchanged, overwritten in place if the new row has the
+    same length, and only otherwise (or when the key has duplicate rows) is the
+    file rewritten atomically. New keys are appended. In-place writes and
+    appends are first saved to a journal (written atomically), then made to
+    the file and fsynced, then the journal is removed; a crash in between
+    leaves the journal, which the next load_index replays. Readers that
+    bypass the index see the file as it was left until then. The header is
+    checked as in append_frame. Returns a dict with the number of rows
+    appended, replaced in place, rewritten and skipped.
+    """
+    path = Path(path)
+    counts = {'appended': 0, 'replaced': 0, 'rewritten': 0, 'skipped': 0}
+    with locked(path):
+        if read_existing(path)[0] is None:
+            append_frame(df, path)
+            counts['appended'] = len(df)
+            save_index(path, build_index(path, key))
+            return counts
+
+        index = load_index(path, key)
+        header = index['header']
+        check_schema(list(df.columns), header, path)
+        position = header.index(key)
+        text = df[header].to_csv(index=False, header=False, lineterminator='\n')
+        lines = [line.encode('utf-8') + b'\n' for line in text.split('\n')[:-1]]
+
+        writes = []
+        appends = []
+        rewrites = {}
+        with open(path, 'rb') as f:
+            for line in lines:
+                row_key = csv_line(line)[position]
+                location = index['rows'].get(row_key)
+                if location is None:
+                    appends.append((row_key, line))
+                    continue
+                if row_key in index['duplicates']:
+                    rewrites[row_key] = line
+                    continue
+                offset, length = location
+                f.seek(offset)
+                if f.read(length) == line:
+                    counts['skipped'] += 1
+                elif len(line) == length:
+                    writes.append([offset, line.decode('utf-8')])
+                    counts['replaced'] += 1
+                else:
+                    rewrites[row_key] = line
+
+        if writes or appends:
+            size = os.path.getsize(path)
+            journal = {'size': size, 'writes': writes,
+                       'append': b''.join(line for _, line in appends).decode('utf-8')}
+            replace_atomically(journal_path(path), lambda f: json.dump(journal, f))
+            apply_journal(path, journal)
+            os.unlink(journal_path(path))
+            offset = size
+            for row_key, line in appends:
+                index['rows'][row_key] = [offset, len(line)]
+                offset += len(line)
+            counts['appended'] = len(appends)
+
+        if rewrites:
+            rewrite_rows(path, position, rewrites)
+            index = build_index(path, key)
+            counts['rewritten'] = len(rewrites)
+        save_index(path, index)
+    return counts
+
+
+def rewrite_rows(path, position, new_lines):
+    """Replace every row of the given keys with its new line, atomically; new rows go at the end"""
+    with open(path, 'rb') as f:
+        header_line = f.readline()
+        kept = [line for line in f if csv_line(line)[position] not in new_lines]
+
+    def write(f):
+        f.write(header_line.decode('utf-8'))
+        f.writelines(line.decode('utf-8') for line in kept)
+        f.writelines(line.decode('utf-8') for line in new_lines.values())
+
+    replace_atomically(path, write)
+
+
+def lookup_rows(path, keys, key='matchId'):
+    """
+    Read only the rows of the given keys from a CSV, through its offset index
+
+    Returns a DataFrame with the file's columns (keys that aren't in the file
+    are left out).
+    """
+    path = Path(path)
+    with locked(path):
+        index = load_index(path, key)
+        lines = []
+        with open(path, 'rb') as f:
+            for row_key in keys:
+                location = index['rows'].get(str(row_key))
+                if location:
+                    f.seek(location[0])
+                    lines.append(f.read(location[1]).decode('utf-8'))
+    header_line = ','.join(index['header']) + '\n'
+    return pd.read_csv(io.StringIO(header_line + ''.join(lines)))
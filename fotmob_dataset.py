@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+FotMob Parquet Dataset
+Shots and player stats as Parquet files partitioned by season and round
+(dataset/<table>/season=2025-2026/round=26/part-0.parquet), so season loads
+read only the partitions and columns they need
+"""
+
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from fotmob_categories import categorize, column_dictionary, update_dictionaries
+from fotmob_csv import locked, replace_atomically
+from fotmob_events import SHOT_FIELDS, SHOT_MATCH_FIELDS, apply_dtypes
+from fotmob_stats import PLAYER_STATS_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+BASE_DIR = Path(__file__).resolve().parent
+DATASET_DIR = BASE_DIR / 'dataset'
+CSV_DIRS = {
+    'shots': BASE_DIR / 'shots' / 'csv',
+    'player_stats': BASE_DIR / 'playerStats' / 'csv',
+}
+SCHEMA_FILE = '_common_metadata'
+PART_FILENAME = 'part-0.parquet'
+SEASON_START_MONTH = 7
+
+# Column types of each table are fixed, never guessed from the data, so every
+# file has one schema even when a column is empty in some matches
+PLAYER_STATS_FIELDS = [
+    ('name', 'string'), ('id', 'Int64'), ('optaId', 'string'), ('teamId', 'Int64'), ('teamName', 'string'),
+    ('isGoalkeeper', 'boolean'), ('shirtNumber', 'Int64'), ('usualPosition', 'Int64'), ('positionId', 'Int64'),
+    ('matchId', 'Int64'), ('matchRound', 'Int64'), ('homeTeamName', 'string'), ('homeTeamid', 'Int64'),
+    ('awayTeamName', 'string'), ('awayTeamid', 'Int64'), ('matchDate', 'string'),
+    ('home_goals', 'Int64'), ('away_goals', 'Int64'),
+] + [(column, 'float64') for column in PLAYER_STATS_COLUMNS]
+TABLE_FIELDS = {
+    'shots': SHOT_MATCH_FIELDS + SHOT_FIELDS,
+    'player_stats': PLAYER_STATS_FIELDS,
+}
+# Columns outside the fields: extra shotmap keys are kept as text, extra
+# player stats (goalkeeper stats, new FotMob stats) as numbers
+EXTRA_DTYPES = {'shots': 'string', 'player_stats': 'float64'}
+
+_warned = False
+
+
+def pyarrow_available():
+    """Return True if pyarrow is installed, printing a note the first time it isn't"""
+    global _warned
+    if pa is None and not _warned:
+        print("pyarrow is not installed: skipping the Parquet dataset (pip install pyarrow)")
+        _warned = True
+    return pa is not None
+
+
+def season_of(match_date):
+    """Season of a match from its UTC date, e.g. '2026-01-04T12:00:00.000Z' -> '2025-2026'"""
+    year, month = int(match_date[:4]), int(match_date[5:7])
+    start = year if month >= SEASON_START_MONTH else year - 1
+    return f"{start}-{start + 1}"
+
+
+def partitioning():
+    """Hive partitioning on season and round"""
+    return ds.partitioning(pa.schema([('season', pa.string()), ('round', pa.int32())]), flavor='hive')
+
+
+def normalize_frame(df, table):
+    """
+    Give a frame the table's columns and types
+
+    The table's fields come first, missing ones added empty; any other column
+    gets the table's extra type.
+    """
+    fields = TABLE_FIELDS[table]
+    names = {column for column, _ in fields}
+    extra = [(column, EXTRA_DTYPES[table]) for column in df.columns if column not in names]
+    return apply_dtypes(df, fields + extra)
+
+
+def table_dir(table, dataset_dir=DATASET_DIR):
+    return Path(dataset_dir) / table
+
+
+def update_schema(directory, schema):
+    """Merge a file's schema into the table's _common_metadata"""
+    path = directory / SCHEMA_FILE
+    if path.exists():
+        schema = pa.unify_schemas([pq.read_schema(path), schema])
+    replace_atomically(path, lambda f: pq.write_metadata(schema, f), binary=True)
+
+
+def write_table_file(arrow_table, path):
+    """Write a partition file atomically"""
+    replace_atomically(path, lambda f: pq.write_table(arrow_table, f, compression='zstd'), binary=True)
+
+
+def may_hold_match(path, match_id):
+    """Check a partition file's matchId statistics, without reading any rows"""
+    metadata = pq.ParquetFile(path).metadata
+    column = metadata.schema.names.index('matchId')
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column).statistics
+        if stats is None or not stats.has_min_max or stats.min <= match_id <= stats.max:
+            return True
+    return False
+
+
+def drop_match(path, match_id):
+    """Return a partition file's rows without one match, or None if it doesn't hold the match"""
+    if not may_hold_match(path, match_id):
+        return None
+    if match_id not in pq.read_table(path, columns=['matchId'])['matchId'].to_pylist():
+        return None
+    existing = pq.read_table(path)
+    return existing.filter(pa.compute.not_equal(existing['matchId'], match_id))
+
+
+def previous_partition_files(table, match_id, directory):
+    """
+    Partition files that may hold a match from an earlier write
+
+    The catalog records each match's season and round, so only those
+    partitions are opened. Without a catalog every partition is a candidate.
+    """
+    # fotmob_catalog imports this module
+    from fotmob_catalog import match_partitions
+
+    partitions = match_partitions(table, match_id)
+    if partitions is None:
+        return sorted(directory.glob(f"season=*/round=*/{PART_FILENAME}"))
+    paths = [directory / f"season={season}" / f"round={match_round}" / PART_FILENAME
+             for season, match_round in sorted(partitions)]
+    return [path for path in paths if path.exists()]
+
+
+def write_match_frame(table, df, dataset_dir=DATASET_DIR):
+    """
+    Write one match's frame (shots or player stats) into the dataset
+
+    Each season/round partition holds a single file. Season, round and matchId
+    are read from the frame's matchDate, matchRound and matchId columns. A match
+    that was written before is replaced, even if its round changed; call this
+    before the match's CSV is recorded in the catalog, which is where its old
+    partition is looked up. The table is locked for the whole read-modify-write.
+    Returns the path written, or None.
+    """
+    if df is None or df.empty or not pyarrow_available():
+        return None
+
+    first = df.iloc[0]
+    match_id = int(first['matchId'])
+    directory = table_dir(table, dataset_dir)
+    partition = directory / f"season={season_of(str(first['matchDate']))}" / f"round={int(first['matchRound'])}"
+    path = partition / PART_FILENAME
+
+    df = normalize_frame(df, table)
+    update_dictionaries(df)
+    new_rows = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata(None)
+    parts = [new_rows]
+    with locked(directory):
+        if path.exists():
+            existing = pq.read_table(path)
+            parts.insert(0, existing.filter(pa.compute.not_equal(existing['matchId'], match_id)))
+
+        # A match whose round changed leaves its old partition
+        for other_path in previous_partition_files(table, match_id, directory):
+            if other_path != path:
+                remaining = drop_match(other_path, match_id)
+                if remaining is not None:
+                    write_table_file(remaining, other_path)
+
+        arrow_table = pa.concat_tables(parts, promote_options='default')
+        partition.mkdir(parents=True, exist_ok=True)
+        write_table_file(arrow_table, path)
+        update_schema(directory, arrow_table.schema)
+    return path
+
+
+def filter_expression(filters, ranges=None):
+    """
+    Turn {'column': value or [values]} and {'column': (low, high)} into a pyarrow filter expression
+
+    Filters on season and round prune whole partitions; other columns, and
+    the ranges (None for an open end), are checked against each file's row
+    group statistics before any data is read.
+    """
+    conditions = []
+    for column, value in (filters or {}).items():
+        if isinstance(value, (list, tuple, set)):
+            conditions.append(ds.field(column).isin(list(value)))
+        else:
+            conditions.append(ds.field(column) == value)
+    for column, (low, high) in (ranges or {}).items():
+        if low is not None:
+            conditions.append(ds.field(column) >= low)
+        if high is not None:
+            conditions.append(ds.field(column) <= high)
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def open_dataset(table, dataset_dir=DATASET_DIR):
+    """Open a table of the dataset with its unified schema plus the partition columns"""
+    directory = table_dir(table, dataset_dir)
+    schema = pq.read_schema(directory / SCHEMA_FILE)
+    for field in partitioning().schema:
+        if field.name not in schema.names:
+            schema = schema.append(field)
+    return ds.dataset(directory, schema=schema, format='parquet', partitioning=partitioning())
+
+
+def read_dataset(table, columns=None, filters=None, dataset_dir=DATASET_DIR, ranges=None):
+    """
+    Load a table as a DataFrame, reading only the given columns and the
+    partitions/row groups that can match the filters and ranges
+
+    Repeated strings (names, types, dates) come back as categoricals over the
+    shared dictionaries of fotmob_categories.
+
+    Example: read_dataset('shots', ['playerId', 'expectedGoals'],
+                          {'season': '2025-2026', 'teamId': 8427}, ranges={'expectedGoals': (0.3, None)})
+    """
+    if not pyarrow_available():
+        raise ImportError("pyarrow is required to read the Parquet dataset")
+    dataset = open_dataset(table, dataset_dir)
+    arrow_table = dataset.to_table(columns=columns, filter=filter_expression(filters, ranges))
+    # Encoded in Arrow, so the strings are never materialized row by row
+    for i, field in enumerate(arrow_table.schema):
+        if column_dictionary(field.name) and pa.types.is_string(field.type):
+            arrow_table = arrow_table.set_column(i, field.name, pa.compute.dictionary_encode(arrow_table[field.name]))
+    return categorize(arrow_table.to_pandas())
+
+
+# ============================================================================
+# MIGRATION OF THE EXISTING PER-MATCH CSVS
+# ============================================================================
+
+def migrate_csvs(dataset_dir=DATASET_DIR):
+    """
+    Write every existing per-match shots and player stats CSV into the dataset
+
+    The CSVs are grouped by partition first, so each partition file is written
+    once. Tables that already exist in the dataset are rebuilt from scratch.
+    """
+    if not pyarrow_available():
+        return
+    for table, csv_dir in CSV_DIRS.items():
+        csv_paths = sorted(Path(csv_dir).glob('*.csv'))
+        partitions = {}
+        for csv_path in csv_paths:
+            try:
+                df = pd.read_csv(csv_path)
+                if df.empty:
+                    continue
+                first = df.iloc[0]
+                key = (season_of(str(first['matchDate'])), int(first['matchRound']))
+                df = normalize_frame(df, table)
+                update_dictionaries(df)
+                arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+                partitions.setdefault(key, []).append(arrow_table.replace_schema_metadata(None))
+            except Exception as e:
+                print(f"Error migrating {csv_path.name}: {e}")
+
+        directory = table_dir(table, dataset_dir)
+        migrated = 0
+        with locked(directory):
+            for old_path in directory.glob(f"season=*/round=*/{PART_FILENAME}"):
+                old_path.unlink()
+            if (directory / SCHEMA_FILE).exists():
+                (directory / SCHEMA_FILE).unlink()
+
+            for (season, match_round), parts in sorted(partitions.items()):
+                partition = directory / f"season={season}" / f"round={match_round}"
+                partition.mkdir(parents=True, exist_ok=True)
+                arrow_table = pa.concat_tables(parts, promote_options='default')
+                write_table_file(arrow_table, partition / PART_FILENAME)
+                update_schema(directory, arrow_table.schema)
+                migrated += len(parts)
+
+        files = list(directory.glob(f"season=*/round=*/{PART_FILENAME}"))
+        size = sum(path.stat().st_size for path in files)
+        print(f"{table}: {migrated} of {len(csv_paths)} CSVs written, "
+              f"{len(files)} Parquet files, {size / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob Parquet dataset')
+    parser.add_argument('--migrate', action='store_true',
+                        help='Write the existing per-match CSVs into the dataset')
+    args = parser.parse_args()
+
+    if args.migrate:
+        migrate_csvs()
+    else:
+        for table in CSV_DIRS:
+            directory = table_dir(table)
+            files = list(directory.glob(f'season=*/round=*/{PART_FILENAME}'))
+            print(f"{table}: {len(files)} files in {directory}")
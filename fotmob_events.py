@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+FotMob Shot and Goal Event Columns
+Flattens the nested fields of shotmap shots (onGoalShot) and goal events
+(player, shotmapEvent, newScore) into typed columns, so the shots and scorer
+CSVs hold plain values and load with explicit dtypes instead of parsing
+repr'd dicts row by row
+"""
+
+import argparse
+import ast
+import csv
+import re
+from pathlib import Path
+
+import pandas as pd
+
+from fotmob_categories import categorize
+from fotmob_csv import write_frame
+
+
+BASE_DIR = Path(__file__).resolve().parent
+SHOTS_CSV_DIR = BASE_DIR / 'shots' / 'csv'
+GOALS_CSV_DIR = BASE_DIR / 'goals' / 'csv'
+
+# Columns of a shotmap shot, with onGoalShot flattened
+SHOT_FIELDS = [
+    ('id', 'Int64'), ('eventType', 'string'), ('teamId', 'Int64'), ('playerId', 'Int64'),
+    ('playerName', 'string'), ('x', 'float64'), ('y', 'float64'), ('min', 'Int64'), ('minAdded', 'Int64'),
+    ('isBlocked', 'boolean'), ('isOnTarget', 'boolean'), ('blockedX', 'float64'), ('blockedY', 'float64'),
+    ('goalCrossedY', 'float64'), ('goalCrossedZ', 'float64'), ('expectedGoals', 'float64'),
+    ('expectedGoalsOnTarget', 'float64'), ('shotType', 'string'), ('situation', 'string'),
+    ('period', 'string'), ('isOwnGoal', 'boolean'), ('onGoalShot_x', 'float64'),
+    ('onGoalShot_y', 'float64'), ('onGoalShot_zoomRatio', 'float64'), ('isSavedOffLine', 'boolean'),
+    ('isFromInsideBox', 'boolean'), ('keeperId', 'Int64'), ('firstName', 'string'),
+    ('lastName', 'string'), ('fullName', 'string'), ('teamColor', 'string'),
+]
+SHOT_MATCH_FIELDS = [
+    ('matchId', 'Int64'), ('matchRound', 'Int64'), ('homeTeamName', 'string'), ('homeTeamId', 'Int64'),
+    ('awayTeamName', 'string'), ('awayTeamId', 'Int64'), ('matchDate', 'string'),
+    ('home_goals', 'Int64'), ('away_goals', 'Int64'),
+]
+SHOT_DTYPES = dict(SHOT_MATCH_FIELDS + SHOT_FIELDS)
+
+# Columns of a goal event, with player, newScore and shotmapEvent (as shot_*) flattened.
+# The scorer CSVs are appended to, so every row is written with exactly these columns.
+GOAL_EVENT_FIELDS = [
+    ('matchId', 'Int64'), ('reactKey', 'string'), ('timeStr', 'string'), ('type', 'string'),
+    ('time', 'Int64'), ('overloadTime', 'Int64'), ('overloadTimeStr', 'string'), ('eventId', 'Int64'),
+    ('player_id', 'Int64'), ('player_name', 'string'), ('player_profileUrl', 'string'),
+    ('homeScore', 'Int64'), ('awayScore', 'Int64'), ('profileUrl', 'string'), ('isHome', 'boolean'),
+    ('ownGoal', 'boolean'), ('goalDescription', 'string'), ('goalDescriptionKey', 'string'),
+    ('suffix', 'string'), ('suffixKey', 'string'), ('isPenaltyShootoutEvent', 'boolean'),
+    ('nameStr', 'string'), ('firstName', 'string'), ('lastName', 'string'), ('fullName', 'string'),
+    ('playerId', 'Int64'), ('newScore_home', 'Int64'), ('newScore_away', 'Int64'),
+    ('penShootoutScore_home', 'Int64'), ('penShootoutScore_away', 'Int64'),
+] + [(f'shot_{column}', dtype) for column, dtype in SHOT_FIELDS] + [
+    ('assistStr', 'string'), ('assistProfileUrl', 'string'), ('assistPlayerId', 'Int64'),
+    ('assistKey', 'string'), ('assistInput', 'string'),
+]
+SCORER_TEAM_COLUMNS = {'home': 'HomeTeamId', 'away': 'AwayTeamId'}
+SCORER_FIELDS = {
+    team_type: GOAL_EVENT_FIELDS + [('goal_scorer', 'string'), ('matchRound', 'Int64'), (team_column, 'Int64')]
+    for team_type, team_column in SCORER_TEAM_COLUMNS.items()
+}
+
+BOOLEAN_VALUES = {True: True, False: False, 'True': True, 'False': False,
+                  'true': True, 'false': False, 'TRUE': True, 'FALSE': False}
+
+
+def to_text(value):
+    """Text form of a cell, with whole floats read back from CSV (61302.0) kept as '61302'"""
+    if value is None or value is pd.NA or value != value:
+        return None
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def apply_dtypes(df, fields, keep_extra=True):
+    """
+    Give a frame the columns and dtypes of a field list, in that order
+
+    Missing columns are added empty. Columns not in the list are kept at the
+    end, or dropped when keep_extra is False.
+    """
+    columns = {}
+    for column, dtype in fields:
+        values = df[column] if column in df.columns else pd.Series([None] * len(df), index=df.index, dtype=object)
+        if dtype == 'Int64':
+            columns[column] = pd.to_numeric(values, errors='coerce').round().astype('Int64')
+        elif dtype == 'float64':
+            columns[column] = pd.to_numeric(values, errors='coerce').astype('float64')
+        elif dtype == 'boolean':
+            columns[column] = values.map(BOOLEAN_VALUES).astype('boolean')
+        else:
+            columns[column] = values.map(to_text).astype('string')
+
+    if keep_extra:
+        names = {column for column, _ in fields}
+        columns.update((column, df[column]) for column in df.columns if column not in names)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def split_pair(values, prefix):
+    """Turn a column of [home, away] lists into two columns"""
+    pairs = [value if isinstance(value, (list, tuple)) and len(value) == 2 else (None, None) for value in values]
+    return {f'{prefix}_home': [pair[0] for pair in pairs], f'{prefix}_away': [pair[1] for pair in pairs]}
+
+
+def flatten_shots(shots):
+    """Build the typed shot columns from a list of shotmap shots"""
+    df = pd.json_normalize(shots, sep='_') if shots else pd.DataFrame()
+    return apply_dtypes(df, SHOT_FIELDS)
+
+
+def flatten_goal_events(events):
+    """
+    Build the typed goal event columns from a list of goal events
+
+    player becomes player_id/player_name/player_profileUrl, shotmapEvent becomes
+    shot_id, shot_x, ..., shot_onGoalShot_x, and newScore newScore_home/newScore_away.
+    Keys outside GOAL_EVENT_FIELDS are left out so appended rows always line up.
+    """
+    events = [event for event in events if isinstance(event, dict)]
+    df = pd.json_normalize(events, sep='_') if events else pd.DataFrame()
+    df = df.rename(columns=lambda column: re.sub(r'^shotmapEvent_', 'shot_', column))
+    for prefix in ('newScore', 'penShootoutScore'):
+        if prefix in df.columns:
+            for column, values in split_pair(df[prefix], prefix).items():
+                df[column] = values
+    return apply_dtypes(df, GOAL_EVENT_FIELDS, keep_extra=False)
+
+
+def read_shots_csv(path):
+    """Load a per-match shots CSV with its typed columns"""
+    return categorize(pd.read_csv(path, dtype=SHOT_DTYPES, float_precision='round_trip'))
+
+
+def read_scorers_csv(path, team_type):
+    """Load homeScorers.csv or awayScorers.csv with its typed columns"""
+    return categorize(pd.read_csv(path, dtype=dict(SCORER_FIELDS[team_type]), float_precision='round_trip'))
+
+
+# ============================================================================
+# MIGRATION OF THE EXISTING CSVS
+# ============================================================================
+
+def literal(value):
+    """Parse a dict/list cell of an existing CSV, which holds its Python repr"""
+    if isinstance(value, str) and value[:1] in '{[':
+        return ast.literal_eval(value)
+    return value
+
+
+def migrate_shots_csv(csv_path):
+    """Rewrite one per-match shots CSV with onGoalShot flattened; returns False if already flat"""
+    df = pd.read_csv(csv_path, float_precision='round_trip')
+    if 'onGoalShot' not in df.columns:
+        return False
+    on_goal = pd.json_normalize([literal(value) or {} for value in df['onGoalShot'].fillna('{}')], sep='_')
+    for column in on_goal.columns:
+        df[f'onGoalShot_{column}'] = on_goal[column].to_numpy()
+    df = df.drop(columns=['onGoalShot'])
+    write_frame(apply_dtypes(df, SHOT_MATCH_FIELDS + SHOT_FIELDS), csv_path)
+    return True
+
+
+def is_integer(cell):
+    return cell is not None and re.fullmatch(r'\d+(\.0)?', cell) is not None
+
+
+def scorer_event(header, row):
+    """
+    Turn a row of an existing scorer CSV back into a goal event dict
+
+    Rows were appended from events with different sets of keys, so many don't
+    line up with the header. The leading fields are read by position, the shot,
+    score and assist by their shape, and the goal_scorer/matchRound/team id
+    triple as the first (name, number, number) run after the shot. The fields in
+    between are only read by name when the shot sits where the header puts it.
+    """
+    row = [None if cell == '' else cell for cell in row]
+    event = dict(zip(header[:7], row[:7]))
+
+    shot_index = next((i for i, cell in enumerate(row)
+                       if cell and cell.startswith('{') and "'eventType'" in cell), None)
+    if shot_index is None:
+        event.update(zip(header[-3:], row[-3:]))
+        return {column: literal(value) for column, value in event.items()}
+
+    event['shotmapEvent'] = row[shot_index]
+    if header.index('shotmapEvent') == shot_index:
+        event.update((column, value) for column, value in zip(header[7:shot_index], row[7:shot_index])
+                     if column not in event)
+    else:
+        event['newScore'] = next((cell for cell in row[7:shot_index] if cell and cell.startswith('[')), None)
+
+    tail = row[shot_index + 1:]
+    for i, cell in enumerate(tail):
+        if cell and cell.startswith('assist by'):
+            event['assistStr'] = cell
+            profile = re.match(r'/players/(\d+)/', tail[i + 1] or '') if i + 1 < len(tail) else None
+            event['assistPlayerId'] = profile.group(1) if profile else None
+            event['assistProfileUrl'] = tail[i + 1] if profile else None
+        elif cell == 'assist_by':
+            event['assistKey'] = cell
+            event['assistInput'] = tail[i + 1] if i + 1 < len(tail) else None
+    for i in range(len(tail) - 2):
+        name, match_round, team_id = tail[i:i + 3]
+        if name and not is_integer(name) and not name.startswith(('assist', '/')) \
+                and is_integer(match_round) and is_integer(team_id) and name != event.get('assistInput'):
+            event['goal_scorer'], event['matchRound'], event[header[-1]] = name, match_round, team_id
+            break
+    return {column: literal(value) for column, value in event.items()}
+
+
+def shot_match_ids(csv_dir=SHOTS_CSV_DIR):
+    """Map every shot id in the per-match shots CSVs to its matchId"""
+    shot_matches = {}
+    for csv_path in Path(csv_dir).glob('*.csv'):
+        df = pd.read_csv(csv_path, usecols=['id', 'matchId'])
+        shot_matches.update(zip(df['id'].astype('int64'), df['matchId'].astype('int64')))
+    return shot_matches
+
+
+def migrate_scorers_csv(csv_path, team_type, shot_matches):
+    """
+    Rewrite homeScorers.csv or awayScorers.csv with flat, aligned columns
+
+    The matchId of each goal is looked up through its shot. Returns False if
+    the file is already flat.
+    """
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        rows = list(reader)
+    if 'shotmapEvent' not in header:
+        return False
+
+    team_column = SCORER_TEAM_COLUMNS[team_type]
+    events = [scorer_event(header, row) for row in rows]
+    df = flatten_goal_events(events)
+    df['matchId'] = [shot_matches.get((event.get('shotmapEvent') or {}).get('id')) for event in events]
+    df['goal_scorer'] = [event.get('goal_scorer') for event in events]
+    df['matchRound'] = [event.get('matchRound') for event in events]
+    df[team_column] = [event.get(team_column) for event in events]
+    df = apply_dtypes(df, SCORER_FIELDS[team_type])
+
+    missing = df['matchId'].isna().sum()
+    write_frame(df, csv_path)
+    print(f"{Path(csv_path).name}: {len(df)} goals flattened"
+          + (f", {missing} without a matchId (shot not in any shots CSV)" if missing else ""))
+    return True
+
+
+def migrate_csvs():
+    """Flatten the nested columns of every existing shots and scorer CSV"""
+    shots_paths = sorted(SHOTS_CSV_DIR.glob('*.csv'))
+    migrated = 0
+    for csv_path in shots_paths:
+        try:
+            migrated += migrate_shots_csv(csv_path)
+        except Exception as e:
+            print(f"Error migrating {csv_path.name}: {e}")
+    print(f"Shots: {migrated} of {len(shots_paths)} CSVs flattened")
+
+    shot_matches = shot_match_ids()
+    for team_type in SCORER_TEAM_COLUMNS:
+        csv_path = GOALS_CSV_DIR / f'{team_type}Scorers.csv'
+        if csv_path.exists():
+            try:
+                migrate_scorers_csv(csv_path, team_type, shot_matches)
+            except Exception as e:
+                print(f"Error migrating {csv_path.name}: {e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob shot and goal event columns')
+    parser.add_argument('--migrate', action='store_true',
+                        help='Flatten the nested columns of the existing shots and scorer CSVs')
+    args = parser.parse_args()
+
+    if args.migrate:
+        migrate_csvs()
+        print("Re-run 'python fotmob_dataset.py --migrate' and "
+              "'python fotmob_warehouse.py --import-csv' to pick up the new columns")
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+FotMob HTTP Client
+One pooled keep-alive session shared by every scraper, with conditional
+re-crawls (ETag / Last-Modified), per-host rate limiting with retries and a
+circuit breaker, and per-response transfer accounting
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urldefrag, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from fotmob_csv import replace_atomically
+
+
+VALIDATORS_FILE = Path(__file__).resolve().parent / 'http_validators.json'
+POOL_SIZE = 32
+DEFAULT_TIMEOUT = 30
+DEFAULT_HEADERS = {
+    'Accept-Encoding': 'gzip, deflate',
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) championship-data',
+}
+
+_session = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_validators = None
+_validators_lock = threading.Lock()
+
+# Rate limiting: each host gets a token bucket whose rate grows slowly while
+# responses are healthy and halves on 429 / 5xx (additive increase,
+# multiplicative decrease), so concurrency settles at the fastest safe pace
+RATE_START = 4.0        # requests per second
+RATE_MIN = 0.5
+RATE_MAX = 20.0
+RATE_STEP = 0.5         # added to the rate after each healthy response
+BURST = 4               # tokens a host can bank while idle
+
+# Retries with exponential backoff and full jitter
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 4
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+RETRY_AFTER_MAX = 300.0
+
+# Circuit breaker: this many failed attempts in a row pauses all requests to
+# the host for the cooldown, which doubles each time the breaker trips again
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+BREAKER_COOLDOWN_MAX = 600.0
+
+_hosts = {}
+_hosts_lock = threading.Lock()
+
+transfer_stats = {
+    'requests': 0,
+    'not_modified': 0,
+    'wire_bytes': 0,
+    'decoded_bytes': 0,
+    'retries': 0,
+    'throttled': 0,
+    'breaker_trips': 0,
+}
+
+
+def get_session():
+    """Return the shared session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+        return _session
+
+
+def cache_key(url):
+    """Validators are stored per page, so the #matchId fragment is dropped"""
+    return urldefrag(url)[0]
+
+
+def load_validators(path=VALIDATORS_FILE):
+    """Load the stored ETag / Last-Modified values, keyed by URL"""
+    global _validators
+    with _validators_lock:
+        if _validators is None:
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    _validators = json.load(f)
+            else:
+                _validators = {}
+        return _validators
+
+
+def save_validators(response, path=VALIDATORS_FILE):
+    """
+    Remember the validators of a successfully processed response
+
+    Call this only after the page has been ingested: once stored, the next
+    conditional fetch of the same URL can come back as 304 with no body.
+    """
+    if response.status_code != 200:
+        return
+    entry = {}
+    if response.headers.get('ETag'):
+        entry['etag'] = response.headers['ETag']
+    if response.headers.get('Last-Modified'):
+        entry['last_modified'] = response.headers['Last-Modified']
+    if not entry:
+        return
+
+    # Key on the URL that was asked for, not where a redirect ended up
+    requested_url = response.history[0].url if response.history else response.url
+    validators = load_validators(path)
+    with _validators_lock:
+        validators[cache_key(requested_url)] = entry
+        replace_atomically(path, lambda f: json.dump(validators, f, indent=1, sort_keys=True))
+
+
+def record_transfer(response):
+    """Add one response to the transfer counters"""
+    with _stats_lock:
+        transfer_stats['requests'] += 1
+        if response.status_code == 304:
+            transfer_stats['not_modified'] += 1
+        # raw.tell() counts bytes read off the wire, before gzip decoding
+        transfer_stats['wire_bytes'] += response.raw.tell() if response.raw is not None else 0
+        transfer_stats['decoded_bytes'] += len(response.content)
+
+
+def count(stat, amount=1):
+    """Increment one of the transfer counters"""
+    with _stats_lock:
+        transfer_stats[stat] += amount
+
+
+# ============================================================================
+# RATE LIMITING, BACKOFF AND CIRCUIT BREAKER
+# ============================================================================
+
+def host_state(host):
+    """Return the limiter state of a host, creating it on first use (call with _hosts_lock held)"""
+    state = _hosts.get(host)
+    if state is None:
+        state = {
+            'rate': RATE_START,
+            'tokens': BURST,
+            'updated': time.monotonic(),
+            'paused_until': 0.0,
+            'failures': 0,
+            'cooldown': BREAKER_COOLDOWN,
+        }
+        _hosts[host] = state
+    return state
+
+
+def acquire(host):
+    """
+    Block until the host's bucket has a token, then take it
+
+    Also waits out any Retry-After pause or open circuit breaker for the host.
+    """
+    while True:
+        with _hosts_lock:
+            state = host_state(host)
+            now = time.monotonic()
+            state['tokens'] = min(BURST, state['tokens'] + (now - state['updated']) * state['rate'])
+            state['updated'] = now
+            if now < state['paused_until']:
+                wait = state['paused_until'] - now
+            elif state['tokens'] >= 1:
+                state['tokens'] -= 1
+                return
+            else:
+                wait = (1 - state['tokens']) / state['rate']
+        time.sleep(wait)
+
+
+def retry_after_seconds(response):
+    """Return the Retry-After delay of a response in seconds, or None"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), RETRY_AFTER_MAX)
+
+
+def record_success(host):
+    """A healthy response: close the breaker and nudge the rate up"""
+    with _hosts_lock:
+        state = host_state(host)
+        state['failures'] = 0
+        state['cooldown'] = BREAKER_COOLDOWN
+        state['rate'] = min(RATE_MAX, state['rate'] + RATE_STEP)
+
+
+def record_failure(host, retry_after=None):
+    """
+    A throttled, failed or timed-out attempt: halve the rate, honour Retry-After
+    and trip the circuit breaker once too many attempts in a row have failed
+    """
+    with _hosts_lock:
+        state = host_state(host)
+        now = time.monotonic()
+        state['rate'] = max(RATE_MIN, state['rate'] / 2)
+        state['tokens'] = min(state['tokens'], 0)
+        state['failures'] += 1
+        if retry_after:
+            state['paused_until'] = max(state['paused_until'], now + retry_after)
+
+        if state['failures'] < BREAKER_THRESHOLD:
+            return
+        cooldown = state['cooldown']
+        state['paused_until'] = max(state['paused_until'], now + cooldown)
+        state['cooldown'] = min(BREAKER_COOLDOWN_MAX, cooldown * 2)
+        state['failures'] = 0
+
+    count('breaker_trips')
+    print(f"Circuit breaker open for {host}: {BREAKER_THRESHOLD} failures in a row, "
+          f"pausing requests for {cooldown:.0f}s")
+
+
+def backoff_delay(attempt, retry_after=None):
+    """Exponential backoff with full jitter, never shorter than Retry-After"""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def fetch(url, conditional=False, timeout=DEFAULT_TIMEOUT):
+    """
+    GET a page through the shared session
+
+    With conditional=True the stored validators are sent as If-None-Match /
+    If-Modified-Since, and an unchanged page returns a 304 response with an
+    empty body. Requests are paced per host; 429 / 5xx responses, timeouts and
+    connection errors are retried with backoff. Like requests.get, HTTP error
+    statuses left after the last retry are returned, not raised.
+    """
+    headers = {}
+    if conditional:
+        entry = load_validators().get(cache_key(url), {})
+        if 'etag' in entry:
+            headers['If-None-Match'] = entry['etag']
+        if 'last_modified' in entry:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    host = urlsplit(url).netloc
+    for attempt in range(MAX_RETRIES + 1):
+        acquire(host)
+        try:
+            response = get_session().get(url, headers=headers, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            record_failure(host)
+            if attempt == MAX_RETRIES:
+                raise
+            delay = backoff_delay(attempt)
+            print(f"Request to {url} failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+        else:
+            record_transfer(response)
+            if response.status_code not in RETRY_STATUSES:
+                record_success(host)
+                return response
+
+            retry_after = retry_after_seconds(response)
+            record_failure(host, retry_after)
+            if response.status_code == 429:
+                count('throttled')
+            if attempt == MAX_RETRIES:
+                return response
+            delay = backoff_delay(attempt, retry_after)
+            print(f"{url} returned {response.status_code}, retrying in {delay:.1f}s")
+
+        count('retries')
+        time.sleep(delay)
+
+
+def transfer_summary():
+    """Return a copy of the transfer counters"""
+    with _stats_lock:
+        return dict(transfer_stats)
+
+
+def print_transfer_summary():
+    """Print how many bytes were transferred and how much compression and 304s saved"""
+    stats = transfer_summary()
+    print("\nHTTP transfer:")
+    print(f"- Requests: {stats['requests']} ({stats['not_modified']} not modified)")
+    if stats['retries']:
+        print(f"- Retries: {stats['retries']} ({stats['throttled']} rate limited, "
+              f"{stats['breaker_trips']} circuit breaker pauses)")
+    print(f"- Bytes on the wire: {stats['wire_bytes'] / 1024:.0f} KB")
+    print(f"- Bytes after decompression: {stats['decoded_bytes'] / 1024:.0f} KB")
+    if stats['decoded_bytes']:
+        saved = 1 - stats['wire_bytes'] / stats['decoded_bytes']
+        print(f"- Compression saving: {saved:.0%}")
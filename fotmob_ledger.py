@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+FotMob Ingestion Ledger
+Records which matches have been ingested, from which payload, and which files
+hold their outputs, so re-runs skip unchanged matches and replace changed ones
+in place instead of piling up duplicate files and rows
+"""
+
+import argparse
+import csv
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from fotmob_archive import content_hash, payload_bytes
+from fotmob_csv import locked, replace_atomically
+
+
+BASE_DIR = Path(__file__).resolve().parent
+LEDGER_FILE = BASE_DIR / 'ingestion_ledger.csv'
+LEDGER_COLUMNS = ['matchId', 'sha256', 'matchRound', 'homeTeamId', 'awayTeamId',
+                  'shots_file', 'player_stats_file', 'ingested_at']
+OUTPUT_KINDS = ['shots', 'player_stats']
+
+SHOTS_DIR = BASE_DIR / 'shots' / 'csv'
+PLAYER_STATS_DIR = BASE_DIR / 'playerStats' / 'csv'
+MATCH_STATS_CSV = BASE_DIR / 'matchStats' / 'csv' / 'fotmob_match_stats.csv'
+
+_ledger = None
+_ledger_lock = threading.RLock()
+
+
+def load_ledger(path=LEDGER_FILE):
+    """
+    Load the ledger into a dict keyed by matchId
+
+    The file is an append-only log; the last row for a match wins. Without
+    a ledger file it is first rebuilt from the CSVs on disk, so matches that
+    are already there keep their files.
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            if not os.path.exists(path):
+                return rebuild_ledger(path)
+            _ledger = {}
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.DictReader(f):
+                    _ledger[row['matchId']] = row
+        return _ledger
+
+
+def append_entry(entry, path=LEDGER_FILE):
+    """Append one entry to the ledger file and the in-memory index"""
+    with _ledger_lock:
+        ledger = load_ledger(path)
+        write_header = not os.path.exists(path)
+        with open(path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=LEDGER_COLUMNS)
+            if write_header:
+                writer.writeheader()
+            writer.writerow(entry)
+        ledger[entry['matchId']] = entry
+
+
+def match_key(json_data):
+    """Return the fields that identify a match's rows in the appended CSVs"""
+    general = json_data['props']['pageProps']['general']
+    return {
+        'matchId': str(general['matchId']),
+        'matchRound': str(general['matchRound']),
+        'homeTeamId': str(general['homeTeam']['id']),
+        'awayTeamId': str(general['awayTeam']['id']),
+    }
+
+
+def payload_digest(json_data):
+    """Content hash of a payload, the same one the raw archive uses"""
+    return content_hash(payload_bytes(json_data))
+
+
+def payload_status(match_id, digest):
+    """Return 'new', 'unchanged' or 'changed' for a match's freshly fetched payload"""
+    entry = load_ledger().get(str(match_id))
+    if entry is None:
+        return 'new'
+    if entry['sha256'] == digest:
+        return 'unchanged'
+    return 'changed'
+
+
+def output_filename(match_id, kind, directory, match_name):
+    """
+    Pick the per-match CSV filename for a match's output
+
+    A match that already owns a file keeps it, so re-ingesting replaces the file
+    in place. Both legs of a fixture share the same URL slug, so a new match
+    whose name is taken by another match gets a numbered suffix.
+    """
+    with _ledger_lock:
+        ledger = load_ledger()
+        entry = ledger.get(str(match_id))
+        if entry and entry.get(f'{kind}_file'):
+            return entry[f'{kind}_file']
+
+        taken = {row.get(f'{kind}_file') for row in ledger.values()}
+        filename = f"{match_name}.csv"
+        counter = 1
+        while filename in taken or os.path.exists(os.path.join(directory, filename)):
+            filename = f"{match_name}-{counter}.csv"
+            counter += 1
+        return filename
+
+
+def record_ingestion(key, digest, written):
+    """
+    Record an ingestion with the files it wrote
+
+    An incomplete ingestion is recorded with an empty digest, so the match's
+    files stay its own but its payload is never taken as unchanged.
+    """
+    with _ledger_lock:
+        previous = load_ledger().get(key['matchId'], {})
+        entry = {column: previous.get(column, '') for column in LEDGER_COLUMNS}
+        entry.update(key)
+        entry['sha256'] = digest
+        for kind in OUTPUT_KINDS:
+            if written.get(kind):
+                entry[f'{kind}_file'] = written[kind]
+        entry['ingested_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        append_entry(entry)
+
+
+def claim_output(match_id, kind, filename):
+    """Record that a per-match file belongs to a match (used by the standalone scrapers)"""
+    with _ledger_lock:
+        previous = load_ledger().get(str(match_id), {'matchId': str(match_id)})
+        if previous.get(f'{kind}_file') == filename:
+            return
+        entry = {column: previous.get(column, '') for column in LEDGER_COLUMNS}
+        entry[f'{kind}_file'] = filename
+        entry['ingested_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        append_entry(entry)
+
+
+def drop_rows(csv_path, match_values):
+    """
+    Remove the rows of an appended CSV whose columns equal every value in match_values
+
+    Used before re-ingesting a changed match so its old rows are replaced rather
+    than duplicated. The file is rewritten atomically under its lock.
+    Returns the number of rows removed.
+    """
+    if not os.path.exists(csv_path):
+        return 0
+
+    with locked(csv_path):
+        with open(csv_path, newline='', encoding='utf-8') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            rows = list(reader)
+        if header is None:
+            return 0
+
+        try:
+            positions = [(header.index(column), str(value)) for column, value in match_values.items()]
+        except ValueError:
+            return 0
+
+        def matches(row):
+            return all(index < len(row) and row[index] == value for index, value in positions)
+
+        kept = [row for row in rows if not matches(row)]
+        removed = len(rows) - len(kept)
+        if removed:
+            def write(f):
+                writer = csv.writer(f, lineterminator='\n')
+                writer.writerow(header)
+                writer.writerows(kept)
+
+            replace_atomically(csv_path, write)
+    return removed
+
+
+# ============================================================================
+# BOOTSTRAP FROM EXISTING CSVS
+# ============================================================================
+
+def first_row(csv_path):
+    """Return the header and first data row of a CSV as a dict"""
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        return next(csv.DictReader(f), None)
+
+
+def rebuild_ledger(path=LEDGER_FILE):
+    """
+    Build the ledger from the CSVs already on disk
+
+    Entries get an empty hash, so the next fetch of a known match counts as
+    'changed' and replaces its existing outputs instead of duplicating them.
+    """
+    global _ledger
+    entries = {}
+
+    def entry_for(match_id):
+        return entries.setdefault(match_id, {column: '' for column in LEDGER_COLUMNS} | {'matchId': match_id})
+
+    duplicates = []
+    for kind, directory, home_column, away_column in [
+        ('shots', SHOTS_DIR, 'homeTeamId', 'awayTeamId'),
+        ('player_stats', PLAYER_STATS_DIR, 'homeTeamid', 'awayTeamid'),
+    ]:
+        for csv_path in sorted(Path(directory).glob('*.csv')):
+            row = first_row(csv_path)
+            if not row or not row.get('matchId'):
+                continue
+            entry = entry_for(row['matchId'])
+            if entry[f'{kind}_file']:
+                duplicates.append((kind, row['matchId'], entry[f'{kind}_file'], csv_path.name))
+                continue
+            entry[f'{kind}_file'] = csv_path.name
+            entry['matchRound'] = entry['matchRound'] or row.get('matchRound', '')
+            entry['homeTeamId'] = entry['homeTeamId'] or row.get(home_column, '')
+            entry['awayTeamId'] = entry['awayTeamId'] or row.get(away_column, '')
+
+    if os.path.exists(MATCH_STATS_CSV):
+        with open(MATCH_STATS_CSV, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                entry = entry_for(row['matchId'])
+                entry['matchRound'] = entry['matchRound'] or row['matchRound']
+                entry['homeTeamId'] = entry['homeTeamId'] or row['homeTeamid']
+                entry['awayTeamId'] = entry['awayTeamId'] or row['awayTeamid']
+
+    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for entry in entries.values():
+        entry['ingested_at'] = timestamp
+
+    def write(f):
+        writer = csv.DictWriter(f, fieldnames=LEDGER_COLUMNS)
+        writer.writeheader()
+        writer.writerows(entries.values())
+
+    with locked(path):
+        replace_atomically(path, write)
+
+    with _ledger_lock:
+        _ledger = entries
+
+    print(f"Ledger rebuilt with {len(entries)} matches: {path}")
+    for kind, match_id, kept, duplicate in duplicates:
+        print(f"Duplicate {kind} file for match {match_id}: {duplicate} (kept {kept})")
+    return entries
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob ingestion ledger')
+    parser.add_argument('--rebuild', action='store_true',
+                        help='Rebuild the ledger from the CSVs already on disk')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_ledger()
+    else:
+        ledger = load_ledger()
+        print(f"{len(ledger)} matches in {LEDGER_FILE}")
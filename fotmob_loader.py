@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+FotMob Loaders
+One API to load shots, player stats and match stats, whichever backend holds
+them: the Parquet dataset, the SQLite warehouse or the CSVs. Filters are pushed
+down to the backend (partitions and row group statistics, SQL WHERE clauses,
+the file catalog and the match stats offset index) and only the requested
+columns are read.
+
+    from fotmob_loader import load_shots
+    load_shots(season='2025-2026', team_id=8427, columns=['playerId', 'expectedGoals'])
+    load_shots(season='2025-2026', ranges={'expectedGoals': (0.3, None)})
+
+Every backend returns the same column names for the columns it has: 'round'
+and 'season' for the match's round and season, 'playerId', 'homeTeamId' and
+'awayTeamId' for ids the CSVs spell differently, with the dtypes of the
+dataset's fixed schema (nullable Int64 ids). The backend is picked per call
+(backend=...), by set_backend(), by the FOTMOB_BACKEND environment variable,
+or else the dataset when pyarrow is installed and the CSVs otherwise.
+"""
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import fotmob_dataset
+import fotmob_warehouse
+from fotmob_catalog import match_seasons, matching_files
+from fotmob_categories import categorize
+from fotmob_csv import lookup_rows
+from fotmob_events import SHOT_DTYPES
+
+
+BASE_DIR = Path(__file__).resolve().parent
+MATCH_STATS_CSV = BASE_DIR / 'matchStats' / 'csv' / 'fotmob_match_stats.csv'
+CSV_DIRS = {
+    'shots': BASE_DIR / 'shots' / 'csv',
+    'player_stats': BASE_DIR / 'playerStats' / 'csv',
+}
+WAREHOUSE_TABLES = {'shots': 'shots', 'player_stats': 'player_match_stats', 'match_stats': 'matches'}
+BACKENDS = ('dataset', 'warehouse', 'csv')
+
+# Canonical column -> the backend's column, where they differ
+COLUMN_NAMES = {
+    'shots': {
+        'csv': {'round': 'matchRound'},
+    },
+    'player_stats': {
+        'csv': {'round': 'matchRound', 'playerId': 'id', 'homeTeamId': 'homeTeamid', 'awayTeamId': 'awayTeamid'},
+        'dataset': {'playerId': 'id', 'homeTeamId': 'homeTeamid', 'awayTeamId': 'awayTeamid'},
+    },
+    'match_stats': {
+        'csv': {'round': 'matchRound', 'homeTeamId': 'homeTeamid', 'awayTeamId': 'awayTeamid'},
+    },
+}
+
+_backend = None
+
+
+def set_backend(backend):
+    """Use this backend for every load that doesn't name one"""
+    global _backend
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    _backend = backend
+
+
+def configured_backend():
+    """Return the backend set by set_backend(), FOTMOB_BACKEND or the default"""
+    backend = _backend or os.environ.get('FOTMOB_BACKEND')
+    if backend:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+        return backend
+    return 'dataset' if fotmob_dataset.pa is not None else 'csv'
+
+
+def as_list(value):
+    """Filter value(s) as a list"""
+    if isinstance(value, (list, tuple, set, pd.Index, pd.Series)):
+        return list(value)
+    return [value]
+
+
+def match_filters(season, match_round, match_id, team_id, player_id=None):
+    """Canonical {column: [values]} of the filters that were given"""
+    filters = {'season': season, 'round': match_round, 'matchId': match_id,
+               'teamId': team_id, 'playerId': player_id}
+    return {column: as_list(value) for column, value in filters.items() if value is not None}
+
+
+def backend_ranges(ranges, names):
+    """Canonical {column: (low, high)} in the backend's column names"""
+    return {names.get(column, column): (low, high) for column, (low, high) in (ranges or {}).items()}
+
+
+def canonical_dtypes(table):
+    """
+    Canonical column -> dtype of a table's number and boolean columns
+
+    Taken from the dataset's fixed schema, so ids are nullable Int64 whichever
+    backend they come from (the dataset and the warehouse would give int64, or
+    float64 when a value is missing, and the CSVs Int64).
+    """
+    names = {name: column for column, name in COLUMN_NAMES[table].get('dataset', {}).items()}
+    names['matchRound'] = 'round'
+    return {names.get(column, column): dtype for column, dtype in fotmob_dataset.TABLE_FIELDS.get(table, [])
+            if dtype != 'string'}
+
+
+def finish(df, table, backend, columns):
+    """Rename a backend's frame to canonical columns and dtypes, keep the requested ones and encode its strings"""
+    renames = {name: column for column, name in COLUMN_NAMES[table].get(backend, {}).items()}
+    df = df.rename(columns=renames)
+    if columns is not None:
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise ValueError(f"The {backend} backend has no {table} columns {missing}")
+        df = df[list(columns)]
+    dtypes = canonical_dtypes(table)
+    df = df.astype({column: dtype for column, dtype in dtypes.items() if column in df.columns})
+    return categorize(df.reset_index(drop=True))
+
+
+# ============================================================================
+# PARQUET DATASET
+# ============================================================================
+
+def load_from_dataset(table, filters, columns, ranges=None):
+    """Load shots or player stats from the Parquet dataset, pruning partitions and row groups"""
+    names = COLUMN_NAMES[table].get('dataset', {})
+    dataset_filters = {names.get(column, column): values for column, values in filters.items()}
+    dataset_columns = None
+    if columns is not None:
+        dataset_columns = [names.get(column, column) for column in columns]
+        schema_names = fotmob_dataset.open_dataset(table).schema.names
+        missing = [column for column, name in zip(columns, dataset_columns) if name not in schema_names]
+        if missing:
+            raise ValueError(f"The dataset backend has no {table} columns {missing}")
+    df = fotmob_dataset.read_dataset(table, dataset_columns, dataset_filters,
+                                     ranges=backend_ranges(ranges, names))
+    # 'round' (the partition) and 'matchRound' hold the same value
+    df = df.drop(columns=['matchRound'], errors='ignore')
+    return finish(df, table, 'dataset', columns)
+
+
+# ============================================================================
+# SQLITE WAREHOUSE
+# ============================================================================
+
+def load_from_warehouse(table, filters, columns, ranges=None):
+    """Load a table from the warehouse with the filters and ranges as a WHERE clause"""
+    if not fotmob_warehouse.DB_FILE.exists():
+        raise FileNotFoundError(f"No warehouse at {fotmob_warehouse.DB_FILE} "
+                                f"(build it with fotmob_warehouse.py --import-csv)")
+    sql_table = WAREHOUSE_TABLES[table]
+    table_columns = fotmob_warehouse.column_names(sql_table)
+    # Shots and player stats get their season from the match
+    joined = table != 'match_stats' and ('season' in filters or columns is None or 'season' in columns)
+
+    if columns is None:
+        select = ['t.*'] + (['m.season'] if joined else [])
+    else:
+        missing = [column for column in columns if column not in table_columns
+                   and not (column == 'season' and joined)]
+        if missing:
+            raise ValueError(f"The warehouse backend has no {table} columns {missing}")
+        select = ['m.season' if column == 'season' and joined else f't."{column}"' for column in columns]
+
+    conditions = []
+    params = []
+    for column, values in filters.items():
+        placeholders = ', '.join('?' * len(values))
+        if column == 'teamId' and table == 'match_stats':
+            conditions.append(f'(t.homeTeamId IN ({placeholders}) OR t.awayTeamId IN ({placeholders}))')
+            params.extend(values + values)
+            continue
+        target = 'm.season' if column == 'season' and joined else f't."{column}"'
+        conditions.append(f'{target} IN ({placeholders})')
+        params.extend(values)
+    for column, (low, high) in (ranges or {}).items():
+        if low is not None:
+            conditions.append(f't."{column}" >= ?')
+            params.append(low)
+        if high is not None:
+            conditions.append(f't."{column}" <= ?')
+            params.append(high)
+
+    sql = f"SELECT {', '.join(select)} FROM {sql_table} t"
+    if joined:
+        sql += ' LEFT JOIN matches m ON m.matchId = t.matchId'
+    if conditions:
+        sql += ' WHERE ' + ' AND '.join(conditions)
+    return finish(fotmob_warehouse.query(sql, params), table, 'warehouse', columns)
+
+
+# ============================================================================
+# CSVS
+# ============================================================================
+
+def filter_rows(df, filters, names, team_columns=('teamId',), ranges=None):
+    """Keep the rows that pass every filter and range (both canonical, df uses the backend's names)"""
+    keep = pd.Series(True, index=df.index)
+    for column, values in filters.items():
+        if column == 'teamId':
+            in_team = pd.Series(False, index=df.index)
+            for team_column in team_columns:
+                in_team |= df[names.get(team_column, team_column)].isin(values)
+            keep &= in_team
+        else:
+            keep &= df[names.get(column, column)].isin(values)
+    for column, (low, high) in (ranges or {}).items():
+        values = df[names.get(column, column)]
+        if low is not None:
+            keep &= (values >= low).fillna(False)
+        if high is not None:
+            keep &= (values <= high).fillna(False)
+    return df[keep]
+
+
+def load_from_csvs(table, filters, columns, ranges=None):
+    """Load shots or player stats from the per-match CSVs, opening only the files the catalog can't rule out"""
+    names = COLUMN_NAMES[table].get('csv', {})
+    paths = matching_files(table, filters, CSV_DIRS[table], backend_ranges(ranges, names))
+
+    wanted = None
+    if columns is not None:
+        wanted = {names.get(column, column) for column in list(columns) + list(filters) + list(ranges or {})}
+        if 'season' in wanted:
+            wanted |= {'matchDate'}
+        existing = [path for path in paths if path.exists()]
+        if existing:
+            header = set(pd.read_csv(existing[0], nrows=0).columns) | {'season'}
+            missing = [column for column in columns if names.get(column, column) not in header]
+            if missing:
+                raise ValueError(f"The csv backend has no {table} columns {missing}")
+    # Typed as in the dataset, so ids read as text (optaId) stay text
+    dtype = SHOT_DTYPES if table == 'shots' else dict(fotmob_dataset.PLAYER_STATS_FIELDS)
+
+    frames = []
+    for path in paths:
+        if not path.exists():
+            continue
+        usecols = None if wanted is None else (lambda column: column in wanted)
+        df = pd.read_csv(path, usecols=usecols, dtype=dtype, float_precision='round_trip')
+        if df.empty:
+            continue
+        if wanted is None or 'season' in wanted:
+            df['season'] = fotmob_dataset.season_of(str(df['matchDate'].iloc[0]))
+        frames.append(filter_rows(df, filters, names, ranges=ranges))
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=sorted(wanted or []))
+    return finish(df, table, 'csv', columns)
+
+
+def load_match_stats_from_csv(filters, columns):
+    """Load match stats from fotmob_match_stats.csv, through its offset index when matchIds are given"""
+    names = COLUMN_NAMES['match_stats']['csv']
+    if 'matchId' in filters:
+        df = lookup_rows(MATCH_STATS_CSV, filters['matchId'])
+    else:
+        wanted = None
+        if columns is not None:
+            filter_columns = [column for column in filters if column != 'teamId']
+            if 'teamId' in filters:
+                filter_columns += ['homeTeamId', 'awayTeamId']
+            wanted = {names.get(column, column) for column in list(columns) + filter_columns}
+        df = pd.read_csv(MATCH_STATS_CSV, usecols=None if wanted is None else (lambda column: column in wanted))
+
+    match_level = {column: values for column, values in filters.items() if column != 'season'}
+    df = filter_rows(df, match_level, names, team_columns=('homeTeamId', 'awayTeamId'))
+    # The file has no match date: seasons come from the catalog
+    if 'season' in filters or columns is None or 'season' in columns:
+        df['season'] = df['matchId'].map(match_seasons())
+        if 'season' in filters:
+            df = filter_rows(df, {'season': filters['season']}, names)
+    return finish(df, 'match_stats', 'csv', columns)
+
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+def load_shots(season=None, match_round=None, match_id=None, team_id=None, player_id=None,
+               columns=None, backend=None, ranges=None):
+    """
+    Load shots, one row per shot
+
+    Each filter takes a value or a list of values; columns=None loads every
+    column the backend has. ranges={column: (low, high)} keeps the rows whose
+    value is between low and high, inclusive (None for an open end), e.g.
+    {'expectedGoals': (0.3, None)}; the dataset's row group statistics and
+    the catalog's per-file min/max skip what can't match.
+    """
+    backend = backend or configured_backend()
+    filters = match_filters(season, match_round, match_id, team_id, player_id)
+    if backend == 'dataset':
+        return load_from_dataset('shots', filters, columns, ranges)
+    if backend == 'warehouse':
+        return load_from_warehouse('shots', filters, columns, ranges)
+    return load_from_csvs('shots', filters, columns, ranges)
+
+
+def load_player_stats(season=None, match_round=None, match_id=None, team_id=None, player_id=None,
+                      columns=None, backend=None, ranges=None):
+    """Load player stats, one row per player per match (filters and ranges as in load_shots)"""
+    backend = backend or configured_backend()
+    filters = match_filters(season, match_round, match_id, team_id, player_id)
+    if backend == 'dataset':
+        return load_from_dataset('player_stats', filters, columns, ranges)
+    if backend == 'warehouse':
+        return load_from_warehouse('player_stats', filters, columns, ranges)
+    return load_from_csvs('player_stats', filters, columns, ranges)
+
+
+def load_match_stats(season=None, match_round=None, match_id=None, team_id=None, columns=None, backend=None):
+    """
+    Load match stats, one row per match; team_id matches the home or the away team
+
+    The dataset has no match stats table, so its backend reads the CSV.
+    """
+    backend = backend or configured_backend()
+    filters = match_filters(season, match_round, match_id, team_id)
+    if backend == 'warehouse':
+        return load_from_warehouse('match_stats', filters, columns)
+    return load_match_stats_from_csv(filters, columns)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load FotMob shots, player stats or match stats')
+    parser.add_argument('table', choices=['shots', 'player_stats', 'match_stats'])
+    parser.add_argument('--backend', choices=BACKENDS)
+    parser.add_argument('--season')
+    parser.add_argument('--round', type=int)
+    parser.add_argument('--match', type=int)
+    parser.add_argument('--team', type=int)
+    parser.add_argument('--player', type=int)
+    parser.add_argument('--columns', help='Comma-separated columns')
+    args = parser.parse_args()
+
+    options = {'season': args.season, 'match_round': args.round, 'match_id': args.match,
+               'team_id': args.team, 'columns': args.columns.split(',') if args.columns else None,
+               'backend': args.backend}
+    start = time.perf_counter()
+    if args.table == 'shots':
+        df = load_shots(player_id=args.player, **options)
+    elif args.table == 'player_stats':
+        df = load_player_stats(player_id=args.player, **options)
+    else:
+        df = load_match_stats(**options)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(df.to_string(max_rows=20))
+    print(f"\n{len(df)} rows, {len(df.columns)} columns in {elapsed:.1f} ms")
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+FotMob Page Parsing
+Pulls the __NEXT_DATA__ JSON out of a match page by scanning the raw bytes,
+falling back to a full BeautifulSoup parse only when the scan fails
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup as bs
+
+
+NEXT_DATA_ID = b'__NEXT_DATA__'
+SCRIPT_OPEN = b'<script'
+SCRIPT_CLOSE = b'</script>'
+
+
+def find_next_data_text(content):
+    """
+    Locate the __NEXT_DATA__ script body by scanning the raw page bytes
+
+    Returns the script body as text, or None when the tag can't be found this way.
+    Next.js escapes '<' inside the JSON, so the first '</script>' after the tag
+    always closes it.
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+
+    pos = content.find(NEXT_DATA_ID)
+    while pos != -1:
+        tag_start = content.rfind(SCRIPT_OPEN, 0, pos)
+        # The id must sit inside the opening <script ...> tag itself
+        if tag_start != -1 and content.find(b'>', tag_start, pos) == -1:
+            body_start = content.find(b'>', pos)
+            if body_start == -1:
+                return None
+            body_end = content.find(SCRIPT_CLOSE, body_start)
+            if body_end == -1:
+                return None
+            return content[body_start + 1:body_end].decode('utf-8')
+        pos = content.find(NEXT_DATA_ID, pos + len(NEXT_DATA_ID))
+    return None
+
+
+def parse_next_data_with_soup(content):
+    """Slow path: find the __NEXT_DATA__ script with a full BeautifulSoup parse"""
+    soup = bs(content, 'html.parser')
+    script_tag = soup.find('script', attrs={'id': '__NEXT_DATA__'})
+    if not script_tag or not script_tag.contents:
+        return None
+    return script_tag.contents[0]
+
+
+def next_data_text(content):
+    """Return the __NEXT_DATA__ script body, or None if the page doesn't have one"""
+    text = find_next_data_text(content)
+    if text is None:
+        text = parse_next_data_with_soup(content)
+    return text
+
+
+def extract_next_data(content):
+    """
+    Return the parsed __NEXT_DATA__ JSON from a fetched match page
+
+    Raises ValueError when the page has no __NEXT_DATA__ script.
+    """
+    text = find_next_data_text(content)
+    if text is not None:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            pass
+
+    text = parse_next_data_with_soup(content)
+    if text is None:
+        raise ValueError("Could not find __NEXT_DATA__ script in the page")
+    return json.loads(text)
+
+
+# ============================================================================
+# BENCHMARK
+# ============================================================================
+
+def benchmark(pages_dir, repeat=5):
+    """Time the byte scan against the BeautifulSoup parse on saved match pages"""
+    pages = sorted(Path(pages_dir).glob('*.htm*'))
+    if not pages:
+        print(f"No saved .html pages found in {pages_dir}")
+        return None
+
+    print(f"Benchmarking {len(pages)} pages, best of {repeat} runs each")
+    print(f"{'page':<50} {'size KB':>8} {'soup ms':>9} {'scan ms':>9} {'speedup':>8}")
+
+    total_soup = 0.0
+    total_scan = 0.0
+    measured = 0
+    for page in pages:
+        content = page.read_bytes()
+
+        soup_text = parse_next_data_with_soup(content)
+        scan_text = find_next_data_text(content)
+        if soup_text is None or scan_text is None or json.loads(soup_text) != json.loads(scan_text):
+            print(f"{page.name:<50} skipped: scan and soup results differ")
+            continue
+
+        soup_times = []
+        scan_times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            json.loads(parse_next_data_with_soup(content))
+            soup_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            extract_next_data(content)
+            scan_times.append(time.perf_counter() - start)
+
+        soup_best = min(soup_times)
+        scan_best = min(scan_times)
+        total_soup += soup_best
+        total_scan += scan_best
+        measured += 1
+        print(f"{page.name[:50]:<50} {len(content) / 1024:>8.0f} {soup_best * 1000:>9.2f} "
+              f"{scan_best * 1000:>9.2f} {soup_best / scan_best:>7.1f}x")
+
+    if not measured:
+        return None
+
+    print("-" * 88)
+    print(f"Mean per page: soup {total_soup / measured * 1000:.2f} ms, "
+          f"scan {total_scan / measured * 1000:.2f} ms, "
+          f"saving {(total_soup - total_scan) / measured * 1000:.2f} ms "
+          f"({total_soup / total_scan:.1f}x faster)")
+    return total_soup, total_scan
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark __NEXT_DATA__ extraction on saved match pages')
+    parser.add_argument('pages_dir', help='Directory of saved FotMob match pages (.html)')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per page (best is reported)')
+    args = parser.parse_args()
+    benchmark(args.pages_dir, args.repeat)
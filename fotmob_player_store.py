@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+FotMob Player Stat Store
+Keeps player stats in long format, one row per (matchId, playerId, category,
+stat_key) with numeric value/total columns, next to a players table. Wide
+per-match views are built from it on demand, and the nested 'stats' column no
+longer has to be stored as a Python repr in every per-match CSV.
+"""
+
+import argparse
+import ast
+import csv
+import io
+import os
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+from fotmob_categories import categorize, update_dictionaries
+from fotmob_csv import check_schema, locked, read_existing, replace_atomically, write_frame
+from fotmob_stats import PLAYER_STAT_CATEGORIES, PLAYER_STATS_SPEC, extra_stat_column, player_stat_key
+
+
+BASE_DIR = Path(__file__).resolve().parent
+STORE_DIR = BASE_DIR / 'playerStats' / 'store'
+PLAYERS_FILE = STORE_DIR / 'players.csv'
+VALUES_FILE = STORE_DIR / 'player_stat_values.csv'
+PLAYER_CSV_DIR = BASE_DIR / 'playerStats' / 'csv'
+
+PLAYER_COLUMNS = ['matchId', 'matchRound', 'matchDate', 'playerId', 'name', 'optaId',
+                  'teamId', 'teamName', 'isGoalkeeper', 'shirtNumber', 'usualPosition', 'positionId']
+VALUE_COLUMNS = ['matchId', 'playerId', 'category', 'stat_key', 'value', 'total']
+
+PLAYER_DTYPES = {'matchId': 'int64', 'playerId': 'int64', 'teamId': 'Int64', 'optaId': 'category',
+                 'matchRound': 'string', 'name': 'category', 'teamName': 'category', 'matchDate': 'category',
+                 'shirtNumber': 'Int64', 'usualPosition': 'Int64', 'positionId': 'Int64'}
+VALUE_DTYPES = {'matchId': 'int64', 'playerId': 'int64', 'category': 'category',
+                'stat_key': 'category', 'value': 'float64', 'total': 'float64'}
+
+_stored_matches = None
+_store_lock = threading.RLock()
+
+
+def to_number(value):
+    """Return a stat value as a number, or None when it isn't one"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def player_store_rows(match_info, players):
+    """
+    Turn one match's players into rows for the players and stat values tables
+
+    match_info holds matchId, matchRound and matchDate; players are the
+    playerStats entries of the page. Stats with neither a value nor a total
+    are left out.
+    """
+    player_rows = []
+    value_rows = []
+    for player in players:
+        player_id = player.get('id')
+        player_rows.append([
+            match_info['matchId'], match_info['matchRound'], match_info['matchDate'], player_id,
+            player.get('name'), player.get('optaId'), player.get('teamId'), player.get('teamName'),
+            player.get('isGoalkeeper'), player.get('shirtNumber'), player.get('usualPosition'),
+            player.get('positionId'),
+        ])
+
+        categories = player.get('stats')
+        if not isinstance(categories, list):
+            continue
+        for category_index, category in enumerate(categories):
+            if not isinstance(category, dict):
+                continue
+            category_key = category.get('key') or f"category{category_index}"
+            for title, entry in (category.get('stats') or {}).items():
+                stat = entry.get('stat') or {}
+                value = to_number(stat.get('value'))
+                total = to_number(stat.get('total'))
+                if value is None and total is None:
+                    continue
+                value_rows.append([match_info['matchId'], player_id, category_key,
+                                   player_stat_key(title, entry), value, total])
+    return player_rows, value_rows
+
+
+def build_player_store_rows(json_data):
+    """Build the store rows of a match page"""
+    general = json_data['props']['pageProps']['general']
+    match_info = {
+        'matchId': general['matchId'],
+        'matchRound': general['matchRound'],
+        'matchDate': general['matchTimeUTCDate'],
+    }
+    players = list(json_data['props']['pageProps']['content']['playerStats'].values())
+    return player_store_rows(match_info, players)
+
+
+def stored_match_ids():
+    """Return the set of matchIds already in the store (read once, then kept up to date)"""
+    global _stored_matches
+    with _store_lock:
+        if _stored_matches is None:
+            _stored_matches = set()
+            if os.path.exists(PLAYERS_FILE):
+                ids = pd.read_csv(PLAYERS_FILE, usecols=['matchId'], dtype=str)['matchId']
+                _stored_matches = set(ids)
+        return _stored_matches
+
+
+def replace_match_rows(path, columns, match_id, rows, replace=False):
+    """
+    Write one match's rows to a store table, atomically and under the file's lock
+
+    With replace set, the match's old rows (matchId is the first column of
+    both tables) are dropped in the same rewrite.
+    """
+    with locked(path):
+        header, body = read_existing(path)
+        if header is None:
+            header = columns
+        else:
+            check_schema(columns, header, path)
+        if replace:
+            prefix = f"{match_id},"
+            body = ''.join(line for line in body.splitlines(keepends=True) if not line.startswith(prefix))
+        new_rows = io.StringIO()
+        csv.writer(new_rows).writerows(rows)
+
+        def write(f):
+            csv.writer(f).writerow(header)
+            f.write(body)
+            f.write(new_rows.getvalue())
+
+        replace_atomically(path, write)
+
+
+def save_player_store_rows(rows):
+    """
+    Write one match's rows to the store, replacing the match if it is already there
+
+    Returns the number of stat values written.
+    """
+    player_rows, value_rows = rows
+    if not player_rows:
+        return 0
+    match_id = str(player_rows[0][0])
+
+    with _store_lock:
+        STORE_DIR.mkdir(parents=True, exist_ok=True)
+        stored = stored_match_ids()
+        replace = match_id in stored
+        replace_match_rows(PLAYERS_FILE, PLAYER_COLUMNS, match_id, player_rows, replace)
+        replace_match_rows(VALUES_FILE, VALUE_COLUMNS, match_id, value_rows, replace)
+        stored.add(match_id)
+    update_dictionaries(pd.DataFrame(player_rows, columns=PLAYER_COLUMNS))
+    update_dictionaries(pd.DataFrame(value_rows, columns=VALUE_COLUMNS)[['category', 'stat_key']])
+
+    print(f"Player stat store: {len(player_rows)} players, {len(value_rows)} stat values for match {match_id}")
+    return len(value_rows)
+
+
+# ============================================================================
+# LOADING AND WIDE VIEWS
+# ============================================================================
+
+def load_player_stat_values(match_ids=None):
+    """Load the long stat values table, optionally only for some matches"""
+    df = pd.read_csv(VALUES_FILE, dtype=VALUE_DTYPES)
+    if match_ids is not None:
+        df = df[df['matchId'].isin([int(match_id) for match_id in match_ids])]
+    return categorize(df)
+
+
+def load_players(match_ids=None):
+    """Load the players table, optionally only for some matches"""
+    df = pd.read_csv(PLAYERS_FILE, dtype=PLAYER_DTYPES)
+    if match_ids is not None:
+        df = df[df['matchId'].isin([int(match_id) for match_id in match_ids])]
+    return categorize(df)
+
+
+def integral_to_int(df):
+    """Use nullable integer columns where every value is a whole number"""
+    for column in df.columns:
+        values = df[column].dropna()
+        if len(values) and (values == values.round()).all():
+            df[column] = df[column].astype('Int64')
+    return df
+
+
+def wide_player_stats(match_ids=None, values=None, players=None):
+    """
+    Build the wide player stats view (one row per player per match) from the store
+
+    The configured columns come first, named as in the per-match CSVs, then
+    every other stat as '<category key>_<stat key>' (plus '_total').
+    """
+    if values is None:
+        values = load_player_stat_values(match_ids)
+    if players is None:
+        players = load_players(match_ids)
+
+    index = ['matchId', 'playerId']
+    value_wide = values.pivot_table(index=index, columns=['category', 'stat_key'], values='value',
+                                    aggfunc='first', observed=True)
+    total_wide = values.pivot_table(index=index, columns=['category', 'stat_key'], values='total',
+                                    aggfunc='first', observed=True)
+
+    columns = {}
+    used = set()
+    for category_index, _, stat_key, column, sub_key in PLAYER_STATS_SPEC:
+        location = (PLAYER_STAT_CATEGORIES[category_index], stat_key)
+        source = value_wide if sub_key == 'value' else total_wide
+        columns[column] = source[location] if location in source.columns else pd.Series(dtype='float64')
+        used.add(location)
+
+    for location in value_wide.columns:
+        if location in used:
+            continue
+        column = extra_stat_column(*location)
+        columns[column] = value_wide[location]
+        if location in total_wide.columns and total_wide[location].notna().any():
+            columns[f"{column}_total"] = total_wide[location]
+
+    stats = integral_to_int(pd.DataFrame(columns, index=value_wide.index))
+    return players.merge(stats, left_on=index, right_index=True, how='left')
+
+
+# ============================================================================
+# MIGRATION OF THE EXISTING PER-MATCH CSVS
+# ============================================================================
+
+def csv_value(value, parse=False):
+    """Turn a cell of an existing per-match CSV back into a Python value"""
+    if value == '':
+        return None
+    if parse:
+        return ast.literal_eval(value)
+    return value
+
+
+def migrate_player_csv(csv_path):
+    """
+    Move one per-match CSV's nested 'stats' column into the store
+
+    The store rows are written first; only then is the CSV rewritten without
+    the 'stats' column. Returns the number of stat values written, or None if
+    the file has no 'stats' column.
+    """
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    if not rows or 'stats' not in rows[0]:
+        return None
+
+    first = rows[0]
+    match_info = {'matchId': first['matchId'], 'matchRound': first['matchRound'],
+                  'matchDate': first['matchDate']}
+    players = []
+    for row in rows:
+        player = {column: csv_value(row.get(column, '')) for column in
+                  ['name', 'id', 'optaId', 'teamId', 'teamName', 'shirtNumber', 'usualPosition', 'positionId']}
+        player['isGoalkeeper'] = row.get('isGoalkeeper') == 'True'
+        player['stats'] = csv_value(row['stats'], parse=True)
+        players.append(player)
+
+    written = save_player_store_rows(player_store_rows(match_info, players))
+
+    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    write_frame(df.drop(columns=['stats']), csv_path)
+    return written
+
+
+def migrate_player_csvs(csv_dir=PLAYER_CSV_DIR):
+    """Migrate every per-match player stats CSV that still has the nested 'stats' column"""
+    csv_paths = sorted(Path(csv_dir).glob('*.csv'))
+    size_before = sum(path.stat().st_size for path in csv_paths)
+
+    migrated = 0
+    for csv_path in csv_paths:
+        try:
+            if migrate_player_csv(csv_path) is not None:
+                migrated += 1
+        except Exception as e:
+            print(f"Error migrating {csv_path.name}: {e}")
+
+    size_after = sum(path.stat().st_size for path in csv_paths)
+    store_size = sum(path.stat().st_size for path in [PLAYERS_FILE, VALUES_FILE] if path.exists())
+    print(f"\nMigrated {migrated} of {len(csv_paths)} files")
+    print(f"Per-match CSVs: {size_before / 1024 / 1024:.1f} MB -> {size_after / 1024 / 1024:.1f} MB")
+    print(f"Store: {store_size / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob long-format player stat store')
+    parser.add_argument('--migrate', action='store_true',
+                        help="Move the nested 'stats' column of the per-match CSVs into the store")
+    parser.add_argument('--view', metavar='MATCH_ID', type=int,
+                        help='Print the wide player stats view of one match')
+    args = parser.parse_args()
+
+    if args.migrate:
+        migrate_player_csvs()
+    elif args.view:
+        view = wide_player_stats([args.view])
+        print(view.to_string())
+    else:
+        print(f"{len(stored_match_ids())} matches in {STORE_DIR}")
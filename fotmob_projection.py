@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+FotMob Season Projection
+Monte Carlo projection of a season from the league table as it stands. Each
+team gets an attack and a defence rating from its xG for and against per
+match (shrunk towards the league average), every remaining fixture of the
+double round-robin gets Poisson goal rates from them, and the rest of the
+season is simulated many times: all remaining fixtures of a batch of
+seasons are drawn as one array, batches run across a process pool, and the
+final tables give each team's chances of the title, automatic promotion,
+the play-offs and relegation.
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fotmob_standings import TEAM_MATCHES_FILE, TEAM_MATCH_COLUMNS, league_table, read_table
+
+
+SIMULATIONS = 100_000
+BATCH_SIZE = 5_000
+# Championship zones, by final position
+PROMOTION = (1, 2)
+PLAYOFFS = (3, 6)
+RELEGATION = 3
+# A team's ratings count as many league-average matches on top of its own
+PRIOR_MATCHES = 5
+# Goal rates when no match of the season has been played yet
+HOME_GOALS = 1.4
+AWAY_GOALS = 1.1
+
+
+def team_ratings(played, team_ids):
+    """
+    Attack and defence ratings of every team (1.0 = league average) from xG per match
+
+    played are the team_matches rows counted so far. The ratings are
+    shrunk towards 1.0 by PRIOR_MATCHES league-average matches.
+    """
+    if played.empty:
+        return np.ones(len(team_ids)), np.ones(len(team_ids))
+    per_team = played.groupby('teamId')[['xGFor', 'xGAgainst']].agg(['sum', 'size'])
+    league_xg = played['xGFor'].mean()
+    attack, defence = [], []
+    for team_id in team_ids:
+        if team_id in per_team.index:
+            xg_for, matches = per_team.loc[team_id, ('xGFor', 'sum')], per_team.loc[team_id, ('xGFor', 'size')]
+            xg_against = per_team.loc[team_id, ('xGAgainst', 'sum')]
+        else:
+            xg_for = xg_against = matches = 0
+        attack.append((xg_for + PRIOR_MATCHES * league_xg) / (matches + PRIOR_MATCHES) / league_xg)
+        defence.append((xg_against + PRIOR_MATCHES * league_xg) / (matches + PRIOR_MATCHES) / league_xg)
+    return np.array(attack), np.array(defence)
+
+
+def remaining_fixtures(played, team_ids):
+    """(home, away) team positions of the double round-robin fixtures not played yet"""
+    position = {team_id: i for i, team_id in enumerate(team_ids)}
+    done = set(zip(played.loc[played['isHome'], 'teamId'], played.loc[played['isHome'], 'opponentId']))
+    fixtures = [(position[home], position[away]) for home in team_ids for away in team_ids
+                if home != away and (home, away) not in done]
+    fixtures = np.array(fixtures, dtype=np.int64).reshape(-1, 2)
+    return fixtures[:, 0], fixtures[:, 1]
+
+
+def simulate_batch(simulations, seed, home, away, home_rates, away_rates, points, goal_difference, goals_for):
+    """
+    Play the remaining fixtures of `simulations` seasons and count the final positions
+
+    Goals of every fixture of every season are drawn as one
+    (simulations x fixtures) array. Returns (position counts as a teams x
+    teams matrix, summed final points per team).
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = len(points)
+    home_goals = rng.poisson(home_rates, size=(simulations, len(home))).astype(np.int32)
+    away_goals = rng.poisson(away_rates, size=(simulations, len(away))).astype(np.int32)
+
+    home_points = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    away_points = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    final_points = np.tile(points, (simulations, 1)).astype(np.int64)
+    final_difference = np.tile(goal_difference, (simulations, 1)).astype(np.int64)
+    final_goals = np.tile(goals_for, (simulations, 1)).astype(np.int64)
+    # Per-team sums over the fixture columns, as products with a fixtures x teams one-hot matrix
+    for teams, points_won, scored, conceded in [(home, home_points, home_goals, away_goals),
+                                                (away, away_points, away_goals, home_goals)]:
+        one_hot = np.zeros((len(teams), n_teams))
+        one_hot[np.arange(len(teams)), teams] = 1
+        final_points += np.rint(points_won @ one_hot).astype(np.int64)
+        final_difference += np.rint((scored - conceded) @ one_hot).astype(np.int64)
+        final_goals += np.rint(scored @ one_hot).astype(np.int64)
+
+    # Points, then goal difference, then goals scored; ties after that are broken at random
+    key = (final_points * 1_000_000 + (final_difference + 500) * 1_000 + final_goals) * n_teams \
+        + rng.permuted(np.tile(np.arange(n_teams), (simulations, 1)), axis=1)
+    order = np.argsort(-key, axis=1)
+    cells = order * n_teams + np.arange(n_teams)
+    counts = np.bincount(cells.ravel(), minlength=n_teams * n_teams).reshape(n_teams, n_teams)
+    return counts, final_points.sum(axis=0)
+
+
+def simulate_season(home, away, home_rates, away_rates, points, goal_difference, goals_for,
+                    simulations=SIMULATIONS, workers=None, seed=None):
+    """
+    Simulate the rest of a season `simulations` times across a process pool
+
+    Returns (position probabilities as a teams x positions matrix, mean
+    final points per team). Batches get independent random streams spawned
+    from one seed, so a seed gives the same projection whatever the number
+    of workers.
+    """
+    batches = [BATCH_SIZE] * (simulations // BATCH_SIZE)
+    if simulations % BATCH_SIZE:
+        batches.append(simulations % BATCH_SIZE)
+    seeds = np.random.SeedSequence(seed).spawn(len(batches))
+    arrays = (home, away, home_rates, away_rates, points, goal_difference, goals_for)
+
+    n_teams = len(points)
+    counts = np.zeros((n_teams, n_teams), dtype=np.int64)
+    total_points = np.zeros(n_teams, dtype=np.int64)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = (simulate_batch(size, batch_seed, *arrays) for size, batch_seed in zip(batches, seeds))
+        for batch_counts, batch_points in results:
+            counts += batch_counts
+            total_points += batch_points
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(simulate_batch, size, batch_seed, *arrays)
+                       for size, batch_seed in zip(batches, seeds)]
+            for future in futures:
+                batch_counts, batch_points = future.result()
+                counts += batch_counts
+                total_points += batch_points
+    return counts / simulations, total_points / simulations
+
+
+def project_season(season, as_of_round=None, simulations=SIMULATIONS, workers=None, seed=None):
+    """
+    Project a season from its table after a round (default: the latest round)
+
+    Returns one row per team, in the current table's order, with the mean
+    final points and position and the probabilities of each zone. Round 0
+    projects the whole season from an empty table, with equal teams.
+    """
+    table = league_table(season, 1 if as_of_round == 0 else as_of_round)
+    if table.empty:
+        raise ValueError(f"No standings for season {season}" +
+                         (f" after round {as_of_round}" if as_of_round is not None else ''))
+    if as_of_round == 0:
+        table = table.sort_values('teamName').reset_index(drop=True)
+        table[['round', 'played', 'points', 'goalDifference', 'goalsFor']] = 0
+        table['position'] = np.arange(1, len(table) + 1)
+    as_of_round = int(table['round'].iloc[0])
+    team_matches = read_table(TEAM_MATCHES_FILE, TEAM_MATCH_COLUMNS)
+    played = team_matches[(team_matches['season'] == season) & (team_matches['round'] <= as_of_round)]
+
+    team_ids = table['teamId'].tolist()
+    home, away = remaining_fixtures(played, team_ids)
+    attack, defence = team_ratings(played, team_ids)
+    home_played = played[played['isHome']]
+    home_goals = home_played['goalsFor'].mean() if len(home_played) else HOME_GOALS
+    away_goals = home_played['goalsAgainst'].mean() if len(home_played) else AWAY_GOALS
+    home_rates = home_goals * attack[home] * defence[away]
+    away_rates = away_goals * attack[away] * defence[home]
+
+    probabilities, mean_points = simulate_season(
+        home, away, home_rates, away_rates, table['points'].to_numpy(), table['goalDifference'].to_numpy(),
+        table['goalsFor'].to_numpy(), simulations, workers, seed)
+
+    n_teams = len(team_ids)
+    positions = np.arange(1, n_teams + 1)
+    projection = table[['teamId', 'teamName', 'position', 'played', 'points']].copy()
+    projection.insert(0, 'asOfRound', as_of_round)
+    projection.insert(0, 'season', season)
+    projection['attack'] = attack.round(3)
+    projection['defence'] = defence.round(3)
+    projection['remaining'] = np.bincount(np.concatenate([home, away]), minlength=n_teams)
+    projection['meanPoints'] = mean_points.round(1)
+    projection['meanPosition'] = (probabilities @ positions).round(2)
+    projection['pTitle'] = probabilities[:, 0].round(4)
+    projection['pPromotion'] = probabilities[:, PROMOTION[0] - 1:PROMOTION[1]].sum(axis=1).round(4)
+    projection['pPlayoffs'] = probabilities[:, PLAYOFFS[0] - 1:PLAYOFFS[1]].sum(axis=1).round(4)
+    projection['pRelegation'] = probabilities[:, n_teams - RELEGATION:].sum(axis=1).round(4)
+    return projection
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob Monte Carlo season projection')
+    parser.add_argument('season', help='Season to project, e.g. 2025-2026')
+    parser.add_argument('--round', type=int, help='Project from the table after this round (default: latest)')
+    parser.add_argument('--simulations', type=int, default=SIMULATIONS)
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--seed', type=int, help='Seed for a reproducible projection')
+    parser.add_argument('--output', help='Also save the projection to this CSV')
+    args = parser.parse_args()
+
+    start = time.time()
+    projection = project_season(args.season, args.round, args.simulations, args.workers, args.seed)
+    print(f"{args.simulations} simulations of {projection['remaining'].sum() // 2} remaining fixtures "
+          f"in {time.time() - start:.1f}s")
+    columns = ['position', 'teamName', 'points', 'meanPoints', 'meanPosition',
+               'pTitle', 'pPromotion', 'pPlayoffs', 'pRelegation']
+    print(projection[columns].to_string(index=False))
+    if args.output:
+        projection.to_csv(args.output, index=False)
+        print(f"Projection saved to: {args.output}")
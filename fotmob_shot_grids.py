@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+FotMob Shot Grids
+Shot locations binned on a pitch grid: for every season and team, player
+and situation, three 2D histograms (shots, xG, goals) over the FotMob pitch
+(x 0-105 towards the goal attacked, y 0-68). All grids of a grid size are
+computed in one vectorized pass and cached in shots/grids/grid_<nx>x<ny>.npz
+(built on first use); writing a match's shots CSV adds (and, for a
+re-ingested match, first subtracts) only that match's shots, so dashboards
+read a grid instead of binning thousands of shot rows on every render.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fotmob_csv import locked, replace_atomically
+from fotmob_dataset import season_of
+
+
+BASE_DIR = Path(__file__).resolve().parent
+SHOTS_CSV_DIR = BASE_DIR / 'shots' / 'csv'
+GRIDS_DIR = BASE_DIR / 'shots' / 'grids'
+
+PITCH_LENGTH = 105.0
+PITCH_WIDTH = 68.0
+DEFAULT_BINS = (21, 17)  # 5m x 4m cells
+LAYERS = ['shots', 'xG', 'goals']
+# Grid level -> the shots column it groups by, and the column its label comes from
+LEVELS = {
+    'team': ('teamId', 'teamName'),
+    'player': ('playerId', 'playerName'),
+    'situation': ('situation', 'situation'),
+}
+TOLERANCE = 1e-6
+
+
+def grid_path(bins=DEFAULT_BINS):
+    return GRIDS_DIR / f"grid_{bins[0]}x{bins[1]}.npz"
+
+
+def cached_bins():
+    """The grid sizes that have a cache file"""
+    sizes = []
+    for path in sorted(GRIDS_DIR.glob('grid_*x*.npz')):
+        nx, _, ny = path.stem[len('grid_'):].partition('x')
+        sizes.append((int(nx), int(ny)))
+    return sizes
+
+
+def shot_rows(df):
+    """
+    The shots that go on the grids, with their season, bin weights and labels
+
+    Own goals are left out: they are recorded at the scoring team's own end
+    and carry no xG.
+    """
+    df = df[~df['isOwnGoal'].astype(str).eq('True')].dropna(subset=['x', 'y'])
+    team_names = np.where(df['teamId'] == df['homeTeamId'], df['homeTeamName'], df['awayTeamName'])
+    return pd.DataFrame({
+        'season': df['matchDate'].map(lambda date: season_of(str(date))),
+        'matchId': df['matchId'].astype('int64'),
+        'teamId': df['teamId'].astype('int64').astype(str),
+        'teamName': team_names,
+        'playerId': df['playerId'].astype('Int64').astype(str),
+        'playerName': df['playerName'].astype(str),
+        'situation': df['situation'].astype(str),
+        'x': df['x'].astype(float),
+        'y': df['y'].astype(float),
+        'xG': pd.to_numeric(df['expectedGoals'], errors='coerce').fillna(0.0),
+        'goal': (df['eventType'] == 'Goal').astype(float),
+    })
+
+
+def bin_shots(shots, bins=DEFAULT_BINS):
+    """
+    Bin shot rows into every grid at once
+
+    Returns (keys, labels, grids): keys are 'season|level|key' strings,
+    grids a float array of shape (len(keys), len(LAYERS), nx, ny). Each shot
+    lands in one cell of its team, player and situation grid; one bincount
+    per layer fills all of them.
+    """
+    nx, ny = bins
+    ix = np.clip((shots['x'].to_numpy() / PITCH_LENGTH * nx).astype(np.int64), 0, nx - 1)
+    iy = np.clip((shots['y'].to_numpy() / PITCH_WIDTH * ny).astype(np.int64), 0, ny - 1)
+    cells = ix * ny + iy
+
+    seasons = shots['season'].to_numpy(dtype=str)
+    keys = np.concatenate([np.char.add(np.char.add(seasons, f"|{level}|"), shots[column].to_numpy(dtype=str))
+                           for level, (column, _) in LEVELS.items()])
+    labels = np.concatenate([shots[label].to_numpy(dtype=str) for _, label in LEVELS.values()])
+    codes, unique_keys = pd.factorize(keys)
+    flat = codes * (nx * ny) + np.tile(cells, len(LEVELS))
+    size = len(unique_keys) * nx * ny
+
+    weights = [np.ones(len(shots)), shots['xG'].to_numpy(), shots['goal'].to_numpy()]
+    grids = np.stack([np.bincount(flat, weights=np.tile(weight, len(LEVELS)), minlength=size)
+                      for weight in weights])
+    grids = grids.reshape(len(LAYERS), len(unique_keys), nx, ny).transpose(1, 0, 2, 3)
+
+    # The label of a key is the one of its last shot
+    last = pd.Series(labels).groupby(codes).last()
+    return np.asarray(unique_keys, dtype=str), last.to_numpy(dtype=str), grids
+
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+def read_grids(bins=DEFAULT_BINS):
+    """Load a grid size's cache as a dict (keys, labels, grids, matches), or None"""
+    path = grid_path(bins)
+    if not path.exists():
+        return None
+    with np.load(path) as data:
+        return {name: data[name] for name in ['keys', 'labels', 'grids', 'matches']}
+
+
+def save_grids(cache, bins=DEFAULT_BINS):
+    """Write a grid size's cache through a temp file and an atomic rename"""
+    path = grid_path(bins)
+    GRIDS_DIR.mkdir(parents=True, exist_ok=True)
+    order = np.argsort(cache['keys'], kind='stable')
+    replace_atomically(path, lambda f: np.savez_compressed(
+        f, keys=cache['keys'][order], labels=cache['labels'][order],
+        grids=cache['grids'][order], matches=np.sort(cache['matches'])), binary=True)
+
+
+def add_grids(cache, keys, labels, grids, sign=1):
+    """Add (or with sign=-1 subtract) binned grids to a cache, dropping grids that fall back to zero"""
+    positions = {key: i for i, key in enumerate(cache['keys'])}
+    new_keys = [key for key in keys if key not in positions]
+    if new_keys:
+        shape = (len(new_keys),) + cache['grids'].shape[1:]
+        cache['keys'] = np.concatenate([cache['keys'], np.asarray(new_keys, dtype=str)])
+        cache['labels'] = np.concatenate([cache['labels'], np.asarray([''] * len(new_keys), dtype=str)])
+        cache['grids'] = np.concatenate([cache['grids'], np.zeros(shape)])
+        positions.update({key: len(positions) + i for i, key in enumerate(new_keys)})
+    index = np.array([positions[key] for key in keys], dtype=np.int64)
+    np.add.at(cache['grids'], index, sign * grids)
+    cache['grids'] = cache['grids'].round(9)
+    if sign > 0:
+        cache['labels'] = cache['labels'].astype(object)
+        cache['labels'][index] = labels
+        cache['labels'] = cache['labels'].astype(str)
+    keep = np.abs(cache['grids']).reshape(len(cache['keys']), -1).max(axis=1) > TOLERANCE
+    for name in ['keys', 'labels', 'grids']:
+        cache[name] = cache[name][keep]
+    return cache
+
+
+def read_shots(csv_dir=SHOTS_CSV_DIR):
+    """Every per-match shots CSV as one frame"""
+    frames = []
+    for csv_path in sorted(Path(csv_dir).glob('*.csv')):
+        try:
+            df = pd.read_csv(csv_path)
+        except Exception as e:
+            print(f"Error reading {csv_path.name}: {e}")
+            continue
+        if not df.empty:
+            frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def compute_grids(df, bins=DEFAULT_BINS):
+    """A full cache computed from shot rows"""
+    shots = shot_rows(df)
+    keys, labels, grids = bin_shots(shots, bins)
+    return {'keys': keys, 'labels': labels, 'grids': grids,
+            'matches': np.unique(df['matchId'].astype('int64').to_numpy())}
+
+
+def rebuild_grids(bins=DEFAULT_BINS):
+    """Bin every per-match shots CSV and save the cache of a grid size"""
+    with locked(grid_path(bins)):
+        cache = compute_grids(read_shots(), bins)
+        save_grids(cache, bins)
+    print(f"Shot grids {bins[0]}x{bins[1]} rebuilt from {len(cache['matches'])} matches: "
+          f"{len(cache['keys'])} grids")
+
+
+def update_shot_grids(df, previous=None):
+    """
+    Add one match's shots to every cached grid size (and the default one)
+
+    previous is the match's shots CSV as it was before this write (see
+    fotmob_aggregates.previous_rows); if the match was already binned its
+    old shots are subtracted first. Without a cache, or if a binned match's
+    old rows are gone, the grid size is rebuilt from the CSVs instead.
+    """
+    if df is None or df.empty:
+        return
+    match_id = int(df['matchId'].iloc[0])
+    for bins in sorted(set(cached_bins()) | {DEFAULT_BINS}):
+        with locked(grid_path(bins)):
+            cache = read_grids(bins)
+            if cache is None:
+                rebuild_grids(bins)
+                continue
+            if match_id in set(cache['matches'].tolist()):
+                if previous is None or previous.empty or int(previous['matchId'].iloc[0]) != match_id:
+                    print(f"Shot grids: old rows of match {match_id} not found, rebuilding")
+                    rebuild_grids(bins)
+                    continue
+                cache = add_grids(cache, *bin_shots(shot_rows(previous), bins), sign=-1)
+                cache['matches'] = cache['matches'][cache['matches'] != match_id]
+            cache = add_grids(cache, *bin_shots(shot_rows(df), bins))
+            cache['matches'] = np.append(cache['matches'], match_id)
+            save_grids(cache, bins)
+    print(f"Shot grids updated with match {match_id}")
+
+
+def verify_grids(bins=DEFAULT_BINS):
+    """Check a cached grid size against a full recompute; returns True if they agree"""
+    cache = read_grids(bins)
+    if cache is None:
+        print(f"No {bins[0]}x{bins[1]} shot grids to verify")
+        return False
+    expected = compute_grids(read_shots(), bins)
+    order = np.argsort(expected['keys'], kind='stable')
+    same = (np.array_equal(cache['keys'], expected['keys'][order])
+            and np.array_equal(np.sort(cache['matches']), expected['matches'])
+            and np.allclose(cache['grids'], expected['grids'][order], atol=TOLERANCE))
+    if same:
+        print(f"Shot grids {bins[0]}x{bins[1]} match a full recompute ({len(cache['keys'])} grids)")
+    else:
+        print(f"Shot grids {bins[0]}x{bins[1]} differ from a full recompute")
+    return same
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def cached_grids(bins=DEFAULT_BINS):
+    """Load a grid size's cache, building it first if it doesn't exist yet"""
+    cache = read_grids(bins)
+    if cache is None:
+        rebuild_grids(bins)
+        cache = read_grids(bins)
+    return cache
+
+
+def shot_grid(level, key, season=None, layer='xG', bins=DEFAULT_BINS):
+    """
+    One precomputed grid as an (nx, ny) array, summed over seasons unless one is given
+
+    level is 'team' (key: teamId), 'player' (playerId) or 'situation' (e.g.
+    'FromCorner'); layer is one of LAYERS. Rows run along the pitch length.
+    """
+    cache = cached_grids(bins)
+    parts = np.char.partition(cache['keys'], '|')
+    seasons, rest = parts[:, 0], parts[:, 2]
+    selected = rest == f"{level}|{key}"
+    if season is not None:
+        selected &= seasons == season
+    return cache['grids'][selected, LAYERS.index(layer)].sum(axis=0)
+
+
+def grid_frame(grid):
+    """A grid as a DataFrame indexed by cell centres: x along the rows, y along the columns"""
+    nx, ny = grid.shape
+    x_centres = (np.arange(nx) + 0.5) * PITCH_LENGTH / nx
+    y_centres = (np.arange(ny) + 0.5) * PITCH_WIDTH / ny
+    return pd.DataFrame(grid, index=pd.Index(x_centres.round(2), name='x'),
+                        columns=pd.Index(y_centres.round(2), name='y'))
+
+
+def grid_labels(level, season=None, bins=DEFAULT_BINS):
+    """The keys of a level with their labels, e.g. playerId -> player name"""
+    cache = cached_grids(bins)
+    parts = np.char.partition(cache['keys'], '|')
+    rest = np.char.partition(parts[:, 2], '|')
+    selected = rest[:, 0] == level
+    if season is not None:
+        selected &= parts[:, 0] == season
+    return dict(zip(rest[selected, 2], cache['labels'][selected]))
+
+
+def print_heatmap(grid, attacking_half=True):
+    """Print a grid as a text heatmap, goal at the top"""
+    shades = ' .:-=+*#%@'
+    if attacking_half:
+        grid = grid[grid.shape[0] // 2:]
+    peak = grid.max() or 1
+    for row in grid[::-1]:
+        print(''.join(shades[int(round(value / peak * (len(shades) - 1)))] * 2 for value in row))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob shot location grids')
+    parser.add_argument('--rebuild', action='store_true', help='Bin every shots CSV and save the grids')
+    parser.add_argument('--verify', action='store_true', help='Check the grids against a full recompute')
+    parser.add_argument('--bins', type=int, nargs=2, default=DEFAULT_BINS, metavar=('NX', 'NY'),
+                        help='Cells along the pitch length and width')
+    parser.add_argument('--level', choices=list(LEVELS), help='Print the heatmap of a team, player or situation')
+    parser.add_argument('--key', help='teamId, playerId or situation of the heatmap')
+    parser.add_argument('--season', help='Only this season, e.g. 2025-2026')
+    parser.add_argument('--layer', choices=LAYERS, default='xG')
+    args = parser.parse_args()
+    bins = tuple(args.bins)
+
+    if args.rebuild:
+        rebuild_grids(bins)
+    if args.verify:
+        verify_grids(bins)
+    if args.level and args.key:
+        grid = shot_grid(args.level, args.key, args.season, args.layer, bins)
+        label = grid_labels(args.level, args.season, bins).get(args.key, args.key)
+        print(f"{label}: {grid.sum():.2f} {args.layer}")
+        print_heatmap(grid)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+FotMob Standings
+A materialized league table with rolling team form, built from the match
+stats. Every match adds one row per team to team_matches.csv; snapshots.csv
+holds, for every season, round and team, the table as it stood after that
+round (played, W/D/L, goals, points, xG for/against, position) plus the
+team's last-N form. Ingesting a match only recomputes its two teams from the
+match's round on and re-ranks the rounds it changed, so the table as of any
+round is a lookup instead of a replay of the season.
+"""
+
+import argparse
+from pathlib import Path
+
+import pandas as pd
+
+from fotmob_csv import locked, write_frame
+from fotmob_dataset import season_of
+from fotmob_stats import resolve_match_stats
+
+
+BASE_DIR = Path(__file__).resolve().parent
+MATCH_STATS_CSV = BASE_DIR / 'matchStats' / 'csv' / 'fotmob_match_stats.csv'
+STANDINGS_DIR = BASE_DIR / 'matchStats' / 'standings'
+TEAM_MATCHES_FILE = STANDINGS_DIR / 'team_matches.csv'
+SNAPSHOTS_FILE = STANDINGS_DIR / 'snapshots.csv'
+
+WINDOW = 5
+POINTS = {'W': 3, 'D': 1, 'L': 0}
+TEAM_MATCH_COLUMNS = ['season', 'round', 'matchId', 'teamId', 'teamName', 'isHome', 'opponentId',
+                      'goalsFor', 'goalsAgainst', 'xGFor', 'xGAgainst', 'result', 'points']
+TOTAL_FIELDS = ['played', 'won', 'drawn', 'lost', 'goalsFor', 'goalsAgainst', 'points', 'xGFor', 'xGAgainst']
+ROLLING_FIELDS = ['points', 'goalsFor', 'goalsAgainst', 'xGFor', 'xGAgainst']
+SNAPSHOT_COLUMNS = (['season', 'round', 'teamId', 'teamName', 'position'] + TOTAL_FIELDS[:6]
+                    + ['goalDifference', 'points', 'xGFor', 'xGAgainst', 'form']
+                    + [f"last{WINDOW}_{field}" for field in ROLLING_FIELDS])
+RESULT_FIELDS = {'W': 'won', 'D': 'drawn', 'L': 'lost'}
+
+
+def team_match_rows(season, match_round, match_id, home, away, home_goals, away_goals, xg_home, xg_away):
+    """
+    The two team rows of one finished match; home/away are (teamId, teamName)
+
+    Returns [] when the match has no score yet.
+    """
+    if home_goals is None or away_goals is None or pd.isna(home_goals) or pd.isna(away_goals):
+        return []
+    home_goals, away_goals = int(home_goals), int(away_goals)
+    xg_home = pd.to_numeric(xg_home, errors='coerce')
+    xg_away = pd.to_numeric(xg_away, errors='coerce')
+    rows = []
+    for (team_id, team_name), (opponent_id, _), is_home, goals_for, goals_against, xg_for, xg_against in [
+        (home, away, True, home_goals, away_goals, xg_home, xg_away),
+        (away, home, False, away_goals, home_goals, xg_away, xg_home),
+    ]:
+        result = 'W' if goals_for > goals_against else 'D' if goals_for == goals_against else 'L'
+        rows.append({'season': season, 'round': int(match_round), 'matchId': int(match_id),
+                     'teamId': int(team_id), 'teamName': team_name, 'isHome': is_home,
+                     'opponentId': int(opponent_id), 'goalsFor': goals_for, 'goalsAgainst': goals_against,
+                     'xGFor': xg_for, 'xGAgainst': xg_against, 'result': result, 'points': POINTS[result]})
+    return rows
+
+
+def build_standings_rows(json_data):
+    """Build the team rows of one match page"""
+    general = json_data['props']['pageProps']['general']
+    teams = json_data['props']['pageProps']['header']['teams']
+    stats = resolve_match_stats(json_data)
+    return team_match_rows(season_of(general['matchTimeUTCDate']), general['matchRound'], general['matchId'],
+                           (general['homeTeam']['id'], general['homeTeam']['name']),
+                           (general['awayTeam']['id'], general['awayTeam']['name']),
+                           teams[0]['score'], teams[1]['score'], stats.get('xG_home'), stats.get('xG_away'))
+
+
+# ============================================================================
+# SNAPSHOTS
+# ============================================================================
+
+def team_snapshots(season, team_id, team_name, matches, first_round, last_round, start=None):
+    """
+    Snapshot rows of one team for rounds first_round..last_round
+
+    matches are the team's team_matches rows of the season; start is its
+    snapshot after first_round - 1 (None for the start of the season).
+    """
+    totals = {field: (start[field] if start is not None else 0) for field in TOTAL_FIELDS}
+    matches = matches.sort_values(['round', 'matchId'])
+    rows = []
+    for match_round in range(first_round, last_round + 1):
+        for match in matches[matches['round'] == match_round].itertuples():
+            totals['played'] += 1
+            totals[RESULT_FIELDS[match.result]] += 1
+            for field in ['goalsFor', 'goalsAgainst', 'points']:
+                totals[field] += getattr(match, field)
+            for field in ['xGFor', 'xGAgainst']:
+                value = getattr(match, field)
+                totals[field] += 0 if pd.isna(value) else value
+        recent = matches[matches['round'] <= match_round].tail(WINDOW)
+        row = {'season': season, 'round': match_round, 'teamId': team_id, 'teamName': team_name, 'position': 0}
+        row.update(totals)
+        row['xGFor'] = round(totals['xGFor'], 2)
+        row['xGAgainst'] = round(totals['xGAgainst'], 2)
+        row['goalDifference'] = totals['goalsFor'] - totals['goalsAgainst']
+        row['form'] = ''.join(recent['result'])
+        for field in ROLLING_FIELDS:
+            row[f"last{WINDOW}_{field}"] = round(float(recent[field].sum()), 2)
+        rows.append(row)
+    return rows
+
+
+def rank(snapshots):
+    """Set the league position of every row, per season and round"""
+    snapshots = snapshots.sort_values(['season', 'round', 'points', 'goalDifference', 'goalsFor', 'teamName'],
+                                      ascending=[True, True, False, False, False, True])
+    snapshots['position'] = snapshots.groupby(['season', 'round']).cumcount() + 1
+    return snapshots.reset_index(drop=True)
+
+
+def season_snapshots(team_matches):
+    """Compute every snapshot row from the team matches, from scratch"""
+    rows = []
+    for season, season_matches in team_matches.groupby('season'):
+        last_round = int(season_matches['round'].max())
+        for team_id, matches in season_matches.groupby('teamId'):
+            rows += team_snapshots(season, int(team_id), matches['teamName'].iloc[-1], matches, 1, last_round)
+    return rank(pd.DataFrame(rows, columns=SNAPSHOT_COLUMNS))
+
+
+def read_table(path, columns):
+    """Load a standings table, or an empty one"""
+    if not path.exists():
+        return pd.DataFrame(columns=columns)
+    return pd.read_csv(path, keep_default_na=False, na_values=[''])
+
+
+def save_tables(team_matches, snapshots):
+    STANDINGS_DIR.mkdir(parents=True, exist_ok=True)
+    write_frame(team_matches.sort_values(['season', 'round', 'matchId', 'isHome'],
+                                         ascending=[True, True, True, False])[TEAM_MATCH_COLUMNS],
+                TEAM_MATCHES_FILE)
+    write_frame(snapshots[SNAPSHOT_COLUMNS], SNAPSHOTS_FILE)
+
+
+def save_standings_rows(rows):
+    """
+    Add one match's team rows to the standings, replacing the match if it is already there
+
+    Only the match's two teams (plus the teams of an old version of the
+    match) are recomputed, from the match's round on (or from the first
+    round the snapshots don't reach yet, if that is earlier); the other
+    teams only get their snapshots carried into new rounds. Returns the
+    number of snapshot rows rewritten.
+    """
+    if not rows:
+        return 0
+    new = pd.DataFrame(rows, columns=TEAM_MATCH_COLUMNS)
+    match_id = int(new['matchId'].iloc[0])
+    season = new['season'].iloc[0]
+
+    with locked(SNAPSHOTS_FILE):
+        if not TEAM_MATCHES_FILE.exists() or not SNAPSHOTS_FILE.exists():
+            rebuild_standings()
+        team_matches = read_table(TEAM_MATCHES_FILE, TEAM_MATCH_COLUMNS)
+        snapshots = read_table(SNAPSHOTS_FILE, SNAPSHOT_COLUMNS)
+
+        old = team_matches[team_matches['matchId'] == match_id]
+        if len(old) == len(new) and old[TEAM_MATCH_COLUMNS].sort_values('teamId').astype(str).to_numpy().tolist() \
+                == new.sort_values('teamId').astype(str).to_numpy().tolist():
+            print(f"Standings: match {match_id} unchanged")
+            return 0
+        team_matches = pd.concat([team_matches[team_matches['matchId'] != match_id], new], ignore_index=True)
+
+        season_matches = team_matches[team_matches['season'] == season]
+        season_snaps = snapshots[snapshots['season'] == season]
+        last_round = int(season_matches['round'].max())
+        old_last_round = int(season_snaps['round'].max()) if len(season_snaps) else 0
+        from_round = int(min(pd.concat([old['round'], new['round']])))
+        affected = set(new['teamId']) | set(old['teamId'])
+
+        changed = []
+        for team_id in set(season_matches['teamId']) | affected:
+            matches = season_matches[season_matches['teamId'] == team_id]
+            team_snaps = season_snaps[season_snaps['teamId'] == team_id].set_index('round')
+            if matches.empty:
+                continue
+            team_name = matches.sort_values('round')['teamName'].iloc[-1]
+            if team_id in affected or team_snaps.empty:
+                # A match from beyond the last snapshot round also fills the rounds in between
+                first_round = min(from_round, old_last_round + 1) if len(team_snaps) else 1
+            elif last_round > old_last_round:
+                # No new matches: the last snapshot is carried into the new rounds
+                first_round = old_last_round + 1
+            else:
+                continue
+            earlier = team_snaps[team_snaps.index <= first_round - 1].sort_index()
+            start = earlier.iloc[-1] if len(earlier) else None
+            changed += team_snapshots(season, int(team_id), team_name, matches, first_round, last_round, start)
+
+        changed = pd.DataFrame(changed, columns=SNAPSHOT_COLUMNS)
+        keys = set(zip(changed['teamId'], changed['round']))
+        # A Series, so an empty season (its first match) still selects rows rather than columns
+        kept = pd.Series([(team_id, match_round) not in keys for team_id, match_round
+                          in zip(season_snaps['teamId'], season_snaps['round'])], index=season_snaps.index, dtype=bool)
+        kept_season = season_snaps[kept]
+        kept_season = kept_season[kept_season['round'] <= last_round]
+        # Positions change in every round from the first one touched
+        season_snaps = pd.concat([kept_season, changed], ignore_index=True)
+        rerank = season_snaps['round'] >= min(from_round, old_last_round + 1)
+        season_snaps = pd.concat([season_snaps[~rerank], rank(season_snaps[rerank])], ignore_index=True)
+
+        snapshots = pd.concat([snapshots[snapshots['season'] != season], season_snaps], ignore_index=True)
+        snapshots = snapshots.sort_values(['season', 'round', 'position']).reset_index(drop=True)
+        save_tables(team_matches, snapshots)
+    print(f"Standings updated with match {match_id}: {len(changed)} snapshot rows")
+    return len(changed)
+
+
+# ============================================================================
+# FULL REBUILD AND VERIFICATION
+# ============================================================================
+
+def team_matches_from_csv():
+    """Every team row of fotmob_match_stats.csv; seasons come from the file catalog"""
+    from fotmob_catalog import match_seasons
+
+    seasons = match_seasons()
+    df = pd.read_csv(MATCH_STATS_CSV, usecols=['matchId', 'matchRound', 'homeTeamName', 'homeTeamid',
+                                               'awayTeamName', 'awayTeamid', 'home_goals', 'away_goals',
+                                               'xG_home', 'xG_away'])
+    rows = []
+    missing = 0
+    for match in df.itertuples():
+        season = seasons.get(int(match.matchId))
+        if season is None:
+            missing += 1
+            continue
+        rows += team_match_rows(season, match.matchRound, match.matchId,
+                                (match.homeTeamid, match.homeTeamName), (match.awayTeamid, match.awayTeamName),
+                                match.home_goals, match.away_goals, match.xG_home, match.xG_away)
+    if missing:
+        print(f"Standings: {missing} matches skipped, their season isn't in the catalog")
+    return pd.DataFrame(rows, columns=TEAM_MATCH_COLUMNS)
+
+
+def rebuild_standings():
+    """Rebuild both tables from fotmob_match_stats.csv"""
+    with locked(SNAPSHOTS_FILE):
+        team_matches = team_matches_from_csv()
+        snapshots = season_snapshots(team_matches)
+        save_tables(team_matches, snapshots)
+    print(f"Standings rebuilt: {len(team_matches) // 2} matches, {len(snapshots)} snapshot rows")
+
+
+def verify_standings():
+    """Check the saved snapshots against a recompute from the saved team matches"""
+    team_matches = read_table(TEAM_MATCHES_FILE, TEAM_MATCH_COLUMNS)
+    saved = read_table(SNAPSHOTS_FILE, SNAPSHOT_COLUMNS).sort_values(['season', 'round', 'position'])
+    expected = season_snapshots(team_matches).sort_values(['season', 'round', 'position'])
+    saved = saved.reset_index(drop=True).astype(str)
+    expected = expected[SNAPSHOT_COLUMNS].reset_index(drop=True).astype(str)
+    if saved.shape == expected.shape and (saved == expected).all().all():
+        print(f"Standings snapshots match a full recompute ({len(saved)} rows)")
+        return True
+    print(f"Standings snapshots differ from a full recompute: {saved.shape} vs {expected.shape}")
+    return False
+
+
+# ============================================================================
+# QUERIES
+# ============================================================================
+
+def read_snapshots():
+    """Load the snapshots, building the standings first if they don't exist yet"""
+    if not SNAPSHOTS_FILE.exists():
+        rebuild_standings()
+    return read_table(SNAPSHOTS_FILE, SNAPSHOT_COLUMNS)
+
+
+def league_table(season, as_of_round=None):
+    """The league table of a season after a round (default: the latest round)"""
+    snapshots = read_snapshots()
+    snapshots = snapshots[snapshots['season'] == season]
+    if as_of_round is None:
+        as_of_round = snapshots['round'].max()
+    return snapshots[snapshots['round'] == as_of_round].sort_values('position').reset_index(drop=True)
+
+
+def team_form(season, team_id):
+    """A team's snapshot after every round of a season"""
+    snapshots = read_snapshots()
+    return snapshots[(snapshots['season'] == season) & (snapshots['teamId'] == team_id)] \
+        .sort_values('round').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob league table and team form')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the standings from the match stats')
+    parser.add_argument('--verify', action='store_true', help='Check the snapshots against a full recompute')
+    parser.add_argument('--season', help='Print the league table of a season, e.g. 2025-2026')
+    parser.add_argument('--round', type=int, help='Print the table as it stood after this round')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_standings()
+    if args.verify:
+        verify_standings()
+    if args.season:
+        table = league_table(args.season, args.round)
+        columns = ['position', 'teamName', 'played', 'won', 'drawn', 'lost', 'goalsFor', 'goalsAgainst',
+                   'goalDifference', 'points', 'xGFor', 'xGAgainst', 'form', f"last{WINDOW}_points"]
+        print(table[columns].to_string(index=False))
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+FotMob Stats Extraction
+Finds each team stat in content.stats by its group and stat key/title instead
+of by list position, compiling the column-to-location map once per page layout,
+and flattens the per-player stats in a single walk
+"""
+
+import hashlib
+import re
+import threading
+
+
+# Columns of fotmob_match_stats.csv after the match info columns, in file order:
+# (column prefix, group keys, stat keys, stat title). Alternative keys cover
+# names FotMob has used for the same stat; the title breaks ties when a group
+# repeats a key.
+MATCH_STATS_SPEC = [
+    ('ball_possession', ('top_stats',), ('BallPossesion',), 'Ball possession'),
+    ('big_chances', ('top_stats',), ('big_chance',), 'Big chances'),
+    ('big_chances_missed', ('top_stats',), ('big_chance_missed_title',), 'Big chances missed'),
+    ('fouls', ('top_stats',), ('fouls',), 'Fouls committed'),
+    ('corners', ('top_stats',), ('corners',), 'Corners'),
+    ('total_shots', ('shots',), ('total_shots',), 'Total shots'),
+    ('shots_off_target', ('shots',), ('ShotsOffTarget',), 'Shots off target'),
+    ('shots_on_target', ('shots',), ('ShotsOnTarget',), 'Shots on target'),
+    ('blocked_shots', ('shots',), ('blocked_shots',), 'Blocked shots'),
+    ('hit_woodwork', ('shots',), ('shots_woodwork',), 'Hit woodwork'),
+    ('shots_inside_box', ('shots',), ('shots_inside_box',), 'Shots inside box'),
+    ('shots_outside_box', ('shots',), ('shots_outside_box',), 'Shots outside box'),
+    ('xG', ('expected_goals',), ('expected_goals',), 'Expected goals (xG)'),
+    ('xG_open_play', ('expected_goals',), ('expected_goals_open_play',), 'xG open play'),
+    ('xG_set_play', ('expected_goals',), ('expected_goals_set_play',), 'xG set play'),
+    ('xG_non_penalty', ('expected_goals',), ('expected_goals_non_penalty',), 'xG non-penalty'),
+    ('xGOT', ('expected_goals',), ('expected_goals_on_target',), 'xG on target (xGOT)'),
+    ('passes', ('passes',), ('passes',), 'Passes'),
+    ('accurate_passes', ('passes',), ('accurate_passes',), 'Accurate passes'),
+    ('own_half_passes', ('passes',), ('own_half_passes',), 'Own half'),
+    ('opposition_half_passes', ('passes',), ('opposition_half_passes',), 'Opposition half'),
+    ('accurate_long_passes', ('passes',), ('long_balls_accurate',), 'Accurate long balls'),
+    ('accurate_crosses', ('passes',), ('accurate_crosses',), 'Accurate crosses'),
+    ('throws', ('passes',), ('player_throws',), 'Throws'),
+    ('touches_opp_box', ('passes',), ('touches_opp_box',), 'Touches in opposition box'),
+    ('offsides', ('passes',), ('Offsides',), 'Offsides'),
+    ('tackles_won', ('defence', 'defense'), ('tackles_succeeded', 'matchstats.headers.tackles'), 'Tackles won'),
+    ('interceptions', ('defence', 'defense'), ('interceptions',), 'Interceptions'),
+    ('blocks', ('defence', 'defense'), ('shot_blocks',), 'Blocks'),
+    ('clearances', ('defence', 'defense'), ('clearances',), 'Clearances'),
+    ('keeper_saves', ('defence', 'defense'), ('keeper_saves',), 'Keeper saves'),
+    ('duel_won', ('duels',), ('duel_won',), 'Duels won'),
+    ('ground_duels_won', ('duels',), ('ground_duels_won',), 'Ground duels won'),
+    ('aerial_won', ('duels',), ('aerials_won',), 'Aerial duels won'),
+    ('dribbles_succeeded', ('duels',), ('dribbles_succeeded',), 'Successful dribbles'),
+    ('yellow_cards', ('discipline',), ('yellow_cards',), 'Yellow cards'),
+    ('red_cards', ('discipline',), ('red_cards',), 'Red cards'),
+]
+
+MATCH_STATS_COLUMNS = [f"{prefix}_{side}" for prefix, _, _, _ in MATCH_STATS_SPEC for side in ('home', 'away')]
+
+_plans = {}
+_plans_lock = threading.Lock()
+
+
+def stats_layout(groups):
+    """
+    Walk the stats groups once and return (fingerprint, layout)
+
+    layout lists, per group, its key and the (key, lowercased title) of each of
+    its stat rows, None for the header rows. The fingerprint is a hash of the
+    layout, so pages laid out the same way share one compiled plan.
+    """
+    layout = []
+    for group in groups:
+        rows = []
+        for stat in group.get('stats') or []:
+            if stat.get('type') == 'title':
+                rows.append(None)
+            else:
+                rows.append((stat.get('key'), (stat.get('title') or '').lower()))
+        layout.append((group.get('key'), rows))
+    fingerprint = hashlib.sha1(repr(layout).encode('utf-8')).hexdigest()
+    return fingerprint, layout
+
+
+def locate(layout, group_keys, stat_keys, title):
+    """
+    Return the (group index, stat index) of one stat, or None if the page lacks it
+
+    A row whose key and title both match wins; otherwise a key that appears once
+    in the group, then a title that appears once.
+    """
+    title = title.lower()
+    for group_index, (group_key, rows) in enumerate(layout):
+        if group_key not in group_keys:
+            continue
+        by_key = [i for i, row in enumerate(rows) if row and row[0] in stat_keys]
+        by_title = [i for i, row in enumerate(rows) if row and row[1] == title]
+        both = [i for i in by_key if i in by_title]
+        if both:
+            return group_index, both[0]
+        if len(by_key) == 1:
+            return group_index, by_key[0]
+        if len(by_title) == 1:
+            return group_index, by_title[0]
+    return None
+
+
+def compile_plan(layout):
+    """Map every spec entry to its location in a layout (None when missing)"""
+    return [(prefix, locate(layout, group_keys, stat_keys, title))
+            for prefix, group_keys, stat_keys, title in MATCH_STATS_SPEC]
+
+
+def get_plan(groups):
+    """Return the compiled plan for a page's stats groups, compiling it on first sight of the layout"""
+    fingerprint, layout = stats_layout(groups)
+    with _plans_lock:
+        plan = _plans.get(fingerprint)
+    if plan is None:
+        plan = compile_plan(layout)
+        missing = [prefix for prefix, location in plan if location is None]
+        if missing:
+            print(f"Match stats layout {fingerprint[:8]}: no stat found for {', '.join(missing)}")
+        with _plans_lock:
+            _plans[fingerprint] = plan
+    return plan
+
+
+def resolve_match_stats(json_data):
+    """
+    Return the home/away team stat columns of a match page as a dict
+
+    Values are taken as FotMob gives them, e.g. '456 (87%)' for accurate passes.
+    Stats the page doesn't have come back as None.
+    """
+    content = json_data['props']['pageProps'].get('content') or {}
+    try:
+        groups = content['stats']['Periods']['All']['stats']
+    except (KeyError, TypeError):
+        groups = []
+
+    row = dict.fromkeys(MATCH_STATS_COLUMNS)
+    for prefix, location in get_plan(groups):
+        if location is None:
+            continue
+        values = groups[location[0]]['stats'][location[1]].get('stats') or []
+        if len(values) > 0:
+            row[f"{prefix}_home"] = values[0]
+        if len(values) > 1:
+            row[f"{prefix}_away"] = values[1]
+    return row
+
+
+# ============================================================================
+# PLAYER STATS
+# ============================================================================
+
+# Configured player stat columns, in file order:
+# (category index, stat title, FotMob stat key, column, 'value' or 'total')
+PLAYER_STATS_SPEC = [
+    (0, 'FotMob rating', 'rating_title', 'FotMob_rating', 'value'),
+    (0, 'Minutes played', 'minutes_played', 'Minutes_played', 'value'),
+    (0, 'Goals', 'goals', 'Goals', 'value'),
+    (0, 'Assists', 'assists', 'Assists', 'value'),
+    (0, 'Total shots', 'total_shots', 'Total_shots', 'value'),
+    (0, 'Accurate passes', 'accurate_passes', 'Accurate_passes_value', 'value'),
+    (0, 'Accurate passes', 'accurate_passes', 'Accurate_passes_total', 'total'),
+    (0, 'Chances created', 'chances_created', 'Chances_created', 'value'),
+    (0, 'Expected assists (xA)', 'expected_assists', 'Expected_assists_xA', 'value'),
+    (0, 'xG + xA', 'xg_and_xa', 'xG_plus_xA', 'value'),
+    (0, 'Fantasy points', 'fantasy_points', 'Fantasy_points', 'value'),
+    (0, 'Defensive actions', 'defensive_actions', 'Defensive_actions', 'value'),
+    (1, 'Touches', 'touches', 'touches', 'value'),
+    (1, 'Touches in opposition box', 'touches_opp_box', 'touches_opp_box', 'value'),
+    (1, 'Passes into final third', 'passes_into_final_third', 'passes_into_final_third', 'value'),
+    (1, 'Accurate crosses', 'accurate_crosses', 'accurate_crosses_value', 'value'),
+    (1, 'Accurate crosses', 'accurate_crosses', 'accurate_crosses_total', 'total'),
+    (1, 'Accurate long balls', 'long_balls_accurate', 'long_balls_accurate_value', 'value'),
+    (1, 'Accurate long balls', 'long_balls_accurate', 'long_balls_accurate_total', 'total'),
+    (1, 'Dispossessed', 'dispossessed', 'dispossessed', 'value'),
+    (2, 'Tackles won', 'tackles_succeeded', 'tackles_succeeded_value', 'value'),
+    (2, 'Tackles won', 'tackles_succeeded', 'tackles_succeeded_total', 'total'),
+    (2, 'Blocks', 'shot_blocks', 'shot_blocks', 'value'),
+    (2, 'Clearances', 'clearances', 'clearances', 'value'),
+    (2, 'Headed clearance', 'headed_clearance', 'headed_clearance', 'value'),
+    (2, 'Interceptions', 'interceptions', 'interceptions', 'value'),
+    (2, 'Recoveries', 'recoveries', 'recoveries', 'value'),
+    (2, 'Dribbled past', 'dribbled_past', 'dribbled_past', 'value'),
+    (3, 'Duels won', 'duel_won', 'duel_won', 'value'),
+    (3, 'Duels lost', 'duel_lost', 'duel_lost', 'value'),
+    (3, 'Ground duels won', 'ground_duels_won', 'ground_duels_won_value', 'value'),
+    (3, 'Ground duels won', 'ground_duels_won', 'ground_duels_won_total', 'total'),
+    (3, 'Aerial duels won', 'aerials_won', 'aerials_won_value', 'value'),
+    (3, 'Aerial duels won', 'aerials_won', 'aerials_won_total', 'total'),
+    (3, 'Was fouled', 'was_fouled', 'fouls_received', 'value'),
+    (3, 'Fouls committed', 'fouls', 'fouls_committed', 'value'),
+]
+
+PLAYER_STATS_COLUMNS = [column for _, _, _, column, _ in PLAYER_STATS_SPEC]
+
+# Keys of the player stat categories, by the category index used in the spec
+PLAYER_STAT_CATEGORIES = ['top_stats', 'attack', 'defense', 'duels']
+
+# (category index, title) -> [(column position, 'value' or 'total')]
+_player_stat_slots = {}
+for _position, (_category_index, _title, _, _, _sub_key) in enumerate(PLAYER_STATS_SPEC):
+    _player_stat_slots.setdefault((_category_index, _title), []).append((_position, _sub_key))
+
+
+def player_stat_key(title, entry):
+    """FotMob's key for a player stat, or its lowercased title when it has none"""
+    return entry.get('key') or title.lower()
+
+
+def extra_stat_column(category_key, stat_key):
+    """Column name for a stat outside the config: '<category key>_<stat key>'"""
+    return re.sub(r'\W+', '_', f"{category_key}_{stat_key}")
+
+
+def flatten_player_stats(players):
+    """
+    Flatten every player's nested 'stats' categories in a single walk
+
+    Configured stats fill preallocated column lists. Every other stat is
+    collected too, as '<category key>_<stat key>' plus '<...>_total' when it has
+    a total, so e.g. goalkeeper stats and new FotMob stats are kept. Returns a
+    dict of column name -> list of values, configured columns first.
+    """
+    n_players = len(players)
+    configured = [[None] * n_players for _ in PLAYER_STATS_SPEC]
+    extra = {}
+
+    for row, player in enumerate(players):
+        categories = player.get('stats')
+        if not isinstance(categories, list):
+            continue
+        for category_index, category in enumerate(categories):
+            if not isinstance(category, dict):
+                continue
+            for title, entry in (category.get('stats') or {}).items():
+                stat = entry.get('stat') or {}
+                slots = _player_stat_slots.get((category_index, title))
+                if slots:
+                    for position, sub_key in slots:
+                        configured[position][row] = stat.get(sub_key)
+                    continue
+
+                category_key = category.get('key') or f"category{category_index}"
+                column = extra_stat_column(category_key, player_stat_key(title, entry))
+                if column not in extra:
+                    extra[column] = [None] * n_players
+                extra[column][row] = stat.get('value')
+                if 'total' in stat:
+                    total_column = f"{column}_total"
+                    if total_column not in extra:
+                        extra[total_column] = [None] * n_players
+                    extra[total_column][row] = stat['total']
+
+    columns = dict(zip(PLAYER_STATS_COLUMNS, configured))
+    columns.update(extra)
+    return columns
@@ -6,7 +6,9 @@ Fetches data once from FotMob and runs all scrapers
 
 import requests
 import json
-from bs4 import BeautifulSoup as bs
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import pandas as pd
 import os
 import time
@@ -14,6 +16,30 @@ from datetime import datetime
 from pathlib import Path
 import re
 
+from fotmob_aggregates import previous_rows, update_aggregates
+from fotmob_archive import archive_payload, latest_entries, load_payload
+from fotmob_catalog import record_file
+from fotmob_csv import append_frame, upsert_frame, write_frame
+from fotmob_dataset import write_match_frame
+from fotmob_events import flatten_goal_events, flatten_shots
+from fotmob_http import fetch, print_transfer_summary, save_validators
+from fotmob_ledger import (drop_rows, match_key, output_filename, payload_digest,
+                           payload_status, record_ingestion)
+from fotmob_parse import extract_next_data
+from fotmob_player_store import build_player_store_rows, save_player_store_rows
+from fotmob_shot_grids import update_shot_grids
+from fotmob_standings import build_standings_rows, save_standings_rows
+from fotmob_stats import flatten_player_stats, resolve_match_stats
+from fotmob_warehouse import build_warehouse_rows, save_warehouse_rows
+from fotmob_xpts import update_xpts
+
+
+BASE_DIR = Path(__file__).resolve().parent
+GOALS_CSV_DIR = BASE_DIR / 'goals' / 'csv'
+MATCH_STATS_CSV = BASE_DIR / 'matchStats' / 'csv' / 'fotmob_match_stats.csv'
+PLAYER_STATS_CSV_DIR = BASE_DIR / 'playerStats' / 'csv'
+SHOTS_CSV_DIR = BASE_DIR / 'shots' / 'csv'
+
 
 # ============================================================================
 # MODIFIED SCORER FUNCTIONS (from scorer.py)
@@ -58,7 +84,7 @@ def save_goals_to_csv(goal_scorers, match_url, csv_filename, team_type):
         })
 
     df_current = pd.DataFrame(current_match_data)
-    df_current.to_csv(csv_filename, index=False)
+    write_frame(df_current, csv_filename)
     print(f"{team_type.capitalize()} team goals saved to {csv_filename}")
     return df_current
 
@@ -66,6 +92,7 @@ def save_goals_to_csv(goal_scorers, match_url, csv_filename, team_type):
 def process_goal_scorers_from_data(json_data, url, team_type='home'):
     """Process goal scorer details using pre-fetched data"""
     try:
+        match_id = json_data['props']['pageProps']['general']['matchId']
         match_round = json_data['props']['pageProps']['general']['matchRound']
 
         if team_type == 'home':
@@ -80,13 +107,11 @@ def process_goal_scorers_from_data(json_data, url, team_type='home'):
         for scorer in team_goals.keys():
             scorer_data = team_goals[scorer]
 
-            if isinstance(scorer_data, dict):
-                scorer_df = pd.DataFrame([scorer_data])
-            elif isinstance(scorer_data, list):
-                scorer_df = pd.DataFrame(scorer_data)
-            else:
-                scorer_df = pd.DataFrame({'value': [scorer_data]})
+            # Flatten player/shotmapEvent/newScore into typed columns
+            events = scorer_data if isinstance(scorer_data, list) else [scorer_data]
+            scorer_df = flatten_goal_events(events)
 
+            scorer_df['matchId'] = match_id
             scorer_df['goal_scorer'] = scorer
             scorer_df['matchRound'] = match_round
 
@@ -107,46 +132,95 @@ def process_goal_scorers_from_data(json_data, url, team_type='home'):
         return None
 
 
-def run_scorer_scraper(json_data, soup, url):
-    """Run the scorer scraper logic using pre-fetched data"""
-    print("\n" + "=" * 60)
-    print("RUNNING SCORER SCRAPER")
-    print("=" * 60)
+def build_scorer_outputs(json_data, url):
+    """Build the goal scorer list and detailed scorer data for both teams"""
+    outputs = {}
+    for team_type in ['home', 'away']:
+        goal_scorers = process_scorer_data(json_data, None, url, team_type)
+        scorer_df = None
+        if goal_scorers:
+            scorer_df = process_goal_scorers_from_data(json_data, url, team_type)
+        outputs[team_type] = (goal_scorers, scorer_df)
+    return outputs
 
+
+def save_scorer_outputs(outputs, url):
+    """Save the scorer outputs built by build_scorer_outputs"""
     for team_type in ['home', 'away']:
         print(f"\n=== PROCESSING {team_type.upper()} TEAM ===")
         print("-" * 50)
 
         # Define file paths
         if team_type == 'home':
-            list_players_csv = '/home/axel/Code/Python/championship/goals/csv/listHomePlayers.csv'
-            scorers_csv = '/home/axel/Code/Python/championship/goals/csv/homeScorers.csv'
+            list_players_csv = GOALS_CSV_DIR / 'listHomePlayers.csv'
+            scorers_csv = GOALS_CSV_DIR / 'homeScorers.csv'
         else:
-            list_players_csv = '/home/axel/Code/Python/championship/goals/csv/listAwayPlayers.csv'
-            scorers_csv = '/home/axel/Code/Python/championship/goals/csv/awayScorers.csv'
+            list_players_csv = GOALS_CSV_DIR / 'listAwayPlayers.csv'
+            scorers_csv = GOALS_CSV_DIR / 'awayScorers.csv'
 
-        # Process goal scorers
-        goal_scorers = process_scorer_data(json_data, soup, url, team_type)
+        goal_scorers, scorer_df = outputs[team_type]
 
         if goal_scorers:
             save_goals_to_csv(goal_scorers, url, list_players_csv, team_type)
 
-            # Process detailed scorer data
-            scorer_df = process_goal_scorers_from_data(json_data, url, team_type)
             if scorer_df is not None:
-                # Save to CSV
-                if os.path.exists(scorers_csv):
-                    scorer_df.to_csv(scorers_csv, mode='a', header=False, index=False)
-                    print(f"{team_type.capitalize()} team data appended to {scorers_csv}")
-                else:
-                    scorer_df.to_csv(scorers_csv, index=False)
-                    print(f"New file created: {scorers_csv}")
+                # Save to CSV (locked, schema-checked and atomic)
+                append_frame(scorer_df, scorers_csv)
+                print(f"{team_type.capitalize()} team data appended to {scorers_csv}")
+
+
+def run_scorer_scraper(json_data, soup, url):
+    """Run the scorer scraper logic using pre-fetched data"""
+    print("\n" + "=" * 60)
+    print("RUNNING SCORER SCRAPER")
+    print("=" * 60)
+
+    save_scorer_outputs(build_scorer_outputs(json_data, url), url)
 
 
 # ============================================================================
 # MODIFIED MATCH STATS FUNCTIONS (from match_stats.py)
 # ============================================================================
 
+def build_match_stats_frame(json_data):
+    """Build the one-row match stats DataFrame from pre-fetched data"""
+    general = json_data['props']['pageProps']['general']
+    teams = json_data['props']['pageProps']['header']['teams']
+
+    # Extract all the data
+    match_data = {
+        'matchId': general['matchId'],
+        'matchRound': general['matchRound'],
+        'homeTeamName': general['homeTeam']['name'],
+        'homeTeamid': general['homeTeam']['id'],
+        'awayTeamName': general['awayTeam']['name'],
+        'awayTeamid': general['awayTeam']['id'],
+        'home_goals': teams[0]['score'],
+        'away_goals': teams[1]['score']
+    }
+
+    # Resolve the team stats by key/title, not by position
+    match_data.update(resolve_match_stats(json_data))
+
+    # Create DataFrame
+    df = pd.DataFrame([match_data])
+
+    return df
+
+
+def save_match_stats_frame(df):
+    """Insert or replace the match's row in fotmob_match_stats.csv, keyed on matchId"""
+    csv_filename = MATCH_STATS_CSV
+
+    # Through the offset index: unchanged rows are skipped, changed ones replaced
+    counts = upsert_frame(df, csv_filename, key='matchId')
+    print(f"Match stats upserted to {csv_filename}: "
+          + ', '.join(f"{count} {action}" for action, count in counts.items() if count))
+
+    match_data = df.iloc[0]
+    print(f"Match data for {match_data['homeTeamName']} vs {match_data['awayTeamName']} saved successfully!")
+
+
 def run_match_stats_scraper(json_data, soup, url):
     """Run the match stats scraper logic using pre-fetched data"""
     print("\n" + "=" * 60)
@@ -154,123 +228,8 @@ def run_match_stats_scraper(json_data, soup, url):
     print("=" * 60)
 
     try:
-        # Extract all the data
-        match_data = {
-            'matchId': json_data['props']['pageProps']['general']['matchId'],
-            'matchRound': json_data['props']['pageProps']['general']['matchRound'],
-            'homeTeamName': json_data['props']['pageProps']['general']['homeTeam']['name'],
-            'homeTeamid': json_data['props']['pageProps']['general']['homeTeam']['id'],
-            'awayTeamName': json_data['props']['pageProps']['general']['awayTeam']['name'],
-            'awayTeamid': json_data['props']['pageProps']['general']['awayTeam']['id'],
-            'home_goals': json_data['props']['pageProps']['header']['teams'][0]['score'],
-            'away_goals': json_data['props']['pageProps']['header']['teams'][1]['score']
-        }
-
-        # Extract detailed stats
-        stats = json_data['props']['pageProps']['content']['stats']['Periods']['All']['stats']
-
-        # Safe extraction helper
-        def safe_extract(path_indices):
-            try:
-                result = stats
-                for idx in path_indices:
-                    result = result[idx]
-                return result
-            except (KeyError, IndexError, TypeError):
-                return None
-
-        # Extract all stats with safe fallbacks
-        match_data.update({
-            'ball_possession_home': safe_extract([0, 'stats', 0, 'stats', 0]),
-            'ball_possession_away': safe_extract([0, 'stats', 0, 'stats', 1]),
-            'big_chances_home': safe_extract([0, 'stats', 4, 'stats', 0]),
-            'big_chances_away': safe_extract([0, 'stats', 4, 'stats', 1]),
-            'big_chances_missed_home': safe_extract([0, 'stats', 5, 'stats', 0]),
-            'big_chances_missed_away': safe_extract([0, 'stats', 5, 'stats', 1]),
-            'fouls_home': safe_extract([0, 'stats', 7, 'stats', 0]),
-            'fouls_away': safe_extract([0, 'stats', 7, 'stats', 1]),
-            'corners_home': safe_extract([0, 'stats', 8, 'stats', 0]),
-            'corners_away': safe_extract([0, 'stats', 8, 'stats', 1]),
-            'total_shots_home': safe_extract([1, 'stats', 1, 'stats', 0]),
-            'total_shots_away': safe_extract([1, 'stats', 1, 'stats', 1]),
-            'shots_off_target_home': safe_extract([1, 'stats', 2, 'stats', 0]),
-            'shots_off_target_away': safe_extract([1, 'stats', 2, 'stats', 1]),
-            'shots_on_target_home': safe_extract([1, 'stats', 3, 'stats', 0]),
-            'shots_on_target_away': safe_extract([1, 'stats', 3, 'stats', 1]),
-            'blocked_shots_home': safe_extract([1, 'stats', 4, 'stats', 0]),
-            'blocked_shots_away': safe_extract([1, 'stats', 4, 'stats', 1]),
-            'hit_woodwork_home': safe_extract([1, 'stats', 5, 'stats', 0]),
-            'hit_woodwork_away': safe_extract([1, 'stats', 5, 'stats', 1]),
-            'shots_inside_box_home': safe_extract([1, 'stats', 6, 'stats', 0]),
-            'shots_inside_box_away': safe_extract([1, 'stats', 6, 'stats', 1]),
-            'shots_outside_box_home': safe_extract([1, 'stats', 7, 'stats', 0]),
-            'shots_outside_box_away': safe_extract([1, 'stats', 7, 'stats', 1]),
-            'xG_home': safe_extract([2, 'stats', 1, 'stats', 0]),
-            'xG_away': safe_extract([2, 'stats', 1, 'stats', 1]),
-            'xG_open_play_home': safe_extract([2, 'stats', 2, 'stats', 0]),
-            'xG_open_play_away': safe_extract([2, 'stats', 2, 'stats', 1]),
-            'xG_set_play_home': safe_extract([2, 'stats', 3, 'stats', 0]),
-            'xG_set_play_away': safe_extract([2, 'stats', 3, 'stats', 1]),
-            'xG_non_penalty_home': safe_extract([2, 'stats', 4, 'stats', 0]),
-            'xG_non_penalty_away': safe_extract([2, 'stats', 4, 'stats', 1]),
-            'xGOT_home': safe_extract([2, 'stats', 5, 'stats', 0]),
-            'xGOT_away': safe_extract([2, 'stats', 5, 'stats', 1]),
-            'passes_home': safe_extract([3, 'stats', 1, 'stats', 0]),
-            'passes_away': safe_extract([3, 'stats', 1, 'stats', 1]),
-            'accurate_passes_home': safe_extract([3, 'stats', 2, 'stats', 0]),
-            'accurate_passes_away': safe_extract([3, 'stats', 2, 'stats', 1]),
-            'own_half_passes_home': safe_extract([3, 'stats', 3, 'stats', 0]),
-            'own_half_passes_away': safe_extract([3, 'stats', 3, 'stats', 1]),
-            'opposition_half_passes_home': safe_extract([3, 'stats', 4, 'stats', 0]),
-            'opposition_half_passes_away': safe_extract([3, 'stats', 4, 'stats', 1]),
-            'accurate_long_passes_home': safe_extract([3, 'stats', 5, 'stats', 0]),
-            'accurate_long_passes_away': safe_extract([3, 'stats', 5, 'stats', 1]),
-            'accurate_crosses_home': safe_extract([3, 'stats', 6, 'stats', 0]),
-            'accurate_crosses_away': safe_extract([3, 'stats', 6, 'stats', 1]),
-            'throws_home': safe_extract([3, 'stats', 7, 'stats', 0]),
-            'throws_away': safe_extract([3, 'stats', 7, 'stats', 1]),
-            'touches_opp_box_home': safe_extract([3, 'stats', 8, 'stats', 0]),
-            'touches_opp_box_away': safe_extract([3, 'stats', 8, 'stats', 1]),
-            'offsides_home': safe_extract([3, 'stats', 9, 'stats', 0]),
-            'offsides_away': safe_extract([3, 'stats', 9, 'stats', 1]),
-            'tackles_won_home': safe_extract([4, 'stats', 1, 'stats', 0]),
-            'tackles_won_away': safe_extract([4, 'stats', 1, 'stats', 1]),
-            'interceptions_home': safe_extract([4, 'stats', 2, 'stats', 0]),
-            'interceptions_away': safe_extract([4, 'stats', 2, 'stats', 1]),
-            'blocks_home': safe_extract([4, 'stats', 3, 'stats', 0]),
-            'blocks_away': safe_extract([4, 'stats', 3, 'stats', 1]),
-            'clearances_home': safe_extract([4, 'stats', 4, 'stats', 0]),
-            'clearances_away': safe_extract([4, 'stats', 4, 'stats', 1]),
-            'keeper_saves_home': safe_extract([4, 'stats', 5, 'stats', 0]),
-            'keeper_saves_away': safe_extract([4, 'stats', 5, 'stats', 1]),
-            'duel_won_home': safe_extract([5, 'stats', 1, 'stats', 0]),
-            'duel_won_away': safe_extract([5, 'stats', 1, 'stats', 1]),
-            'ground_duels_won_home': safe_extract([5, 'stats', 2, 'stats', 0]),
-            'ground_duels_won_away': safe_extract([5, 'stats', 2, 'stats', 1]),
-            'aerial_won_home': safe_extract([5, 'stats', 3, 'stats', 0]),
-            'aerial_won_away': safe_extract([5, 'stats', 3, 'stats', 1]),
-            'dribbles_succeeded_home': safe_extract([5, 'stats', 4, 'stats', 0]),
-            'dribbles_succeeded_away': safe_extract([5, 'stats', 4, 'stats', 1]),
-            'yellow_cards_home': safe_extract([6, 'stats', 1, 'stats', 0]),
-            'yellow_cards_away': safe_extract([6, 'stats', 1, 'stats', 1]),
-            'red_cards_home': safe_extract([6, 'stats', 2, 'stats', 0]),
-            'red_cards_away': safe_extract([6, 'stats', 2, 'stats', 1])
-        })
-
-        # Create DataFrame
-        df = pd.DataFrame([match_data])
-
-        # Save to CSV
-        csv_filename = '/home/axel/Code/Python/championship/matchStats/csv/fotmob_match_stats.csv'
-
-        if os.path.exists(csv_filename):
-            df.to_csv(csv_filename, mode='a', header=False, index=False)
-            print(f"Data appended to existing file: {csv_filename}")
-        else:
-            df.to_csv(csv_filename, mode='w', header=True, index=False)
-            print(f"New file created: {csv_filename}")
-
-        print(f"Match data for {match_data['homeTeamName']} vs {match_data['awayTeamName']} saved successfully!")
+        save_match_stats_frame(build_match_stats_frame(json_data))
+        save_standings_rows(build_standings_rows(json_data))
 
     except Exception as e:
         print(f"Error in match stats scraper: {e}")
@@ -280,20 +239,6 @@ def run_match_stats_scraper(json_data, soup, url):
 # MODIFIED PLAYER STATS FUNCTIONS (from player_stats.py)
 # ============================================================================
 
-def extract_stat_value_by_category(stats_list, category_index, stat_key, sub_key='value'):
-    """Extract a specific stat value from a specific category in the nested stats structure"""
-    if not stats_list or not isinstance(stats_list, list):
-        return None
-    if category_index >= len(stats_list):
-        return None
-    category = stats_list[category_index]
-    if isinstance(category, dict) and 'stats' in category:
-        if stat_key in category['stats']:
-            stat_info = category['stats'][stat_key].get('stat', {})
-            return stat_info.get(sub_key, None)
-    return None
-
-
 def extract_match_name_from_url(url):
     """Extract match name from FotMob URL"""
     pattern = r'/matches/([^/]+)/'
@@ -308,20 +253,59 @@ def extract_match_name_from_url(url):
     return "match_data"
 
 
-def get_unique_filename(directory, base_filename):
-    """Generate a unique filename by adding a number suffix if the file already exists"""
-    name, ext = os.path.splitext(base_filename)
-    full_path = os.path.join(directory, base_filename)
-    if not os.path.exists(full_path):
-        return base_filename
-
-    counter = 1
-    while True:
-        new_filename = f"{name}-{counter}{ext}"
-        new_full_path = os.path.join(directory, new_filename)
-        if not os.path.exists(new_full_path):
-            return new_filename
-        counter += 1
+def build_player_stats_frame(json_data):
+    """Build the per-player stats DataFrame from pre-fetched data"""
+    # Extract match information
+    match_info = {
+        'matchId': json_data['props']['pageProps']['general']['matchId'],
+        'matchRound': json_data['props']['pageProps']['general']['matchRound'],
+        'homeTeamName': json_data['props']['pageProps']['general']['homeTeam']['name'],
+        'homeTeamid': json_data['props']['pageProps']['general']['homeTeam']['id'],
+        'awayTeamName': json_data['props']['pageProps']['general']['awayTeam']['name'],
+        'awayTeamid': json_data['props']['pageProps']['general']['awayTeam']['id'],
+        'matchDate': json_data['props']['pageProps']['general']['matchTimeUTCDate'],
+        'home_goals': json_data['props']['pageProps']['header']['teams'][0]['score'],
+        'away_goals': json_data['props']['pageProps']['header']['teams'][1]['score']
+    }
+
+    # One row per player, without the nested fields that aren't kept
+    players = list(json_data['props']['pageProps']['content']['playerStats'].values())
+    df_players = pd.DataFrame(players, dtype=object)
+    df_players = df_players.drop(['shotmap', 'funFacts', 'isPotm'], axis=1, errors='ignore')
+
+    # Add match information columns
+    for key, value in match_info.items():
+        df_players[key] = value
+
+    # Flatten the nested stats in one walk over every player; the nested
+    # column itself goes to the player stat store, not the per-match CSV
+    df_stats = pd.DataFrame(flatten_player_stats(players))
+    df_players = df_players.drop(['stats'], axis=1, errors='ignore')
+
+    return pd.concat([df_players, df_stats], axis=1)
+
+
+def save_player_stats_frame(df, url, match_id):
+    """Save the player stats DataFrame to the match's per-match CSV, returning the filename"""
+    match_name = extract_match_name_from_url(url)
+    csv_directory = PLAYER_STATS_CSV_DIR
+    os.makedirs(csv_directory, exist_ok=True)
+
+    csv_filename = output_filename(match_id, 'player_stats', csv_directory, match_name)
+    csv_path = os.path.join(csv_directory, csv_filename)
+
+    previous = previous_rows(csv_path)
+    df.to_csv(csv_path, index=False)
+    print(f"Player stats saved to: {csv_path}")
+    print(f"Shape of saved DataFrame: {df.shape}")
+    update_aggregates(df, previous)
+
+    # Before the catalog entry is replaced: the dataset finds the match's old partition there
+    dataset_path = write_match_frame('player_stats', df)
+    if dataset_path:
+        print(f"Player stats written to dataset: {dataset_path}")
+    record_file('player_stats', csv_path, df)
+    return csv_filename
 
 
 def run_player_stats_scraper(json_data, soup, url):
@@ -331,95 +315,9 @@ def run_player_stats_scraper(json_data, soup, url):
     print("=" * 60)
 
     try:
-        # Extract match information
-        match_info = {
-            'matchId': json_data['props']['pageProps']['general']['matchId'],
-            'matchRound': json_data['props']['pageProps']['general']['matchRound'],
-            'homeTeamName': json_data['props']['pageProps']['general']['homeTeam']['name'],
-            'homeTeamid': json_data['props']['pageProps']['general']['homeTeam']['id'],
-            'awayTeamName': json_data['props']['pageProps']['general']['awayTeam']['name'],
-            'awayTeamid': json_data['props']['pageProps']['general']['awayTeam']['id'],
-            'matchDate': json_data['props']['pageProps']['general']['matchTimeUTCDate'],
-            'home_goals': json_data['props']['pageProps']['header']['teams'][0]['score'],
-            'away_goals': json_data['props']['pageProps']['header']['teams'][1]['score']
-        }
-
-        # Create DataFrame
-        df_players = pd.DataFrame(json_data['props']['pageProps']['content']['playerStats'])
-        df_players_T = df_players.T
-        df_players_T.reset_index(drop=True, inplace=True)
-        df_players_T = df_players_T.drop(['shotmap', 'funFacts', 'isPotm'], axis=1, errors='ignore')
-
-        # Add match information columns
-        for key, value in match_info.items():
-            df_players_T[key] = value
-
-        # Define all stats to extract
-        existing_stats = [
-            ('FotMob rating', 'FotMob_rating', 'value'),
-            ('Minutes played', 'Minutes_played', 'value'),
-            ('Goals', 'Goals', 'value'),
-            ('Assists', 'Assists', 'value'),
-            ('Total shots', 'Total_shots', 'value'),
-            ('Accurate passes', 'Accurate_passes_value', 'value'),
-            ('Accurate passes', 'Accurate_passes_total', 'total'),
-            ('Chances created', 'Chances_created', 'value'),
-            ('Expected assists (xA)', 'Expected_assists_xA', 'value'),
-            ('xG + xA', 'xG_plus_xA', 'value'),
-            ('Fantasy points', 'Fantasy_points', 'value'),
-            ('Defensive actions', 'Defensive_actions', 'value')
-        ]
-
-        new_stats = [
-            (1, 'Touches', 'touches', 'value'),
-            (1, 'Touches in opposition box', 'touches_opp_box', 'value'),
-            (1, 'Passes into final third', 'passes_into_final_third', 'value'),
-            (1, 'Accurate crosses', 'accurate_crosses_value', 'value'),
-            (1, 'Accurate crosses', 'accurate_crosses_total', 'total'),
-            (1, 'Accurate long balls', 'long_balls_accurate_value', 'value'),
-            (1, 'Accurate long balls', 'long_balls_accurate_total', 'total'),
-            (1, 'Dispossessed', 'dispossessed', 'value'),
-            (2, 'Tackles won', 'tackles_succeeded_value', 'value'),
-            (2, 'Tackles won', 'tackles_succeeded_total', 'total'),
-            (2, 'Blocks', 'shot_blocks', 'value'),
-            (2, 'Clearances', 'clearances', 'value'),
-            (2, 'Headed clearance', 'headed_clearance', 'value'),
-            (2, 'Interceptions', 'interceptions', 'value'),
-            (2, 'Recoveries', 'recoveries', 'value'),
-            (2, 'Dribbled past', 'dribbled_past', 'value'),
-            (3, 'Duels won', 'duel_won', 'value'),
-            (3, 'Duels lost', 'duel_lost', 'value'),
-            (3, 'Ground duels won', 'ground_duels_won_value', 'value'),
-            (3, 'Ground duels won', 'ground_duels_won_total', 'total'),
-            (3, 'Aerial duels won', 'aerials_won_value', 'value'),
-            (3, 'Aerial duels won', 'aerials_won_total', 'total'),
-            (3, 'Was fouled', 'fouls_received', 'value'),
-            (3, 'Fouls committed', 'fouls_committed', 'value')
-        ]
-
-        # Extract stats
-        for stat_key, column_name, sub_key in existing_stats:
-            df_players_T[column_name] = df_players_T['stats'].apply(
-                lambda x: extract_stat_value_by_category(x, 0, stat_key, sub_key)
-            )
-
-        for category_index, stat_key, column_name, sub_key in new_stats:
-            df_players_T[column_name] = df_players_T['stats'].apply(
-                lambda x: extract_stat_value_by_category(x, category_index, stat_key, sub_key)
-            )
-
-        # Save to CSV
-        match_name = extract_match_name_from_url(url)
-        base_csv_filename = f"{match_name}.csv"
-        csv_directory = "/home/axel/Code/Python/championship/playerStats/csv/"
-        os.makedirs(csv_directory, exist_ok=True)
-
-        unique_csv_filename = get_unique_filename(csv_directory, base_csv_filename)
-        csv_path = os.path.join(csv_directory, unique_csv_filename)
-
-        df_players_T.to_csv(csv_path, index=False)
-        print(f"Player stats saved to: {csv_path}")
-        print(f"Shape of saved DataFrame: {df_players_T.shape}")
+        match_id = json_data['props']['pageProps']['general']['matchId']
+        save_player_stats_frame(build_player_stats_frame(json_data), url, match_id)
+        save_player_store_rows(build_player_store_rows(json_data))
 
     except Exception as e:
         print(f"Error in player stats scraper: {e}")
@@ -429,6 +327,65 @@ def run_player_stats_scraper(json_data, soup, url):
 # MODIFIED SHOTS FUNCTIONS (from shots.py)
 # ============================================================================
 
+def build_shots_frame(json_data):
+    """Build the shots DataFrame from pre-fetched data, returning (shots, match metadata)"""
+    # Extract match metadata
+    general = json_data['props']['pageProps']['general']
+    header = json_data['props']['pageProps']['header']
+    content = json_data['props']['pageProps']['content']
+
+    match_data = {
+        'matchId': general['matchId'],
+        'matchRound': general['matchRound'],
+        'homeTeamName': general['homeTeam']['name'],
+        'homeTeamId': general['homeTeam']['id'],
+        'awayTeamName': general['awayTeam']['name'],
+        'awayTeamId': general['awayTeam']['id'],
+        'matchDate': general['matchTimeUTCDate'],
+        'home_goals': header['teams'][0]['score'],
+        'away_goals': header['teams'][1]['score']
+    }
+
+    # Create DataFrame from shots data, with onGoalShot flattened
+    df_shots = flatten_shots(content['shotmap']['shots'])
+
+    # Add match metadata to each row
+    for key, value in match_data.items():
+        df_shots[key] = value
+
+    # Reorder columns
+    metadata_cols = list(match_data.keys())
+    shot_cols = [col for col in df_shots.columns if col not in metadata_cols]
+    df_shots = df_shots[metadata_cols + shot_cols]
+
+    return df_shots, match_data
+
+
+def save_shots_frame(df, match_data, url, match_id):
+    """Save the shots DataFrame to the match's per-match CSV, returning the filename"""
+    match_name = extract_match_name_from_url(url)
+    csv_directory = SHOTS_CSV_DIR
+    os.makedirs(csv_directory, exist_ok=True)
+
+    csv_filename = output_filename(match_id, 'shots', csv_directory, match_name)
+    output_path = os.path.join(csv_directory, csv_filename)
+
+    previous = previous_rows(output_path)
+    df.to_csv(output_path, index=False)
+    update_shot_grids(df, previous)
+    print(f"Shots data saved to: {output_path}")
+    print(f"Total shots recorded: {len(df)}")
+
+    # Before the catalog entry is replaced: the dataset finds the match's old partition there
+    dataset_path = write_match_frame('shots', df)
+    if dataset_path:
+        print(f"Shots data written to dataset: {dataset_path}")
+    record_file('shots', output_path, df)
+    # After the dataset write, so a rebuild of the expected points includes the match
+    update_xpts(df, match_data)
+    return csv_filename
+
+
 def run_shots_scraper(json_data, soup, url):
     """Run the shots scraper logic using pre-fetched data"""
     print("\n" + "=" * 60)
@@ -436,133 +393,415 @@ def run_shots_scraper(json_data, soup, url):
     print("=" * 60)
 
     try:
-        # Extract match metadata
-        general = json_data['props']['pageProps']['general']
-        header = json_data['props']['pageProps']['header']
-        content = json_data['props']['pageProps']['content']
-
-        match_data = {
-            'matchId': general['matchId'],
-            'matchRound': general['matchRound'],
-            'homeTeamName': general['homeTeam']['name'],
-            'homeTeamId': general['homeTeam']['id'],
-            'awayTeamName': general['awayTeam']['name'],
-            'awayTeamId': general['awayTeam']['id'],
-            'matchDate': general['matchTimeUTCDate'],
-            'home_goals': header['teams'][0]['score'],
-            'away_goals': header['teams'][1]['score']
-        }
-
-        # Create DataFrame from shots data
-        df_shots = pd.DataFrame(content['shotmap']['shots'])
-
-        # Add match metadata to each row
-        for key, value in match_data.items():
-            df_shots[key] = value
-
-        # Reorder columns
-        metadata_cols = list(match_data.keys())
-        shot_cols = [col for col in df_shots.columns if col not in metadata_cols]
-        df_shots = df_shots[metadata_cols + shot_cols]
-
-        # Save to CSV
-        match_name = extract_match_name_from_url(url)
-        csv_directory = "/home/axel/Code/Python/championship/shots/csv/"
-        os.makedirs(csv_directory, exist_ok=True)
-
-        base_filename = f"{match_name}.csv"
-        unique_filename = get_unique_filename(csv_directory, base_filename)
-        output_path = os.path.join(csv_directory, unique_filename)
-
-        df_shots.to_csv(output_path, index=False)
-        print(f"Shots data saved to: {output_path}")
-        print(f"Total shots recorded: {len(df_shots)}")
+        match_id = json_data['props']['pageProps']['general']['matchId']
+        save_shots_frame(*build_shots_frame(json_data), url, match_id)
 
     except Exception as e:
         print(f"Error in shots scraper: {e}")
 
 
 # ============================================================================
-# MAIN COORDINATOR FUNCTION
+# EXTRACTION PIPELINE
 # ============================================================================
 
-def main():
+# Extractors by output name; each takes (json_data, url) and only reads the payload
+BUILDERS = {
+    'scorers': build_scorer_outputs,
+    'match_stats': lambda json_data, url: build_match_stats_frame(json_data),
+    'standings': lambda json_data, url: build_standings_rows(json_data),
+    'player_stats': lambda json_data, url: build_player_stats_frame(json_data),
+    'player_store': lambda json_data, url: build_player_store_rows(json_data),
+    'shots': lambda json_data, url: build_shots_frame(json_data),
+    'warehouse': lambda json_data, url: build_warehouse_rows(json_data),
+}
+
+
+def run_builder(name, json_data, url):
+    """Run one extractor, turning a failure into a None output"""
+    try:
+        return BUILDERS[name](json_data, url)
+    except Exception as e:
+        print(f"Error building {name} for {url}: {e}")
+        return None
+
+
+def build_all_outputs(json_data, url):
     """
-    Main coordinator function that fetches data once and runs all scrapers
+    Run every extractor on one payload without writing anything
+
+    The extractors run one after another in this process: spreading them over
+    a process pool was measured slower than this on a single core, and forking
+    from the batch worker threads could deadlock.
     """
-    print("=" * 60)
-    print("FOTMOB UNIFIED SCRAPER")
-    print("=" * 60)
+    return {name: run_builder(name, json_data, url) for name in BUILDERS}
 
-    # Get URL input
-    url_input = input('\nEnter FotMob match URL: ').strip()
 
-    if not url_input:
-        print("Please enter a valid URL")
+def save_all_outputs(outputs, url, match_id):
+    """
+    Write the outputs produced by build_all_outputs
+
+    Returns the per-match filenames that were written, keyed by output name,
+    and the names of the outputs that failed to build or save.
+    """
+    savers = [
+        ('scorers', 'SCORER', lambda output: save_scorer_outputs(output, url)),
+        ('match_stats', 'MATCH STATS', save_match_stats_frame),
+        ('standings', 'STANDINGS', save_standings_rows),
+        ('player_stats', 'PLAYER STATS', lambda output: save_player_stats_frame(output, url, match_id)),
+        ('player_store', 'PLAYER STAT STORE', save_player_store_rows),
+        ('shots', 'SHOTS', lambda output: save_shots_frame(*output, url, match_id)),
+        ('warehouse', 'WAREHOUSE', save_warehouse_rows),
+    ]
+    written = {}
+    failed = []
+    for name, title, save in savers:
+        # run_builder returns None only when the extractor failed
+        if outputs[name] is None:
+            failed.append(name)
+            continue
+        print("\n" + "=" * 60)
+        print(f"SAVING {title}")
+        print("=" * 60)
+        try:
+            written[name] = save(outputs[name])
+        except Exception as e:
+            print(f"Error saving {name}: {e}")
+            failed.append(name)
+    return written, failed
+
+
+def drop_match_rows(key):
+    """
+    Remove a match's rows from the scorer CSVs before its outputs are rewritten
+
+    fotmob_match_stats.csv needs no drop: its row is upserted by matchId.
+    """
+    goals_dir = GOALS_CSV_DIR
+    # A team plays once per round
+    removed = drop_rows(os.path.join(goals_dir, 'homeScorers.csv'),
+                        {'matchRound': key['matchRound'], 'HomeTeamId': key['homeTeamId']})
+    removed += drop_rows(os.path.join(goals_dir, 'awayScorers.csv'),
+                         {'matchRound': key['matchRound'], 'AwayTeamId': key['awayTeamId']})
+    if removed:
+        print(f"Removed {removed} previously ingested rows for match {key['matchId']}")
+
+
+def ingest_outputs(key, digest, outputs, url):
+    """
+    Save one match's outputs through the ingestion ledger
+
+    Callers decide whether the payload needs ingesting (see payload_status).
+    Any old rows of the match are removed first, including rows appended by
+    the standalone scrapers that never went through the ledger, and its
+    per-match files are overwritten in place.
+
+    The payload's digest is only recorded once every output was written;
+    otherwise RuntimeError is raised and the match stays pending, so the next
+    run ingests it again instead of skipping it as unchanged.
+    """
+    drop_match_rows(key)
+
+    written, failed = save_all_outputs(outputs, url, key['matchId'])
+    if failed:
+        # Keep the files that were written owned by the match, but with no digest
+        record_ingestion(key, '', written)
+        raise RuntimeError(f"Match {key['matchId']} not fully ingested, failed outputs: {', '.join(failed)}")
+    record_ingestion(key, digest, written)
+
+
+# ============================================================================
+# MAIN COORDINATOR FUNCTION
+# ============================================================================
+
+def run_all_scrapers(json_data, soup, url, force=False):
+    """Run every extractor against the same pre-fetched match data and save the results"""
+    # Display match info
+    match_info = json_data['props']['pageProps']['general']
+    print(f"\nMatch: {match_info['homeTeam']['name']} vs {match_info['awayTeam']['name']}")
+    print(f"Round: {match_info['matchRound']}")
+    print(f"Date: {match_info['matchTimeUTCDate']}")
+
+    key = match_key(json_data)
+    digest = payload_digest(json_data)
+    if payload_status(key['matchId'], digest) == 'unchanged' and not force:
+        print(f"Match {key['matchId']} already ingested from this payload, skipped")
         return
 
+    # Run all extractors on the same payload, then write their outputs together
+    start = time.perf_counter()
+    outputs = build_all_outputs(json_data, url)
+    print(f"Extractors finished in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    ingest_outputs(key, digest, outputs, url)
+
+
+def archive_match_payload(json_data, url):
+    """Keep the raw payload in the archive so outputs can be rebuilt later"""
+    try:
+        path = archive_payload(json_data, url)
+        print(f"Raw payload archived: {path}")
+    except Exception as e:
+        print(f"Error archiving raw payload: {e}")
+
+
+def print_files_summary():
+    """Print the list of files written by the scrapers"""
+    print("\nFiles created/updated:")
+    print("- Goal scorers: listHomePlayers.csv, listAwayPlayers.csv")
+    print("- Scorer details: homeScorers.csv, awayScorers.csv")
+    print("- Match stats: fotmob_match_stats.csv")
+    print("- Standings: team_matches.csv, snapshots.csv")
+    print("- Player stats: [match-name].csv")
+    print("- Player stat store: players.csv, player_stat_values.csv")
+    print("- Shots data: [match-name].csv")
+    print("- Shot grids: shots/grids/grid_21x17.npz")
+    print("- Expected points: shots/xpts/team_xpts.csv")
+    print("- Parquet dataset: dataset/shots, dataset/player_stats")
+    print("- SQL warehouse: championship.db")
+
+
+def scrape_single_match(url_input, force=False):
+    """Fetch one match page and run all scrapers on it"""
     print(f"\nFetching data from: {url_input}")
     print("=" * 60)
 
     try:
         # FETCH DATA ONCE
         print("\nFetching match data from FotMob...")
-        r = requests.get(url_input)
+        r = fetch(url_input)
         r.raise_for_status()
 
-        # Parse HTML
-        soup = bs(r.content, 'html.parser')
-
-        # Extract JSON data
-        json_script = soup.find('script', attrs={'id': '__NEXT_DATA__'})
-        if not json_script:
-            raise ValueError("Could not find __NEXT_DATA__ script in the page")
-
-        json_data = json.loads(json_script.contents[0])
+        json_data = extract_next_data(r.content)
         print("Data fetched successfully!")
-
-        # Display match info
-        match_info = json_data['props']['pageProps']['general']
-        print(f"\nMatch: {match_info['homeTeam']['name']} vs {match_info['awayTeam']['name']}")
-        print(f"Round: {match_info['matchRound']}")
-        print(f"Date: {match_info['matchTimeUTCDate']}")
+        archive_match_payload(json_data, url_input)
 
         # RUN ALL SCRAPERS WITH THE SAME DATA
-
-        # 1. Run Scorer Scraper
-        run_scorer_scraper(json_data, soup, url_input)
-        time.sleep(0.5)  # Small delay between scrapers
-
-        # 2. Run Match Stats Scraper
-        run_match_stats_scraper(json_data, soup, url_input)
-        time.sleep(0.5)
-
-        # 3. Run Player Stats Scraper
-        run_player_stats_scraper(json_data, soup, url_input)
-        time.sleep(0.5)
-
-        # 4. Run Shots Scraper
-        run_shots_scraper(json_data, soup, url_input)
+        run_all_scrapers(json_data, None, url_input, force=force)
+        save_validators(r)
 
         print("\n" + "=" * 60)
         print("ALL SCRAPERS COMPLETED SUCCESSFULLY!")
         print("=" * 60)
-        print("\nFiles created/updated:")
-        print("- Goal scorers: listHomePlayers.csv, listAwayPlayers.csv")
-        print("- Scorer details: homeScorers.csv, awayScorers.csv")
-        print("- Match stats: fotmob_match_stats.csv")
-        print("- Player stats: [match-name].csv")
-        print("- Shots data: [match-name].csv")
+        print_files_summary()
 
     except requests.RequestException as e:
         print(f"Error fetching URL: {e}")
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON data: {e}")
+    except RuntimeError as e:
+        print(f"Error ingesting match: {e}")
     except Exception as e:
         print(f"Unexpected error: {e}")
         import traceback
         traceback.print_exc()
 
 
+# ============================================================================
+# BATCH MODE
+# ============================================================================
+
+DEFAULT_CONCURRENCY = 8
+
+
+def read_url_list(path):
+    """Read match URLs from a text file, one per line (blank lines and '#' comment lines are skipped)"""
+    urls = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            # URLs carry the matchId after a '#', so only whole-line comments are skipped
+            if not line or line.startswith('#'):
+                continue
+            if line not in urls:
+                urls.append(line)
+    return urls
+
+
+async def fetch_page_async(url, semaphore, conditional=True):
+    """
+    Fetch one match page without blocking the event loop, honouring the concurrency cap
+
+    A conditional fetch of a page that hasn't changed since it was last
+    ingested comes back as None instead of a response.
+    """
+    async with semaphore:
+        r = await asyncio.to_thread(fetch, url, conditional)
+        if r.status_code == 304:
+            return None
+        r.raise_for_status()
+        return r
+
+
+def process_page(url, content, force=False):
+    """Parse a fetched page and run all scrapers on it"""
+    json_data = extract_next_data(content)
+    archive_match_payload(json_data, url)
+    run_all_scrapers(json_data, None, url, force=force)
+
+
+async def scrape_batch_async(urls, concurrency=DEFAULT_CONCURRENCY, force=False, on_complete=None):
+    """
+    Fetch all match pages concurrently and run the scraper chain on each one.
+
+    Pages are fetched with at most `concurrency` requests in flight. The scrapers
+    append to shared CSV files, so pages are processed one at a time as they arrive.
+    If given, on_complete(url, status) is called as each URL finishes, with status
+    'succeeded', 'unchanged' or 'failed'.
+    Returns a dict with the lists of succeeded, unchanged and failed URLs.
+    """
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+    write_lock = asyncio.Lock()
+    results = {'succeeded': [], 'unchanged': [], 'failed': []}
+
+    async def handle(url):
+        try:
+            r = await fetch_page_async(url, semaphore, conditional=not force)
+            if r is None:
+                print(f"Unchanged since last crawl, skipped: {url}")
+                status = 'unchanged'
+            else:
+                async with write_lock:
+                    print("\n" + "=" * 60)
+                    print(f"PROCESSING: {url}")
+                    print("=" * 60)
+                    await asyncio.to_thread(process_page, url, r.content, force)
+                save_validators(r)
+                status = 'succeeded'
+        except Exception as e:
+            print(f"Error processing {url}: {e}")
+            status = 'failed'
+        results[status].append(url)
+        if on_complete is not None:
+            on_complete(url, status)
+
+    await asyncio.gather(*(handle(url) for url in urls))
+    return results
+
+
+def run_batch(urls, concurrency=DEFAULT_CONCURRENCY, force=False, on_complete=None):
+    """Run batch mode over a list of match URLs"""
+    print(f"\nBatch mode: {len(urls)} matches, concurrency {concurrency}")
+    start = time.perf_counter()
+
+    results = asyncio.run(scrape_batch_async(urls, concurrency, force, on_complete))
+
+    elapsed = time.perf_counter() - start
+    print("\n" + "=" * 60)
+    print("BATCH COMPLETED")
+    print("=" * 60)
+    print(f"Succeeded: {len(results['succeeded'])}")
+    print(f"Unchanged: {len(results['unchanged'])}")
+    print(f"Failed: {len(results['failed'])}")
+    for url in results['failed']:
+        print(f"  - {url}")
+    print(f"Elapsed: {elapsed:.1f}s")
+    print_transfer_summary()
+    print_files_summary()
+    return results
+
+
+# ============================================================================
+# OFFLINE REPLAY FROM THE RAW ARCHIVE
+# ============================================================================
+
+def build_outputs_from_archive(entry):
+    """Process pool worker: load one archived payload and build its outputs"""
+    json_data = load_payload(entry['path'])
+    url = entry['url']
+    return url, match_key(json_data), payload_digest(json_data), build_all_outputs(json_data, url)
+
+
+def run_replay(workers=None):
+    """
+    Rebuild the derived CSVs from the raw archive with no network access.
+
+    Extraction runs across a process pool; results are written by this process
+    in archive order so the shared CSV files are only ever touched by one writer.
+    Each match's previous outputs are replaced through the ingestion ledger.
+    """
+    entries = latest_entries()
+    if not entries:
+        print("Archive is empty, nothing to replay")
+        return
+
+    print(f"\nReplaying {len(entries)} archived matches")
+    start = time.perf_counter()
+
+    replayed = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for url, key, digest, outputs in pool.map(build_outputs_from_archive, entries, chunksize=4):
+            print("\n" + "=" * 60)
+            print(f"REPLAYING: {url}")
+            print("=" * 60)
+            # Replay exists to rerun changed extractors, so unchanged payloads are rewritten too
+            try:
+                ingest_outputs(key, digest, outputs, url)
+            except RuntimeError as e:
+                print(f"Error replaying {url}: {e}")
+                failed.append(url)
+                continue
+            replayed += 1
+
+    elapsed = time.perf_counter() - start
+    print("\n" + "=" * 60)
+    print("REPLAY COMPLETED")
+    print("=" * 60)
+    print(f"Matches replayed: {replayed}")
+    print(f"Failed: {len(failed)}")
+    for url in failed:
+        print(f"  - {url}")
+    print(f"Elapsed: {elapsed:.1f}s")
+    print_files_summary()
+
+
+def main():
+    """
+    Main coordinator function that fetches data once and runs all scrapers
+    """
+    parser = argparse.ArgumentParser(description='FotMob unified scraper')
+    parser.add_argument('--batch', metavar='FILE',
+                        help='Text file with one FotMob match URL per line')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Maximum concurrent page fetches in batch mode (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--force', action='store_true',
+                        help='Re-ingest matches even if the ledger has the same payload')
+    parser.add_argument('--replay', action='store_true',
+                        help='Rebuild all CSVs from the raw page archive without fetching')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for --replay (default: CPU count)')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("FOTMOB UNIFIED SCRAPER")
+    print("=" * 60)
+
+    if args.replay:
+        run_replay(args.workers)
+        return
+
+    if args.batch:
+        if args.concurrency < 1:
+            print("Concurrency must be at least 1")
+            return
+        urls = read_url_list(args.batch)
+        if not urls:
+            print(f"No URLs found in {args.batch}")
+            return
+        run_batch(urls, args.concurrency, args.force)
+        return
+
+    # Get URL input
+    url_input = input('\nEnter FotMob match URL: ').strip()
+
+    if not url_input:
+        print("Please enter a valid URL")
+        return
+
+    scrape_single_match(url_input, args.force)
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+FotMob SQL Warehouse
+An embedded SQLite database (championship.db) holding matches, shots, player
+match stats and goals across every season, indexed on matchId, playerId,
+teamId and round so cross-match lookups don't have to scan the CSVs.
+Each match is written in a single transaction that replaces its old rows.
+"""
+
+import argparse
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from fotmob_dataset import season_of
+from fotmob_events import (SCORER_TEAM_COLUMNS, flatten_goal_events, flatten_shots, read_scorers_csv,
+                           read_shots_csv)
+from fotmob_player_store import VALUE_COLUMNS, VALUES_FILE, player_store_rows
+from fotmob_stats import MATCH_STATS_COLUMNS, PLAYER_STATS_COLUMNS, flatten_player_stats, resolve_match_stats
+
+
+BASE_DIR = Path(__file__).resolve().parent
+DB_FILE = BASE_DIR / 'championship.db'
+MATCH_STATS_CSV = BASE_DIR / 'matchStats' / 'csv' / 'fotmob_match_stats.csv'
+SHOTS_CSV_DIR = BASE_DIR / 'shots' / 'csv'
+PLAYER_CSV_DIR = BASE_DIR / 'playerStats' / 'csv'
+GOALS_CSV_DIR = BASE_DIR / 'goals' / 'csv'
+
+# (column, SQLite type) per table, in insert order
+TABLES = {
+    'matches': [
+        ('matchId', 'INTEGER PRIMARY KEY'), ('season', 'TEXT'), ('round', 'INTEGER'),
+        ('matchDate', 'TEXT'), ('homeTeamId', 'INTEGER'), ('homeTeamName', 'TEXT'),
+        ('awayTeamId', 'INTEGER'), ('awayTeamName', 'TEXT'),
+        ('home_goals', 'INTEGER'), ('away_goals', 'INTEGER'),
+    ] + [(column, 'NUMERIC') for column in MATCH_STATS_COLUMNS],
+    'shots': [
+        ('id', 'INTEGER PRIMARY KEY'), ('matchId', 'INTEGER NOT NULL'), ('round', 'INTEGER'),
+        ('teamId', 'INTEGER'), ('playerId', 'INTEGER'), ('playerName', 'TEXT'),
+        ('eventType', 'TEXT'), ('min', 'INTEGER'), ('minAdded', 'INTEGER'),
+        ('x', 'REAL'), ('y', 'REAL'), ('expectedGoals', 'REAL'), ('expectedGoalsOnTarget', 'REAL'),
+        ('shotType', 'TEXT'), ('situation', 'TEXT'), ('period', 'TEXT'),
+        ('isBlocked', 'INTEGER'), ('isOnTarget', 'INTEGER'), ('isOwnGoal', 'INTEGER'),
+        ('isSavedOffLine', 'INTEGER'), ('isFromInsideBox', 'INTEGER'),
+        ('blockedX', 'REAL'), ('blockedY', 'REAL'), ('goalCrossedY', 'REAL'), ('goalCrossedZ', 'REAL'),
+        ('keeperId', 'INTEGER'),
+        ('onGoalShot_x', 'REAL'), ('onGoalShot_y', 'REAL'), ('onGoalShot_zoomRatio', 'REAL'),
+    ],
+    'player_match_stats': [
+        ('matchId', 'INTEGER NOT NULL'), ('playerId', 'INTEGER NOT NULL'), ('round', 'INTEGER'),
+        ('teamId', 'INTEGER'), ('teamName', 'TEXT'), ('name', 'TEXT'), ('optaId', 'TEXT'),
+        ('isGoalkeeper', 'INTEGER'), ('shirtNumber', 'INTEGER'), ('usualPosition', 'INTEGER'),
+        ('positionId', 'INTEGER'),
+    ] + [(column, 'REAL') for column in PLAYER_STATS_COLUMNS],
+    'player_stat_values': [
+        ('matchId', 'INTEGER NOT NULL'), ('playerId', 'INTEGER NOT NULL'), ('category', 'TEXT NOT NULL'),
+        ('stat_key', 'TEXT NOT NULL'), ('value', 'REAL'), ('total', 'REAL'),
+    ],
+    'goals': [
+        ('eventId', 'INTEGER NOT NULL'), ('matchId', 'INTEGER NOT NULL'), ('round', 'INTEGER'),
+        ('teamId', 'INTEGER'), ('isHome', 'INTEGER'), ('playerId', 'INTEGER'), ('playerName', 'TEXT'),
+        ('time', 'INTEGER'), ('overloadTime', 'INTEGER'), ('ownGoal', 'INTEGER'),
+        ('goalDescription', 'TEXT'), ('suffix', 'TEXT'),
+        ('assistPlayerId', 'INTEGER'), ('assistStr', 'TEXT'),
+        ('homeScore', 'INTEGER'), ('awayScore', 'INTEGER'),
+        ('shotId', 'INTEGER'), ('expectedGoals', 'REAL'),
+    ],
+}
+PRIMARY_KEYS = {
+    'player_match_stats': ['matchId', 'playerId'],
+    'player_stat_values': ['matchId', 'playerId', 'category', 'stat_key'],
+    'goals': ['matchId', 'eventId'],
+}
+INDEXES = {
+    'matches': [['season'], ['round'], ['homeTeamId'], ['awayTeamId']],
+    'shots': [['matchId'], ['playerId'], ['teamId'], ['round']],
+    'player_match_stats': [['playerId'], ['teamId'], ['round']],
+    'player_stat_values': [['playerId', 'category', 'stat_key']],
+    'goals': [['playerId'], ['teamId'], ['round'], ['assistPlayerId']],
+}
+
+_write_lock = threading.Lock()
+_schema_ready = set()
+
+
+# ============================================================================
+# SCHEMA AND CONNECTIONS
+# ============================================================================
+
+def column_names(table):
+    return [column for column, _ in TABLES[table]]
+
+
+def create_schema(conn):
+    """Create the tables and indexes that don't exist yet"""
+    for table, columns in TABLES.items():
+        definitions = [f'"{column}" {sql_type}' for column, sql_type in columns]
+        if table in PRIMARY_KEYS:
+            definitions.append(f"PRIMARY KEY ({', '.join(PRIMARY_KEYS[table])})")
+        conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(definitions)})")
+        for index_columns in INDEXES[table]:
+            name = f"idx_{table}_{'_'.join(index_columns)}"
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(index_columns)})")
+    conn.commit()
+
+
+def connect(db_path=DB_FILE):
+    """Open the warehouse, creating its schema on first use"""
+    conn = sqlite3.connect(db_path, timeout=30)
+    if str(db_path) not in _schema_ready:
+        conn.execute('PRAGMA journal_mode=WAL')
+        create_schema(conn)
+        _schema_ready.add(str(db_path))
+    return conn
+
+
+def sql_value(value):
+    """Turn a payload or DataFrame value into something sqlite3 can store"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and value != value:
+        return None
+    return value
+
+
+def to_int(value):
+    """Return a value as an int, or None when it isn't a number"""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+# ============================================================================
+# ROWS FROM A MATCH PAGE
+# ============================================================================
+
+def frame_records(df):
+    """Rows of a DataFrame as dicts, with missing values as None"""
+    return df.astype(object).where(df.notna(), None).to_dict('records')
+
+
+def goal_row(match_id, match_round, team_id, event):
+    """Turn a flattened goal event (see fotmob_events) into a goals row"""
+    return {
+        'eventId': event.get('eventId'),
+        'matchId': match_id,
+        'round': match_round,
+        'teamId': team_id,
+        'isHome': event.get('isHome'),
+        'playerId': event.get('playerId') or event.get('player_id'),
+        'playerName': event.get('nameStr') or event.get('player_name'),
+        'time': event.get('time'),
+        'overloadTime': event.get('overloadTime'),
+        'ownGoal': bool(event.get('ownGoal') or event.get('shot_isOwnGoal')),
+        'goalDescription': event.get('goalDescription'),
+        'suffix': event.get('suffix'),
+        'assistPlayerId': event.get('assistPlayerId'),
+        'assistStr': event.get('assistStr'),
+        'homeScore': event.get('newScore_home'),
+        'awayScore': event.get('newScore_away'),
+        'shotId': event.get('shot_id'),
+        'expectedGoals': event.get('shot_expectedGoals'),
+    }
+
+
+def build_warehouse_rows(json_data):
+    """
+    Build every warehouse row of one match page
+
+    Returns a dict of table name -> list of row dicts.
+    """
+    general = json_data['props']['pageProps']['general']
+    header = json_data['props']['pageProps']['header']
+    content = json_data['props']['pageProps']['content']
+
+    match_id = general['matchId']
+    match_round = to_int(general['matchRound'])
+    match_date = general['matchTimeUTCDate']
+    home_id = general['homeTeam']['id']
+    away_id = general['awayTeam']['id']
+
+    match = {
+        'matchId': match_id,
+        'season': season_of(match_date),
+        'round': match_round,
+        'matchDate': match_date,
+        'homeTeamId': home_id,
+        'homeTeamName': general['homeTeam']['name'],
+        'awayTeamId': away_id,
+        'awayTeamName': general['awayTeam']['name'],
+        'home_goals': header['teams'][0]['score'],
+        'away_goals': header['teams'][1]['score'],
+    }
+    match.update(resolve_match_stats(json_data))
+
+    shots = frame_records(flatten_shots((content.get('shotmap') or {}).get('shots') or []))
+    for shot in shots:
+        shot.update({'matchId': match_id, 'round': match_round})
+
+    players = list((content.get('playerStats') or {}).values())
+    stats = flatten_player_stats(players)
+    player_rows = []
+    for i, player in enumerate(players):
+        row = {column: player.get(column) for column in
+               ['teamId', 'teamName', 'name', 'optaId', 'isGoalkeeper', 'shirtNumber',
+                'usualPosition', 'positionId']}
+        row.update({'matchId': match_id, 'playerId': player.get('id'), 'round': match_round})
+        row.update({column: stats[column][i] for column in PLAYER_STATS_COLUMNS})
+        player_rows.append(row)
+
+    match_info = {'matchId': match_id, 'matchRound': match_round, 'matchDate': match_date}
+    _, value_rows = player_store_rows(match_info, players)
+
+    goals = []
+    events = header.get('events') or {}
+    for side, team_id in (('home', home_id), ('away', away_id)):
+        for scorer_events in (events.get(f'{side}TeamGoals') or {}).values():
+            goals.extend(goal_row(match_id, match_round, team_id, event)
+                         for event in frame_records(flatten_goal_events(scorer_events)))
+
+    return {
+        'matches': [match],
+        'shots': shots,
+        'player_match_stats': player_rows,
+        'player_stat_values': [dict(zip(VALUE_COLUMNS, row)) for row in value_rows],
+        'goals': goals,
+    }
+
+
+# ============================================================================
+# WRITING
+# ============================================================================
+
+def replace_matches(conn, rows):
+    """Delete the matches found in rows from every table, then insert rows (no commit)"""
+    match_ids = {row['matchId'] for table_rows in rows.values() for row in table_rows}
+    for table in TABLES:
+        conn.executemany(f"DELETE FROM {table} WHERE matchId = ?", [(match_id,) for match_id in match_ids])
+    for table, table_rows in rows.items():
+        columns = column_names(table)
+        quoted = ', '.join(f'"{column}"' for column in columns)
+        placeholders = ', '.join('?' * len(columns))
+        conn.executemany(f"INSERT OR REPLACE INTO {table} ({quoted}) VALUES ({placeholders})",
+                         [tuple(sql_value(row.get(column)) for column in columns) for row in table_rows])
+    return match_ids
+
+
+def save_warehouse_rows(rows, db_path=DB_FILE):
+    """
+    Write one match's rows in a single transaction, replacing the match if it is there
+
+    Either every table is updated or, on error, none is. Returns the number of rows written.
+    """
+    with _write_lock:
+        conn = connect(db_path)
+        try:
+            with conn:
+                match_ids = replace_matches(conn, rows)
+        finally:
+            conn.close()
+
+    counts = ', '.join(f"{len(table_rows)} {table}" for table, table_rows in rows.items())
+    print(f"Warehouse: match {', '.join(str(match_id) for match_id in match_ids)} written ({counts})")
+    return sum(len(table_rows) for table_rows in rows.values())
+
+
+def query(sql, params=(), db_path=DB_FILE):
+    """
+    Run a query against the warehouse and return a DataFrame
+
+    Example: query("SELECT * FROM shots WHERE playerId = ?", (956161,))
+    """
+    conn = connect(db_path)
+    try:
+        return pd.read_sql_query(sql, conn, params=params)
+    finally:
+        conn.close()
+
+
+# ============================================================================
+# IMPORT OF THE EXISTING CSVS
+# ============================================================================
+
+def import_csvs(db_path=DB_FILE):
+    """
+    Load every existing CSV into the warehouse in one transaction
+
+    Matches come from fotmob_match_stats.csv, shots and player stats from the
+    per-match CSVs, the remaining player stats from the long-format store, and
+    goals from the scorer CSVs. Matches already in the warehouse are replaced.
+    """
+    rows = {table: [] for table in TABLES}
+    match_dates = {}
+
+    def read_csvs(directory, read=pd.read_csv):
+        for csv_path in sorted(Path(directory).glob('*.csv')):
+            try:
+                df = read(csv_path)
+            except Exception as e:
+                print(f"Error reading {csv_path.name}: {e}")
+                continue
+            if not df.empty:
+                yield df
+
+    shot_columns = set(column_names('shots'))
+    for df in read_csvs(SHOTS_CSV_DIR, read_shots_csv):
+        for record in frame_records(df):
+            match_dates[record['matchId']] = record['matchDate']
+            shot = {column: value for column, value in record.items() if column in shot_columns}
+            shot['round'] = to_int(record['matchRound'])
+            rows['shots'].append(shot)
+
+    for df in read_csvs(PLAYER_CSV_DIR):
+        for record in frame_records(df):
+            match_dates.setdefault(record['matchId'], record['matchDate'])
+            record['playerId'] = record['id']
+            record['round'] = to_int(record['matchRound'])
+            rows['player_match_stats'].append(record)
+
+    if MATCH_STATS_CSV.exists():
+        for record in frame_records(pd.read_csv(MATCH_STATS_CSV)):
+            match_date = match_dates.get(record['matchId'])
+            record.update({
+                'round': to_int(record['matchRound']),
+                'homeTeamId': record['homeTeamid'],
+                'awayTeamId': record['awayTeamid'],
+                'matchDate': match_date,
+                'season': season_of(match_date) if match_date else None,
+            })
+            rows['matches'].append(record)
+
+    if VALUES_FILE.exists():
+        rows['player_stat_values'] = frame_records(pd.read_csv(VALUES_FILE))
+
+    matches = {match['matchId']: match for match in rows['matches']}
+    unmatched = 0
+    for side in SCORER_TEAM_COLUMNS:
+        csv_path = GOALS_CSV_DIR / f'{side}Scorers.csv'
+        if not csv_path.exists():
+            continue
+        for event in frame_records(read_scorers_csv(csv_path, side)):
+            match = matches.get(event['matchId'])
+            if match is None:
+                unmatched += 1
+                continue
+            rows['goals'].append(goal_row(match['matchId'], match['round'], match[f'{side}TeamId'], event))
+
+    start = time.perf_counter()
+    with _write_lock:
+        conn = connect(db_path)
+        try:
+            with conn:
+                match_ids = replace_matches(conn, rows)
+        finally:
+            conn.close()
+
+    print(f"Imported {len(match_ids)} matches in {time.perf_counter() - start:.1f} s: {db_path}")
+    for table, table_rows in rows.items():
+        print(f"- {table}: {len(table_rows)} rows")
+    if unmatched:
+        print(f"{unmatched} scorer rows skipped: no matchId or match not in fotmob_match_stats.csv")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob SQLite warehouse')
+    parser.add_argument('--import-csv', action='store_true',
+                        help='Load the existing CSVs into the warehouse')
+    parser.add_argument('--sql', help='Run a query and print the result')
+    args = parser.parse_args()
+
+    if args.import_csv:
+        import_csvs()
+    elif args.sql:
+        start = time.perf_counter()
+        result = query(args.sql)
+        print(result.to_string())
+        print(f"\n{len(result)} rows in {(time.perf_counter() - start) * 1000:.1f} ms")
+    else:
+        conn = connect()
+        for table in TABLES:
+            count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            print(f"{table}: {count} rows")
+        conn.close()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+FotMob Expected Points
+Win/draw/loss probabilities and expected points of every team in every
+match, from its shots' xG. Each shot is a Bernoulli trial with its xG as the
+probability of scoring, so a team's goals follow a Poisson-binomial
+distribution; it is computed exactly, for all team-matches at once, by
+adding one shot slot at a time to a (team-matches x goals) matrix. The
+results are kept in shots/xpts/team_xpts.csv (built on first use), one row
+per team per match, and a written shots CSV replaces its match's two rows.
+A match without shots gets both teams xG 0 and a certain 0-0 draw.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from fotmob_csv import locked, write_frame
+from fotmob_loader import BACKENDS, load_match_stats, load_shots
+
+
+BASE_DIR = Path(__file__).resolve().parent
+XPTS_DIR = BASE_DIR / 'shots' / 'xpts'
+XPTS_FILE = XPTS_DIR / 'team_xpts.csv'
+
+MATCH_COLUMNS = ['matchId', 'round', 'season', 'homeTeamId', 'homeTeamName', 'awayTeamId', 'awayTeamName',
+                 'home_goals', 'away_goals']
+SHOT_COLUMNS = MATCH_COLUMNS + ['teamId', 'expectedGoals', 'isOwnGoal']
+XPTS_COLUMNS = ['season', 'round', 'matchId', 'teamId', 'teamName', 'isHome', 'opponentId',
+                'shots', 'xG', 'goalsFor', 'goalsAgainst', 'points', 'pWin', 'pDraw', 'pLoss', 'xPts']
+
+
+def goal_distributions(rows, probabilities, n_rows):
+    """
+    Exact goal distributions of n_rows teams from their shots
+
+    rows[i] is the team (0..n_rows-1) that took shot i, probabilities[i] its
+    xG. Returns an (n_rows, max_shots + 1) matrix whose row r is P(team r
+    scores k goals). Shots are laid out as an (n_rows, max_shots) matrix
+    padded with zeros, and the k-goal probabilities are updated one column
+    of shots at a time, for every team at once.
+    """
+    order = np.argsort(rows, kind='stable')
+    rows, probabilities = rows[order], probabilities[order]
+    counts = np.bincount(rows, minlength=n_rows)
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    slots = np.arange(len(rows)) - starts[rows]
+
+    max_shots = int(counts.max()) if n_rows else 0
+    shot_matrix = np.zeros((n_rows, max_shots))
+    shot_matrix[rows, slots] = probabilities
+
+    pmf = np.zeros((n_rows, max_shots + 1))
+    pmf[:, 0] = 1.0
+    for slot in range(max_shots):
+        p = shot_matrix[:, slot:slot + 1]
+        pmf[:, 1:] = pmf[:, 1:] * (1 - p) + pmf[:, :-1] * p
+        pmf[:, :1] *= 1 - p
+    return pmf
+
+
+def outcome_probabilities(home_pmf, away_pmf):
+    """P(home win), P(draw), P(away win) of every match from the two goal distributions"""
+    away_cdf = np.cumsum(away_pmf, axis=1)
+    home_win = (home_pmf[:, 1:] * away_cdf[:, :-1]).sum(axis=1)
+    draw = (home_pmf * away_pmf).sum(axis=1)
+    return home_win, draw, np.clip(1 - home_win - draw, 0, 1)
+
+
+def compute_xpts(shots, matches=None):
+    """
+    Expected points of both teams of every match in a shot table (and in matches)
+
+    shots has the loader's canonical columns (SHOT_COLUMNS), matches the
+    MATCH_COLUMNS of matches that may have no shots at all. Own goals are
+    not shots of the team credited with them and are left out of the
+    distributions; the actual score still counts them.
+    """
+    matches = pd.concat([shots[MATCH_COLUMNS], matches], ignore_index=True) if matches is not None \
+        else shots[MATCH_COLUMNS]
+    matches = matches.drop_duplicates('matchId').sort_values(['season', 'round', 'matchId']).reset_index(drop=True)
+    position = pd.Series(np.arange(len(matches)), index=matches['matchId'])
+
+    own_goal = shots['isOwnGoal'].fillna(False).astype(bool).to_numpy()
+    taken = shots[~own_goal]
+    is_away = (taken['teamId'].to_numpy() == taken['awayTeamId'].to_numpy()).astype(np.int64)
+    rows = position.loc[taken['matchId']].to_numpy() * 2 + is_away
+    probabilities = pd.to_numeric(taken['expectedGoals'], errors='coerce').fillna(0.0).clip(0, 1).to_numpy()
+
+    pmf = goal_distributions(rows, probabilities, 2 * len(matches))
+    home_win, draw, away_win = outcome_probabilities(pmf[0::2], pmf[1::2])
+    shot_counts = np.bincount(rows, minlength=2 * len(matches))
+    xg = np.bincount(rows, weights=probabilities, minlength=2 * len(matches))
+
+    home_goals = matches['home_goals'].to_numpy()
+    away_goals = matches['away_goals'].to_numpy()
+    home_points = np.select([home_goals > away_goals, home_goals == away_goals], [3, 1], 0)
+    away_points = np.select([away_goals > home_goals, home_goals == away_goals], [3, 1], 0)
+
+    sides = []
+    for side, is_home, team, opponent, goals_for, goals_against, points, p_win, p_loss in [
+        (0, True, 'homeTeam', 'awayTeam', home_goals, away_goals, home_points, home_win, away_win),
+        (1, False, 'awayTeam', 'homeTeam', away_goals, home_goals, away_points, away_win, home_win),
+    ]:
+        sides.append(pd.DataFrame({
+            'season': matches['season'].astype(str),
+            'round': matches['round'],
+            'matchId': matches['matchId'],
+            'teamId': matches[f"{team}Id"],
+            'teamName': matches[f"{team}Name"].astype(str),
+            'isHome': is_home,
+            'opponentId': matches[f"{opponent}Id"],
+            'shots': shot_counts[side::2],
+            'xG': xg[side::2].round(4),
+            'goalsFor': goals_for,
+            'goalsAgainst': goals_against,
+            'points': points,
+            'pWin': p_win.round(4),
+            'pDraw': draw.round(4),
+            'pLoss': p_loss.round(4),
+            'xPts': (3 * p_win + draw).round(4),
+        }))
+    return pd.concat(sides).sort_values(['season', 'round', 'matchId', 'isHome'],
+                                        ascending=[True, True, True, False]).reset_index(drop=True)
+
+
+def read_xpts():
+    """Load the stored expected points, or None"""
+    if not XPTS_FILE.exists():
+        return None
+    return pd.read_csv(XPTS_FILE)
+
+
+def save_xpts(xpts):
+    XPTS_DIR.mkdir(parents=True, exist_ok=True)
+    write_frame(xpts[XPTS_COLUMNS], XPTS_FILE)
+
+
+def rebuild_xpts(backend=None):
+    """Compute the expected points of every match in the shot table and save them"""
+    with locked(XPTS_FILE):
+        xpts = compute_xpts(load_shots(columns=SHOT_COLUMNS, backend=backend),
+                            load_match_stats(columns=MATCH_COLUMNS, backend=backend))
+        save_xpts(xpts)
+    print(f"Expected points rebuilt: {len(xpts) // 2} matches")
+    return xpts
+
+
+def update_xpts(df, match):
+    """
+    Replace one match's two rows with those computed from its shots CSV
+
+    df is the per-match shots frame as written, possibly without any rows;
+    match is the match's metadata (matchId, matchRound, matchDate, the team
+    ids and names, home_goals, away_goals).
+    """
+    if df is None or match is None:
+        return
+    from fotmob_dataset import season_of
+
+    match_id = int(match['matchId'])
+    season = season_of(str(match['matchDate']))
+    matches = pd.DataFrame([match]).rename(columns={'matchRound': 'round'}).assign(season=season)
+    shots = df.rename(columns={'matchRound': 'round'}).assign(season=season)
+    with locked(XPTS_FILE):
+        xpts = read_xpts()
+        if xpts is None:
+            rebuild_xpts()
+            return
+        new = compute_xpts(shots.reindex(columns=SHOT_COLUMNS), matches[MATCH_COLUMNS])
+        xpts = pd.concat([xpts[xpts['matchId'] != match_id], new], ignore_index=True)
+        save_xpts(xpts.sort_values(['season', 'round', 'matchId', 'isHome'],
+                                   ascending=[True, True, True, False]))
+    home, away = new.iloc[0], new.iloc[1]
+    print(f"Expected points of match {match_id}: {home['teamName']} {home['xPts']:.2f} - "
+          f"{away['xPts']:.2f} {away['teamName']}")
+
+
+def season_xpts(season):
+    """Per-team totals of a season: points against expected points, goals against xG"""
+    xpts = read_xpts()
+    if xpts is None:
+        xpts = rebuild_xpts()
+    xpts = xpts[xpts['season'] == season]
+    table = xpts.groupby(['teamId', 'teamName'], as_index=False).agg(
+        played=('matchId', 'size'), points=('points', 'sum'), xPts=('xPts', 'sum'),
+        goalsFor=('goalsFor', 'sum'), xG=('xG', 'sum'), goalsAgainst=('goalsAgainst', 'sum'))
+    xg_against = xpts.groupby('opponentId')['xG'].sum()
+    table['xGAgainst'] = table['teamId'].map(xg_against).round(2)
+    table['xPts'] = table['xPts'].round(2)
+    table['xG'] = table['xG'].round(2)
+    table['pointsOverExpected'] = (table['points'] - table['xPts']).round(2)
+    return table.sort_values('xPts', ascending=False).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='FotMob expected points from shot xG')
+    parser.add_argument('--rebuild', action='store_true', help='Recompute the expected points of every match')
+    parser.add_argument('--backend', choices=BACKENDS, help='Where to load the shots from')
+    parser.add_argument('--season', help='Print the expected points table of a season, e.g. 2025-2026')
+    args = parser.parse_args()
+
+    if args.rebuild:
+        rebuild_xpts(args.backend)
+    if args.season:
+        print(season_xpts(args.season).to_string(index=False))
@@ -1,10 +1,9 @@
 import requests
-from bs4 import BeautifulSoup as bs
 import json
 import pandas as pd
 import os
-import time
 from datetime import datetime
+from scorer import fetch_match_json
 
 def fetch_match_data(url):
     """
@@ -12,17 +11,12 @@ def fetch_match_data(url):
     Returns a list of goal scorer names
     """
     try:
-        r = requests.get(url)
-        soup = bs(r.content, 'html.parser')
-
-        # Load JSON data from NEXT_DATA script
-        script_tag = soup.find('script', attrs={'id': '__NEXT_DATA__'})
-        if not script_tag or not script_tag.contents:
+        # Load JSON data from NEXT_DATA script (fetched once per URL)
+        json_fotmob = fetch_match_json(url)
+        if json_fotmob is None:
             print("Could not find NEXT_DATA script tag")
             return []
 
-        json_fotmob = json.loads(script_tag.contents[0])
-
         # Navigate to away team goals
         try:
             away_goals_data = json_fotmob['props']['pageProps']['header']['events']['awayTeamGoals']
@@ -80,9 +74,7 @@ def scrape_goal_scorer_data(url, goal_scorer):
     Returns tuple: (scorer_data, match_round, away_team_id)
     """
     try:
-        r = requests.get(url)
-        soup = bs(r.content, 'html.parser')
-        json_data = json.loads(soup.find('script', attrs={'id': '__NEXT_DATA__'}).contents[0])
+        json_data = fetch_match_json(url)
 
         # Get match round and away team ID
         match_round = json_data['props']['pageProps']['general']['matchRound']
@@ -158,9 +150,6 @@ def process_goal_scorers_csv(csv_file_path, url, output_csv_path, goal_scorer_co
 
             # Add to our list of dataframes
             all_dataframes.append(scorer_df)
-
-            # Add a small delay to be respectful to the server
-            time.sleep(0.5)
         else:
             # Even if no scorer data, we can still add a row with match info
             if match_round is not None and away_team_id is not None:
@@ -1,8 +1,5 @@
 import pandas as pd
-import requests
-import json
-from bs4 import BeautifulSoup as bs
-import time
+from scorer import fetch_match_json
 
 def scrape_goal_scorer_data(url, goal_scorer):
     """
@@ -10,9 +7,7 @@ def scrape_goal_scorer_data(url, goal_scorer):
     Returns tuple: (scorer_data, match_round, home_team_id)
     """
     try:
-        r = requests.get(url)
-        soup = bs(r.content, 'html.parser')
-        json_data = json.loads(soup.find('script', attrs={'id': '__NEXT_DATA__'}).contents[0])
+        json_data = fetch_match_json(url)
 
         # Get match round and home team ID
         match_round = json_data['props']['pageProps']['general']['matchRound']
@@ -91,9 +86,6 @@ def process_goal_scorers_csv(csv_file_path, url, output_csv_path, goal_scorer_co
 
             # Add to our list of dataframes
             all_dataframes.append(scorer_df)
-
-            # Add a small delay to be respectful to the server
-            time.sleep(0.5)
         else:
             # Even if no scorer data, we can still add a row with match info
             if match_round is not None and home_team_id is not None:
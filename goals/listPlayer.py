@@ -1,9 +1,14 @@
 import requests
-from bs4 import BeautifulSoup as bs
 import json
 import pandas as pd
 import os
 from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from fotmob_http import fetch
+from fotmob_parse import next_data_text
 
 def fetch_match_data(url):
     """
@@ -11,17 +16,15 @@ def fetch_match_data(url):
     Returns a list of goal scorer names
     """
     try:
-        r = requests.get(url)
-
-        soup = bs(r.content, 'html.parser')
+        r = fetch(url)
 
         # Load JSON data from NEXT_DATA script
-        script_tag = soup.find('script', attrs={'id': '__NEXT_DATA__'})
-        if not script_tag or not script_tag.contents:
+        script_text = next_data_text(r.content)
+        if not script_text:
             print("Could not find NEXT_DATA script tag")
             return []
 
-        json_fotmob = json.loads(script_tag.contents[0])
+        json_fotmob = json.loads(script_text)
 
         # Navigate to home team goals
         try:
@@ -1,10 +1,30 @@
 import requests
-from bs4 import BeautifulSoup as bs
 import json
 import pandas as pd
-import os
-import time
 from datetime import datetime
+from functools import lru_cache
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from fotmob_csv import append_frame
+from fotmob_events import SCORER_FIELDS, apply_dtypes, flatten_goal_events
+from fotmob_http import fetch
+from fotmob_parse import next_data_text
+
+@lru_cache(maxsize=None)
+def fetch_match_json(url):
+    """
+    Fetch and parse a FotMob match page once per run
+    Every later call for the same URL (home and away passes, each goal scorer)
+    reuses the parsed JSON instead of requesting the page again
+    Returns None if the page has no NEXT_DATA script
+    """
+    r = fetch(url)
+    script_text = next_data_text(r.content)
+    if not script_text:
+        return None
+    return json.loads(script_text)
 
 def fetch_match_data(url, team_type='home'):
     """
@@ -15,17 +35,12 @@ def fetch_match_data(url, team_type='home'):
     Returns a list of goal scorer names
     """
     try:
-        r = requests.get(url)
-        soup = bs(r.content, 'html.parser')
-
-        # Load JSON data from NEXT_DATA script
-        script_tag = soup.find('script', attrs={'id': '__NEXT_DATA__'})
-        if not script_tag or not script_tag.contents:
+        # Load JSON data from NEXT_DATA script (fetched once per URL)
+        json_fotmob = fetch_match_json(url)
+        if json_fotmob is None:
             print(f"Could not find NEXT_DATA script tag for {team_type} team")
             return []
 
-        json_fotmob = json.loads(script_tag.contents[0])
-
         # Navigate to team goals based on team_type
         try:
             if team_type == 'home':
@@ -90,9 +105,7 @@ def scrape_goal_scorer_data(url, goal_scorer, team_type='home'):
     Returns tuple: (scorer_data, match_round, team_id)
     """
     try:
-        r = requests.get(url)
-        soup = bs(r.content, 'html.parser')
-        json_data = json.loads(soup.find('script', attrs={'id': '__NEXT_DATA__'}).contents[0])
+        json_data = fetch_match_json(url)
 
         # Get match round and team ID based on team_type
         match_round = json_data['props']['pageProps']['general']['matchRound']
@@ -156,13 +169,9 @@ def process_goal_scorers_csv(csv_file_path, url, output_csv_path, team_type='hom
             team_id = current_team_id
 
         if scorer_data is not None:
-            # Convert the data to a DataFrame
-            if isinstance(scorer_data, dict):
-                scorer_df = pd.DataFrame([scorer_data])
-            elif isinstance(scorer_data, list):
-                scorer_df = pd.DataFrame(scorer_data)
-            else:
-                scorer_df = pd.DataFrame({'value': [scorer_data]})
+            # Convert the data to a DataFrame, flattening player/shotmapEvent/newScore
+            events = scorer_data if isinstance(scorer_data, list) else [scorer_data]
+            scorer_df = flatten_goal_events(events)
 
             # Add columns to identify which goal scorer this data belongs to and match info
             scorer_df['goal_scorer'] = scorer
@@ -176,9 +185,6 @@ def process_goal_scorers_csv(csv_file_path, url, output_csv_path, team_type='hom
 
             # Add to our list of dataframes
             all_dataframes.append(scorer_df)
-
-            # Add a small delay to be respectful to the server
-            time.sleep(0.5)
         else:
             # Even if no scorer data, we can still add a row with match info
             if match_round is not None and team_id is not None:
@@ -199,15 +205,13 @@ def process_goal_scorers_csv(csv_file_path, url, output_csv_path, team_type='hom
     # Combine all dataframes
     if all_dataframes:
         final_df = pd.concat(all_dataframes, ignore_index=True)
+        final_df = apply_dtypes(final_df, SCORER_FIELDS[team_type], keep_extra=False)
 
         # Append to existing CSV file or create new one if it doesn't exist
         try:
-            if os.path.exists(output_csv_path):
-                final_df.to_csv(output_csv_path, mode='a', header=False, index=False)
-                print(f"{team_type.capitalize()} team data appended successfully to {output_csv_path}")
-            else:
-                final_df.to_csv(output_csv_path, index=False)
-                print(f"New file created and {team_type} team data saved to {output_csv_path}")
+            # Locked, checked against the file's header and written atomically
+            append_frame(final_df, output_csv_path)
+            print(f"{team_type.capitalize()} team data appended successfully to {output_csv_path}")
 
             print(f"Final {team_type} team dataset shape: {final_df.shape}")
             print(f"Match Round: {match_round}")